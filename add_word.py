@@ -1,13 +1,24 @@
-import os, csv, shutil
-from bin import ask, guess, cardbank, builder
+import os, sys, csv
+from bin import ask, guess, cardbank, builder, history, importer, sources
+from bin.browser import BrowserPool
+from bin.infinitives import InfinitiveIndex
 from bin.constants import VOWELS
 import build_card_bank
 
 
-def main():
+def main(offline=False):
+    # browser shared by validity check and build, so it's only launched once
+    pool = BrowserPool()
+    try:
+        _main(pool, offline)
+    finally:
+        pool.close()
+
+
+def _main(pool, offline=False):
     # start with infinitive form
     print("Enter Portuguese infinitive:")
-    infinitive = input("> ").strip().lower()
+    infinitive = ask.line().strip().lower()
 
     # check if already exists in card bank
     bank = []
@@ -23,17 +34,25 @@ def main():
         if not ask.yes_no("'{0}' already exists. Overwrite?".format(infinitive)):
             exit()
     else:
-        # otherwise, check valid infinitive by checking conjugator website accepts it
-        print("Checking '{0}' is valid (may take a second)..".format(infinitive))
-        session = builder.session()
-        page = session.get(builder.URL.format(infinitive))
-        page.html.render()
-        warning = page.html.find("#warning", first=True)
-        page.close()
-        session.close()
-        if warning and warning.text:
-            print("Infinitive ({0}) invalid {1}\n{2}".format(infinitive, warning.text, builder.URL.format(infinitive)))
-            exit()
+        # otherwise, check valid infinitive in local index of known infinitives
+        index = InfinitiveIndex()
+        if infinitive not in index:
+            if offline:
+                print("Infinitive ({0}) not in known infinitives ({1})".format(infinitive, index.filepath))
+                exit()
+            # fall back to checking conjugator website accepts it
+            print("Checking '{0}' is valid (may take a second)..".format(infinitive))
+            try:
+                with pool.session() as session:
+                    warning = builder.check_infinitive(infinitive, session=session)
+            except Exception as e:
+                # only known valid words are added to index, so try again later
+                print("Could not check infinitive ({0}) is valid: {1}".format(infinitive, e))
+                exit()
+            if warning:
+                print("Infinitive ({0}) invalid {1}\n{2}".format(infinitive, warning, builder.URL.format(infinitive)))
+                exit()
+            index.add([infinitive])
 
     # main definition create process in here
     card = create_word(infinitive)
@@ -53,22 +72,84 @@ def main():
 
     print("")
 
-    # backup card bank basic (card bank with all basic definitions but not built out)
-    if os.path.exists("bank/card-bank-basic.csv"):
-        shutil.copyfile("bank/card-bank-basic.csv", "bank/card-bank-basic.bkp.csv")
-        print("Old word list backed up as: bank/card-bank-basic.bkp.csv")
+    write_basic(bank, message="{0} {1}".format("revise" if existing else "add", infinitive))
+
+    print("")
 
-    # write new card bank basic
+    # now build and write completed card bank with new card
+    build_card_bank.add_build([card], source=sources.make_chain(pool=pool))
+
+
+def write_basic(bank, message=""):
+    '''Write card bank basic (card bank with all basic definitions but not built out), recording old and new 
+    versions in history.'''
+    if os.path.exists("bank/card-bank-basic.csv"):
+        history.snapshot("bank/card-bank-basic.csv", message="before " + message if message else "")
     with open("bank/card-bank-basic.csv", "w", newline="", encoding="utf-8") as csvf:
         writer = csv.DictWriter(csvf, fieldnames=builder.BASIC_FIELDS)
         writer.writeheader()
         writer.writerows(bank)
     print("New word list written to: bank/card-bank-basic.csv")
+    version = history.snapshot("bank/card-bank-basic.csv", message=message)
+    print("Word list history version {0} (see bank_history.py to list, diff, or roll back)".format(version["n"]))
 
-    print("")
 
-    # now build and write completed card bank with new card
-    build_card_bank.add_build([card])
+def import_words(filepath, overwrite=False, check=True, workers=8, offline=False):
+    '''Add words from CSV/TSV file without prompts (see `importer.read_words()` for format), then build them 
+    all in one pass.'''
+    cards, errors = importer.read_words(filepath)
+    for line, error in errors:
+        print("Skipping line {0}: {1}".format(line, error))
+
+    bank = []
+    if os.path.exists("bank/card-bank-basic.csv"):
+        bank = cardbank.read("bank/card-bank-basic.csv", build_forms=False)
+    positions = {card["inf"]: i for i, card in enumerate(bank)}
+    if not overwrite:
+        existing = [card["inf"] for card in cards if card["inf"] in positions]
+        if existing:
+            print("Skipping {0} word(s) already in word list (use -overwrite to replace): {1}".format(
+                len(existing), ", ".join(existing)
+            ))
+        cards = [card for card in cards if card["inf"] not in positions]
+
+    # browsers shared by validity checks and build
+    pool = BrowserPool(size=workers)
+    try:
+        _import_words(cards, filepath, bank, positions, pool, check, workers, offline)
+    finally:
+        pool.close()
+
+
+def _import_words(cards, filepath, bank, positions, pool, check, workers, offline):
+    # words already in card bank or local index are known to be valid, check the rest concurrently
+    if check and cards:
+        index = InfinitiveIndex()
+        unknown = [card["inf"] for card in cards if card["inf"] not in positions and card["inf"] not in index]
+        invalid = {}
+        if unknown and offline:
+            invalid = {inf: "not in known infinitives ({0})".format(index.filepath) for inf in unknown}
+        elif unknown:
+            print("Checking {0} word(s) not in known infinitives are valid..".format(len(unknown)))
+            invalid = importer.validate(unknown, importer.WebChecker(pool), workers=workers)
+            index.add([inf for inf in unknown if inf not in invalid])
+        for inf, reason in invalid.items():
+            print("Skipping invalid infinitive ({0}): {1}".format(inf, reason))
+        cards = [card for card in cards if card["inf"] not in invalid]
+
+    if not cards:
+        print("No words to import")
+        return
+
+    for card in cards:
+        if card["inf"] in positions:
+            bank[positions[card["inf"]]] = card
+        else:
+            bank.append(card)
+    print("")
+    write_basic(bank, message="import {0} word(s) from {1}".format(len(cards), os.path.basename(filepath)))
+    print("")
+    build_card_bank.add_build(cards, source=sources.make_chain(pool=pool))
 
 
 def create_word(infinitive):
@@ -125,7 +206,7 @@ def create_word(infinitive):
     hint_rules = []
     if ask.yes_no("Do you want to add a hint/clarification note?"):
         print("Enter hint/clarification note.")
-        hint = input("> ").strip()
+        hint = ask.line().strip()
     if hint:
         hint_to_eng = False
         hint_from_eng = False
@@ -201,9 +282,9 @@ def ask_forms(type_str="", same_line=False, prefix="", guess_forms=None, expecte
             question = "Enter unique {0} verb form[s] (add multiple separated by a forward-slash '/').".format(type_str)
         print(question)
     if prefix:
-        input_forms = input("> {0} ".format(prefix))
+        input_forms = ask.line("> {0} ".format(prefix))
     else:
-        input_forms = input("> ")
+        input_forms = ask.line()
     input_forms = [form.strip().lower() for form in input_forms.split("/")]
     input_forms = [form for form in input_forms if len(form)]
     if not input_forms:
@@ -218,7 +299,7 @@ def ask_forms(type_str="", same_line=False, prefix="", guess_forms=None, expecte
 def ask_limit_hints(infinitives):
     print("For which definitions (by number/position) do you want to limit it for? Type all that apply, separated by a comma, semicolon, or space.")
     print("  " + ", ".join("({0}) {1}".format(i+1, form) for i, form in enumerate(infinitives)))
-    responses = input("> ").replace(";", " ").replace(",", " ").strip().lower().split()
+    responses = ask.line().replace(";", " ").replace(",", " ").strip().lower().split()
     try:
         responses = list(set(int(x) for x in responses))
     except:
@@ -240,4 +321,56 @@ def ask_limit_hints(infinitives):
 
 
 if __name__ == "__main__":
-    main()
+    args = {}
+    rename = {
+        "h": "help", 
+        "i": "import", 
+        "o": "overwrite", 
+        "w": "workers", 
+        "x": "offline"
+    }
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args:
+        print("""
+Add a word to the card bank. Without parameters, asks for the definition.
+
+    -h | -help          Shows help information.
+    -i | -import        Import words from a CSV or TSV file without prompts, 
+                        then build them all at once. Columns are infinitive,
+                        then English 1st person form(s), optionally followed by
+                        3rd person, plural, infinitive, gerund, past, and past 
+                        perfect forms and a hint. Or use a header row with card
+                        bank field names. English forms left out are guessed.
+    -o | -overwrite     With -import, replace words already in the word list.
+    -w | -workers       With -import, number of validity checks to run at
+                        once. Default is 8.
+    -skip-check         With -import, don't check words are valid before
+                        building (invalid words still fail to build).
+    -x | -offline       Only accept words in the known infinitives list 
+                        (bank/infinitives.txt, see build_infinitives.py), 
+                        instead of checking unknown words on the website.
+""")
+    elif "import" in args:
+        if not isinstance(args["import"], list) or len(args["import"]) != 1:
+            raise Exception("Bad argument. Import requires one filepath.")
+        if "workers" in args and not isinstance(args["workers"], list):
+            raise Exception("Bad argument. Workers requires a number.")
+        import_words(
+            args["import"][0], 
+            overwrite=("overwrite" in args), 
+            check=("skip-check" not in args), 
+            workers=int(args["workers"][0]) if "workers" in args else 8, 
+            offline=("offline" in args)
+        )
+    else:
+        main(offline=("offline" in args))
@@ -0,0 +1,58 @@
+import sys
+from bin.cardbank import read_rows
+from bin.analytics import AnswerStats, report, DEFAULT_ANSWER_LOG
+
+
+def main(filepath=DEFAULT_ANSWER_LOG, num=10, min_attempts=3, half_life=14, to_english=None):
+    infinitives = [infinitive for infinitive, row in read_rows("bank/card-bank-built.csv")[1]]
+    stats = AnswerStats(infinitives, filepath, half_life=half_life, to_english=to_english)
+    print(report(stats, n=num, min_attempts=min_attempts) or "No answers logged yet.")
+
+
+if __name__ == "__main__":
+    args = {}
+    rename = {
+        "h": "help",
+        "f": "file",
+        "n": "num",
+        "m": "min-attempts",
+        "l": "half-life",
+        "d": "direction"
+    }
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args:
+        print("""
+Report accuracy and the weakest verbs and tenses (highest recent error rate)
+from the log of past answers (needs numpy).
+
+    -h | -help          Shows help information.
+    -f | -file          Answer log filepath. Default is bank/answers.log.
+    -n | -num           Number of verbs and tenses to list. Default is 10.
+    -m | -min-attempts  Only list verbs and tenses answered at least this many
+                        times. Default is 3.
+    -l | -half-life     Days after which an answer counts half as much towards
+                        recent error rates. Default is 14.
+    -d | -direction     Only count 'english' (Portuguese-to-English) or
+                        'portuguese' (English-to-Portuguese) answers.
+""")
+    else:
+        direction = args["direction"][0] if "direction" in args else None
+        if direction not in (None, "english", "portuguese"):
+            raise Exception("Bad argument. Direction must be 'english' or 'portuguese'.")
+        main(
+            filepath=args["file"][0] if "file" in args else DEFAULT_ANSWER_LOG,
+            num=int(args["num"][0]) if "num" in args else 10,
+            min_attempts=int(args["min-attempts"][0]) if "min-attempts" in args else 3,
+            half_life=float(args["half-life"][0]) if "half-life" in args else 14,
+            to_english=None if direction is None else (direction == "english")
+        )
@@ -0,0 +1,126 @@
+import os, sys, csv, time
+from bin import history
+from bin import sqlitebank
+import build_card_bank
+
+
+TABLES = {
+    "built": "bank/card-bank-built.csv",
+    "basic": "bank/card-bank-basic.csv"
+}
+
+
+def _read_cards(table):
+    with open(table, "r", encoding="utf-8") as csvf:
+        for card in csv.DictReader(csvf):
+            yield card
+
+
+def main(options=None):
+    options = options if options else {}
+    table = TABLES["basic"] if "basic" in options else TABLES["built"]
+    command = options["command"][0] if options.get("command") else None
+    numbers = [int(n) for n in options["command"][1:]] if options.get("command") else []
+
+    if command == "list":
+        found = history.versions(table)
+        if not found:
+            print("No history recorded for: {0}".format(table))
+            return
+        for version in found:
+            print("{0:>4}  {1}  {2:>5} cards  {3}".format(
+                version["n"], 
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(version["time"])), 
+                version["rows"], 
+                version["message"]
+            ))
+
+    elif command == "diff":
+        # default to comparing latest with version before it
+        if not numbers:
+            numbers = [-2]
+        changes = history.diff(table, numbers[0], numbers[1] if len(numbers) > 1 else None)
+        for inf in changes["added"]:
+            print("+ {0}".format(inf))
+        for inf in changes["removed"]:
+            print("- {0}".format(inf))
+        for inf, fields in changes["changed"]:
+            print("~ {0}".format(inf))
+            for field, old, new in fields:
+                print("    {0}: {1} -> {2}".format(field, old, new))
+        if not changes["added"] and not changes["removed"] and not changes["changed"]:
+            print("No changes")
+
+    elif command == "rollback":
+        if len(numbers) != 1:
+            raise Exception("Bad argument. Rollback requires one version number.")
+        # database is in sync with latest recorded version of built card bank (see `build_card_bank`)
+        before = history.get_version(table)["n"]
+        version = history.rollback(table, numbers[0])
+        print("{0} rolled back to version {1} (recorded as version {2})".format(table, numbers[0], version["n"]))
+        if table == TABLES["built"] and os.path.exists(sqlitebank.DEFAULT_DATABASE):
+            changes = history.diff(table, before, version["n"])
+            changed = set(changes["added"] + [inf for inf, fields in changes["changed"]])
+            build_card_bank.update_database(
+                _read_cards(table), 
+                (card for card in _read_cards(table) if card["inf"] in changed)
+            )
+            print("Card bank database updated: {0}".format(sqlitebank.DEFAULT_DATABASE))
+
+    elif command == "snapshot":
+        version = history.snapshot(table, message=" ".join(options["message"]) if "message" in options else "snapshot")
+        print("{0} recorded as version {1}".format(table, version["n"]))
+
+    else:
+        raise Exception("Unknown command: {0}".format(command))
+
+
+if __name__ == "__main__":
+    args = {"command": []}
+    rename = {
+        "h": "help", 
+        "b": "basic", 
+        "m": "message"
+    }
+    # command and version numbers are given first, without a parameter name
+    in_arg = "command"
+    for arg in sys.argv[1:]:
+        # negative version numbers aren't parameter names
+        if arg.startswith("-") and not arg[1:].isdigit():
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+            # takes no value, anything after is still the command
+            if in_arg == "basic":
+                in_arg = "command"
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args or not args["command"]:
+        print("""
+List, compare, and roll back versions of the card bank files. Versions are
+recorded whenever the card bank is built or a word is added, storing only the
+rows that changed (under bank/history/).
+
+    python bank_history.py list
+        List versions.
+    python bank_history.py diff [from] [to]
+        Show cards added (+), removed (-), and changed (~) between versions.
+        Defaults to the latest version and the one before it. If only one
+        version is given, compares it with the latest.
+    python bank_history.py rollback <version>
+        Restore card bank file to version. The rollback is recorded as a new
+        version, so it can be undone the same way. The card bank database
+        (bank/card-bank.db), if used, is updated to match.
+    python bank_history.py snapshot [-m message]
+        Record current card bank file as a version, e.g. after editing it by
+        hand. Nothing is recorded if unchanged.
+
+Add -b | -basic to use bank/card-bank-basic.csv instead of the built card bank.
+Versions can be counted back from the latest with negative numbers (e.g. -2
+for the one before the latest).
+""")
+    else:
+        main(args)
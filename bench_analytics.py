@@ -0,0 +1,53 @@
+import os, sys, time, random, tempfile
+from bin import analytics
+from bin.cardbank import read_rows
+from bin.constants import TENSE_VALUES
+
+
+def _write_log(filepath, infinitives, num_answers, seed=1):
+    '''Write synthetic answer log: random words and slots over the last 90 days, about 75% correct.'''
+    np = analytics._numpy()
+    rng = np.random.default_rng(seed)
+    with open(filepath + ".words", "w", encoding="utf-8") as outf:
+        outf.write("".join(infinitive + "\n" for infinitive in infinitives))
+    records = np.zeros(num_answers, dtype=np.dtype(list(analytics._FIELDS)))
+    records["time"] = time.time() - rng.random(num_answers)*90*86400
+    records["word"] = rng.integers(0, len(infinitives), num_answers)
+    records["seconds"] = rng.exponential(4, num_answers)
+    records["tense"] = np.array(TENSE_VALUES)[rng.integers(0, len(TENSE_VALUES), num_answers)]
+    records["person"] = rng.integers(1, 4, num_answers)
+    records["singular"] = rng.integers(0, 2, num_answers)
+    records["to_english"] = rng.random(num_answers) < 0.3
+    records["correct"] = rng.random(num_answers) < 0.75
+    records.tofile(filepath)
+
+
+def main(sizes):
+    infinitives = [infinitive for infinitive, row in read_rows("bank/card-bank-built.csv")[1]]
+    print("{0:>10} {1:>10} {2:>12} {3:>12}".format("answers", "size (MB)", "stats (ms)", "report (ms)"))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filepath = os.path.join(temp_dir, "answers.log")
+        for num_answers in sizes:
+            _write_log(filepath, infinitives, num_answers)
+            start = time.perf_counter()
+            stats = analytics.AnswerStats(infinitives, filepath)
+            loaded = time.perf_counter()
+            analytics.report(stats)
+            done = time.perf_counter()
+            print("{0:>10} {1:>10.1f} {2:>12.1f} {3:>12.1f}".format(
+                num_answers, os.path.getsize(filepath)/1e6, 1000*(loaded - start), 1000*(done - loaded)
+            ))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "-help"):
+        print("""
+Time loading answer history into answer statistics and reporting the weakest
+verbs and tenses, using synthetic answer logs (needs numpy).
+
+    python bench_analytics.py [answers ...]
+
+Default sizes are 10000, 100000, 1000000, and 5000000 answers.
+""")
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000, 5000000])
@@ -0,0 +1,118 @@
+import sys, os, time, asyncio, tempfile, threading
+import concurrent.futures
+from bin import builder, sources
+from bin.standin import StandinConjugator
+
+
+def _run(infinitives, get, workers=1):
+    '''Get all infinitives, returns time taken and results by infinitive (None where get failed).'''
+    get = _or_none(get)
+    start = time.perf_counter()
+    if workers == 1:
+        results = {inf: get(inf) for inf in infinitives}
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            results = dict(zip(infinitives, pool.map(get, infinitives)))
+    return time.perf_counter() - start, results
+
+
+def _or_none(get):
+    '''Wrap get function to return None instead of raising for injected server errors (or pages that can't be
+    parsed). Anything else (e.g. requests_html not installed) is raised, rather than counted as wrong.'''
+    def get_or_none(infinitive):
+        try:
+            return get(infinitive)
+        except builder.PageError:
+            return None
+    return get_or_none
+
+
+def _threaded_source(render):
+    '''Get function using a scraper source per thread, as sessions aren't shared between threads.'''
+    local = threading.local()
+    created = []
+    def get(infinitive):
+        if not hasattr(local, "source"):
+            # page rendering needs an event loop, which only the main thread has by default
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            local.source = sources.ScraperSource(delay=0, render=render)
+            created.append(local.source)
+        return local.source.get(infinitive)
+    def close():
+        for source in created:
+            source.close()
+    return get, close
+
+
+def main(num_verbs=50, workers=8, latency=0.05, error_rate=0, render=False):
+    standin = StandinConjugator("bank/card-bank-built.csv", latency=latency, error_rate=error_rate, seed=1)
+    builder.URL = standin.start()
+    expected = standin.tense_maps
+    infinitives = sorted(expected)[:num_verbs]
+    print("Stand-in at {0} ({1}s latency, {2:.0%} errors), {3} verbs\n".format(
+        builder.URL, latency, error_rate, len(infinitives)
+    ))
+    print("{0:<24} {1:>10} {2:>12} {3:>8}".format("mode", "total (s)", "per verb (ms)", "wrong"))
+
+    def report(mode, elapsed, results):
+        wrong = sum(
+            1 for inf, result in results.items() if result is None or sources.compare(result, expected[inf])
+        )
+        print("{0:<24} {1:>10.2f} {2:>12.1f} {3:>8}".format(mode, elapsed, 1000*elapsed/len(results), wrong))
+
+    modes = [("static", False)] + ([("render", True)] if render else [])
+    try:
+        for name, render_pages in modes:
+            source = sources.ScraperSource(delay=0, render=render_pages)
+            try:
+                report(name, *_run(infinitives, source.get))
+            finally:
+                source.close()
+            get, close = _threaded_source(render_pages)
+            try:
+                report("{0}, {1} threads".format(name, workers), *_run(infinitives, get, workers))
+            finally:
+                close()
+
+        # cached: results read from source's cache file, as on the next build
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_file = os.path.join(temp_dir, "scraper.json")
+            source = sources.ScraperSource(cache_file, delay=0, render=False)
+            _run(infinitives, source.get)
+            source.close()
+            start = time.perf_counter()
+            source = sources.ScraperSource(cache_file, delay=0, render=False)
+            elapsed, results = _run(infinitives, source.get)
+            report("cached", time.perf_counter() - start, results)
+            source.close()
+
+        # local rules (verbs rules don't answer are counted wrong)
+        report("rules", *_run(infinitives, sources.RulesSource().get))
+    finally:
+        standin.stop()
+
+    print("\n{0} requests to stand-in ({1} errors injected)".format(standin.requests, standin.errors))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "-help"):
+        print("""
+Benchmark building card conjugations against a local stand-in for the 
+conjugator website (see conjugator_server.py), so runs are repeatable and need
+no network. Compares sequential, concurrent, cached, and rule-based builds, and
+checks results against the card bank.
+
+    python bench_builder.py [verbs] [threads] [latency] [error rate] [-render]
+
+Defaults are 50 verbs, 8 threads, 0.05s latency, no errors. Pages are parsed
+without rendering unless -render is given (needs Chromium for requests_html).
+""")
+    else:
+        args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+        main(
+            int(args[0]) if len(args) > 0 else 50, 
+            int(args[1]) if len(args) > 1 else 8, 
+            float(args[2]) if len(args) > 2 else 0.05, 
+            float(args[3]) if len(args) > 3 else 0, 
+            render=("-render" in sys.argv)
+        )
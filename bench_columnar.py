@@ -0,0 +1,74 @@
+import sys, os, time, random
+import multiprocessing
+from bin.constants import TENSE
+from bin.cardbank import CardBank
+from bin.columnar import ColumnarCardBank
+
+
+def _memory():
+    '''Get this process' resident memory in kB, as (total, anonymous/private, file-backed/shareable).'''
+    values = {}
+    with open("/proc/self/status", "r") as inf:
+        for line in inf:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                values[key] = int(value.split()[0])
+    return values.get("VmRSS", 0), values.get("RssAnon", 0), values.get("RssFile", 0)
+
+
+def _worker(job):
+    '''Load card bank and touch some cards, like a session would. Returns load time and memory.'''
+    kind, card_bank_table, columnar_filepath, num_touch = job
+    start = time.perf_counter()
+    if kind == "csv":
+        bank = CardBank(card_bank_table, "bank/card-bank-similar.csv")
+    else:
+        bank = ColumnarCardBank(columnar_filepath, "bank/card-bank-similar.csv")
+    load_time = time.perf_counter() - start
+    rng = random.Random(os.getpid())
+    for _ in range(num_touch):
+        bank.get_verbs(bank[rng.randrange(len(bank))], tense=TENSE.PRESENT)
+    # hold briefly so all workers are resident at the same time
+    time.sleep(0.5)
+    return (load_time,) + _memory()
+
+
+def main(card_bank_table, columnar_filepath, num_touch=20):
+    # spawn so each worker loads on its own, rather than inheriting parent memory
+    context = multiprocessing.get_context("spawn")
+    print("{0:<10} {1:>5} {2:>12} {3:>12} {4:>12} {5:>12}".format(
+        "format", "procs", "load (ms)", "rss (kB)", "private (kB)", "shared (kB)"
+    ))
+    for kind in ("csv", "columnar"):
+        for processes in (1, 16):
+            with context.Pool(processes=processes) as pool:
+                results = pool.map(_worker, [(kind, card_bank_table, columnar_filepath, num_touch)]*processes)
+            print("{0:<10} {1:>5} {2:>12.1f} {3:>12.0f} {4:>12.0f} {5:>12.0f}".format(
+                kind, 
+                processes, 
+                1000*sum(r[0] for r in results)/processes, 
+                sum(r[1] for r in results)/processes, 
+                sum(r[2] for r in results)/processes, 
+                sum(r[3] for r in results)/processes
+            ))
+    print("\nValues are per process averages. Private memory is what each process holds on its own, shared")
+    print("memory (file-backed pages, including the memory-mapped card bank) is one copy across processes.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "-help"):
+        print("""
+Benchmark card bank load time and memory, CSV vs memory-mapped columnar format,
+with 1 and 16 processes each loading the card bank. Linux only (reads memory
+usage from /proc).
+
+    python bench_columnar.py [CSV] [columnar file] [cards touched per process]
+
+Create the columnar file first with convert_columnar.py.
+""")
+    else:
+        main(
+            sys.argv[1] if len(sys.argv) > 1 else "bank/card-bank-built.csv", 
+            sys.argv[2] if len(sys.argv) > 2 else "bank/card-bank-built.pvcb", 
+            int(sys.argv[3]) if len(sys.argv) > 3 else 20
+        )
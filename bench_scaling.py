@@ -0,0 +1,78 @@
+import sys, time, tempfile, tracemalloc
+from bin import synthetic, tester
+from bin.cardbank import CardBank
+from bin.session import Session
+
+
+def _measure(stage, results, func):
+    '''Run stage, recording time, peak memory while running, and memory still held after.'''
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.append((stage, elapsed, (peak - before)/1e6, (current - before)/1e6))
+    return value
+
+
+def _session(bank, num_words, num_questions=3, seed=None):
+    '''Pick words and ask/grade questions (answering correctly) the same way as an interactive session.'''
+    session = Session.new(bank, num_words=num_words, num_questions=num_questions, seed=seed)
+    while True:
+        question = session.next_question()
+        if not question:
+            return session.tally["correct"]
+        session.submit(tester.get_answers(question["verbs"], question["to_english"])[0])
+
+
+def main(scales, num_words=50, max_index=5000, seed=1):
+    print("{0:>8} {1:<16} {2:>10} {3:>12} {4:>14}".format("verbs", "stage", "time (s)", "peak (MB)", "retained (MB)"))
+    for num_verbs in scales:
+        results = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cards, similars = _measure(
+                "generate", results, lambda: synthetic.generate(num_verbs, seed=seed)
+            )
+            basic_table, built_table, similar_table = synthetic.write(cards, similars, temp_dir)
+            del cards, similars
+            lazy = _measure("load (lazy)", results, lambda: CardBank(built_table, similar_table, lazy=True))
+            _measure("session (lazy)", results, lambda: _session(lazy, min(num_words, num_verbs), seed=seed))
+            del lazy
+            bank = _measure("load (eager)", results, lambda: CardBank(built_table, similar_table))
+            _measure("session", results, lambda: _session(bank, min(num_words, num_verbs), seed=seed))
+            # fuzzy index grows much faster than card bank, so indexes only built up to a size
+            if num_verbs <= max_index:
+                _measure("form index", results, bank.get_form_index)
+                _measure("fuzzy index", results, bank.get_fuzzy_index)
+                _measure("gloss index", results, bank.get_gloss_index)
+            del bank
+        for stage, elapsed, peak, retained in results:
+            print("{0:>8} {1:<16} {2:>10.3f} {3:>12.1f} {4:>14.1f}".format(num_verbs, stage, elapsed, peak, retained))
+        print("")
+    print("Times include memory tracing overhead, so compare them between sizes rather than to untraced runs.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "-help"):
+        print("""
+Report how card bank loading, sessions, and indexes scale with card bank size,
+using synthetic card banks (same verb ending, definition, and similar group
+distributions as the real card bank). For each size, shows time and peak
+memory (tracemalloc) per stage, and memory still held after.
+
+    python bench_scaling.py [verbs ...] [-w words per session] [-i max verbs]
+
+Default sizes are 1000, 10000, and 100000 verbs, with 50 words per session.
+Indexes (form, fuzzy, gloss) are only built for sizes up to -i verbs (default
+5000), as the fuzzy index takes minutes and gigabytes past that.
+""")
+    else:
+        args = sys.argv[1:]
+        options = {"-w": 50, "-i": 5000}
+        for flag in options:
+            if flag in args:
+                options[flag] = int(args[args.index(flag)+1])
+                del args[args.index(flag):args.index(flag)+2]
+        main([int(arg) for arg in args] or [1000, 10000, 100000], options["-w"], options["-i"])
@@ -0,0 +1,365 @@
+from .constants import TENSE_VALUES, PERSON_VALUES
+from . import tester
+import os, time, struct, random
+
+
+DEFAULT_ANSWER_LOG = "bank/answers.log"
+
+# one fixed-size record per answer, appended as answered: time answered, word id (line number in words file),
+# seconds taken, tense, person, singular, to-English, correct, and timed out
+_RECORD = struct.Struct("<dIfBBBBBB")
+_FIELDS = (
+    ("time", "<f8"),
+    ("word", "<u4"),
+    ("seconds", "<f4"),
+    ("tense", "u1"),
+    ("person", "u1"),
+    ("singular", "u1"),
+    ("to_english", "u1"),
+    ("correct", "u1"),
+    ("timed_out", "u1")
+)
+
+
+def _numpy():
+    # only imported when needed, so answers can be logged without it
+    try:
+        import numpy
+    except ImportError:
+        raise Exception("Answer analytics needs numpy (`pip install numpy`).")
+    return numpy
+
+
+def _words_path(filepath):
+    return filepath + ".words"
+
+
+def read_words(filepath=DEFAULT_ANSWER_LOG):
+    '''Read infinitives of answer log word ids (list index is word id).'''
+    if not os.path.exists(_words_path(filepath)):
+        return []
+    with open(_words_path(filepath), "r", encoding="utf-8") as inf:
+        return [line.rstrip("\n") for line in inf]
+
+
+class AnswerLog:
+    '''
+    Append-only log of answers, as fixed-size binary records so millions can be loaded at once (see
+    `load()`). Words are stored as ids, with infinitives listed in a words file alongside (log filepath plus
+    ".words"), so the log still holds if the card bank is reordered.
+
+    Params:
+        filepath (str, optional): Log filepath.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        words (list[str]): Infinitives by word id.
+        word_ids (dict): Word ids by infinitive.
+    '''
+
+    def __init__(self, filepath=DEFAULT_ANSWER_LOG):
+        self.filepath = filepath
+        self.words = read_words(filepath)
+        self.word_ids = {word: i for i, word in enumerate(self.words)}
+
+    def append(self, infinitive, result, to_english, when=None):
+        '''Log answer.
+        Params:
+            infinitive (str): Portuguese infinitive.
+            result (dict): Results dict. See `tester.english_to_portuguese()`.
+            to_english (bool): True if Portuguese-to-English question.
+            when (float, optional): Time answered (Unix time). Defaults to now.
+        '''
+        word_id = self.word_ids.get(infinitive)
+        if word_id is None:
+            # word listed before any record uses it, so an interrupted write never leaves an unknown id
+            with open(_words_path(self.filepath), "a", encoding="utf-8") as outf:
+                outf.write(infinitive + "\n")
+            word_id = self.word_ids[infinitive] = len(self.words)
+            self.words.append(infinitive)
+        with open(self.filepath, "ab") as outf:
+            outf.write(_RECORD.pack(
+                time.time() if when is None else when,
+                word_id,
+                result.get("time", 0),
+                result["tense"],
+                result["person"],
+                int(result["singular"]),
+                int(to_english),
+                int(result["correct"]),
+                int(result.get("timed_out", False))
+            ))
+
+
+def load(filepath=DEFAULT_ANSWER_LOG):
+    '''Load answer log into NumPy structured array (fields as in `AnswerLog.append()`).
+    Returns:
+        Tuple of infinitives by word id (list[str]) and records (numpy.ndarray).
+    '''
+    np = _numpy()
+    words = read_words(filepath)
+    dtype = np.dtype(list(_FIELDS))
+    if not os.path.exists(filepath):
+        return words, np.zeros(0, dtype=dtype)
+    # ignore partial record at end, if last write was interrupted
+    count = os.path.getsize(filepath)//dtype.itemsize
+    return words, np.fromfile(filepath, dtype=dtype, count=count)
+
+
+def _indexed(infinitives, filepath=DEFAULT_ANSWER_LOG, half_life=14, to_english=None, now=None):
+    '''Load answer log as index arrays (answers for words not in card bank dropped).
+    Returns:
+        Tuple of arrays per answer: card position, tense position (in `TENSE_VALUES`), person (0-2), number (0
+        singular, 1 plural), correct (1.0 or 0.0), and recency weight (1.0 now, halving every half life days).
+    '''
+    np = _numpy()
+    words, records = load(filepath)
+
+    # word ids to card positions, and tense values to positions (-1 if unknown)
+    positions = {infinitive: i for i, infinitive in enumerate(infinitives)}
+    card_of_word = np.array([positions.get(word, -1) for word in words] + [-1], dtype=np.int64)
+    tense_position = np.full(256, -1, dtype=np.int64)
+    tense_position[list(TENSE_VALUES)] = np.arange(len(TENSE_VALUES))
+
+    word_ids = np.minimum(records["word"], len(words)).astype(np.int64)
+    cards = card_of_word[word_ids]
+    tenses = tense_position[records["tense"]]
+    persons = records["person"].astype(np.int64) - 1
+    valid = (cards >= 0) & (tenses >= 0) & (persons >= 0) & (persons < len(PERSON_VALUES))
+    if to_english is not None:
+        valid &= records["to_english"] == int(to_english)
+    records = records[valid]
+
+    now = time.time() if now is None else now
+    return (
+        cards[valid],
+        tenses[valid],
+        persons[valid],
+        1 - records["singular"].astype(np.int64),
+        records["correct"].astype(np.float64),
+        np.exp2(-np.maximum(now - records["time"], 0)/(half_life*86400))
+    )
+
+
+class AnswerStats:
+    '''
+    Answer statistics from answer log, as arrays indexed by card (position in card bank), tense (position in
+    `TENSE_VALUES`), person (0-2 for 1st-3rd), and number (0 singular, 1 plural). All computed as whole-array
+    operations, so millions of logged answers take well under a second.
+
+    Params:
+        infinitives (list[str]): Infinitives of card bank, in card bank order. Answers for words not in the
+            card bank are ignored.
+        filepath (str, optional): Answer log filepath.
+        half_life (float, optional): Days after which an answer counts half as much in recency-weighted
+            stats. Defaults to 14.
+        to_english (bool, optional): If supplied, only counts Portuguese-to-English (True) or English-to-
+            Portuguese (False) answers.
+        now (float, optional): Time (Unix time) to weight recency from. Defaults to now.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        attempts (numpy.ndarray): Number of answers, shape (cards, tenses, 3, 2).
+        correct (numpy.ndarray): Number of correct answers, same shape.
+        weighted_attempts (numpy.ndarray): Recency-weighted number of answers, same shape.
+        weighted_errors (numpy.ndarray): Recency-weighted number of wrong answers, same shape.
+    '''
+
+    def __init__(self, infinitives, filepath=DEFAULT_ANSWER_LOG, half_life=14, to_english=None, now=None):
+        np = _numpy()
+        self.infinitives = list(infinitives)
+        self.shape = (len(self.infinitives), len(TENSE_VALUES), len(PERSON_VALUES), 2)
+        cards, tenses, persons, numbers, correct, weights = _indexed(
+            self.infinitives, filepath, half_life, to_english, now
+        )
+        flat = np.ravel_multi_index((cards, tenses, persons, numbers), self.shape)
+        size = int(np.prod(self.shape))
+        self.attempts = np.bincount(flat, minlength=size).reshape(self.shape)
+        self.correct = np.bincount(flat, weights=correct, minlength=size).astype(np.int64).reshape(self.shape)
+        self.weighted_attempts = np.bincount(flat, weights=weights, minlength=size).reshape(self.shape)
+        self.weighted_errors = np.bincount(flat, weights=weights*(1 - correct), minlength=size).reshape(self.shape)
+
+    @property
+    def total(self):
+        '''Total number of answers counted.'''
+        return int(self.attempts.sum())
+
+    def _rates(self, axes):
+        '''Sum over axes, returning attempts, accuracy, and recency-weighted error rate (NaN where no attempts).'''
+        np = _numpy()
+        attempts = self.attempts.sum(axis=axes)
+        correct = self.correct.sum(axis=axes)
+        weighted_attempts = self.weighted_attempts.sum(axis=axes)
+        weighted_errors = self.weighted_errors.sum(axis=axes)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            accuracy = np.where(attempts > 0, correct/attempts, np.nan)
+            error_rate = np.where(weighted_attempts > 0, weighted_errors/weighted_attempts, np.nan)
+        return attempts, accuracy, error_rate
+
+    def by_card(self):
+        '''Stats per card. Returns tuple of attempts, accuracy, and recency-weighted error rate arrays.'''
+        return self._rates((1, 2, 3))
+
+    def by_tense(self):
+        '''Stats per tense. Returns tuple of attempts, accuracy, and recency-weighted error rate arrays.'''
+        return self._rates((0, 2, 3))
+
+    def by_slot(self):
+        '''Stats per tense/person/number slot, over all cards. Returns tuple of attempts, accuracy, and
+        recency-weighted error rate arrays (shape (tenses, 3, 2)).'''
+        return self._rates(0)
+
+    @staticmethod
+    def _weakest(attempts, accuracy, error_rate, n, min_attempts):
+        np = _numpy()
+        flat_error = np.where(attempts >= min_attempts, error_rate, -1).ravel()
+        n = min(n, int((flat_error > 0).sum()))
+        if n <= 0:
+            return []
+        top = np.argpartition(-flat_error, n-1)[:n]
+        top = top[np.argsort(-flat_error[top], kind="stable")]
+        return [
+            (np.unravel_index(i, attempts.shape), float(flat_error[i]), float(accuracy.ravel()[i]),
+             int(attempts.ravel()[i]))
+            for i in top
+        ]
+
+    def weakest_cards(self, n=5, min_attempts=3):
+        '''Cards with highest recency-weighted error rate.
+        Params:
+            n (int, optional): Max number of cards.
+            min_attempts (int, optional): Only include cards with at least this many answers.
+        Returns:
+            List of (infinitive, error rate, accuracy, attempts) tuples, weakest first.
+        '''
+        return [
+            (self.infinitives[index[0]], error_rate, accuracy, attempts)
+            for index, error_rate, accuracy, attempts in self._weakest(*self.by_card(), n, min_attempts)
+        ]
+
+    def weakest_slots(self, n=5, min_attempts=3):
+        '''Tense/person/number slots with highest recency-weighted error rate, over all cards.
+        Params:
+            n (int, optional): Max number of slots.
+            min_attempts (int, optional): Only include slots with at least this many answers.
+        Returns:
+            List of (description, error rate, accuracy, attempts) tuples, weakest first. See
+            `tester.describe_slot()`.
+        '''
+        return [
+            (tester.describe_slot(TENSE_VALUES[tense], PERSON_VALUES[person], number == 0), error_rate, accuracy,
+             attempts)
+            for (tense, person, number), error_rate, accuracy, attempts in self._weakest(
+                *self.by_slot(), n, min_attempts
+            )
+        ]
+
+
+class AdaptiveWeights:
+    '''
+    Selection weights from past error rates, to test weak verbs and tenses more often. Each card's weight is its
+    recency-weighted error rate, smoothed towards the overall error rate (so cards with few or no answers get
+    about average weight), plus a floor so mastered cards still come up. Tense weights per card are smoothed
+    the same way, towards the error rate of the tense over all cards. Per-card tense stats are kept sparse, so
+    memory grows with the answer log rather than card bank size times tenses.
+
+    Params:
+        infinitives (list[str]): Infinitives of card bank, in card bank order. See `CardBank.infinitives()`.
+        filepath (str, optional): Answer log filepath.
+        half_life (float, optional): Days after which an answer counts half as much. Defaults to 14.
+        strength (float, optional): Weight of overall error rate when smoothing, as number of answers.
+            Defaults to 2.
+        floor (float, optional): Weight added to every card and tense. Defaults to 0.05.
+        now (float, optional): Time (Unix time) to weight recency from. Defaults to now.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        card_weights (numpy.ndarray): Weight per card.
+        tense_rates (numpy.ndarray): Smoothed error rate per tense (position in `TENSE_VALUES`).
+        keys (numpy.ndarray): Sorted keys (card position * num. tenses + tense position) of card/tense pairs
+            with answers.
+        key_attempts (numpy.ndarray): Recency-weighted answers per key.
+        key_errors (numpy.ndarray): Recency-weighted wrong answers per key.
+    '''
+
+    def __init__(self, infinitives, filepath=DEFAULT_ANSWER_LOG, half_life=14, strength=2, floor=0.05, now=None):
+        np = _numpy()
+        self.positions = {infinitive: i for i, infinitive in enumerate(infinitives)}
+        self.strength = strength
+        self.floor = floor
+        num_cards = len(self.positions)
+        num_tenses = len(TENSE_VALUES)
+        cards, tenses, persons, numbers, correct, weights = _indexed(infinitives, filepath, half_life, now=now)
+        errors = weights*(1 - correct)
+
+        total_attempts = weights.sum()
+        # without history, all weights equal (same as uniform selection)
+        overall = errors.sum()/total_attempts if total_attempts > 0 else 0.5
+        card_attempts = np.bincount(cards, weights=weights, minlength=num_cards)
+        card_errors = np.bincount(cards, weights=errors, minlength=num_cards)
+        self.card_weights = (card_errors + strength*overall)/(card_attempts + strength) + floor
+
+        tense_attempts = np.bincount(tenses, weights=weights, minlength=num_tenses)
+        tense_errors = np.bincount(tenses, weights=errors, minlength=num_tenses)
+        self.tense_rates = (tense_errors + strength*overall)/(tense_attempts + strength)
+
+        self.keys, inverse = np.unique(cards*num_tenses + tenses, return_inverse=True)
+        self.key_attempts = np.bincount(inverse, weights=weights, minlength=len(self.keys))
+        self.key_errors = np.bincount(inverse, weights=errors, minlength=len(self.keys))
+
+    def sample_cards(self, k, rng=random):
+        '''Draw card positions weighted by card weight, without replacement, in one vectorized draw (Gumbel-
+        top-k: the k largest log weights plus Gumbel noise).
+        Params:
+            k (int): Number of cards.
+            rng (random.Random, optional): Random generator to seed the draw from.
+        Returns:
+            List of card positions (list[int]), in order drawn.
+        '''
+        np = _numpy()
+        k = min(k, len(self.card_weights))
+        if k <= 0:
+            return []
+        noise = np.random.default_rng(rng.getrandbits(64)).gumbel(size=len(self.card_weights))
+        keys = np.log(self.card_weights) + noise
+        top = np.argpartition(-keys, k-1)[:k]
+        return top[np.argsort(-keys[top])].tolist()
+
+    def tense_weights(self, infinitive):
+        '''Weight per tense (in order of `TENSE_VALUES`) for card, as list[float].'''
+        np = _numpy()
+        rates = self.tense_rates.copy()
+        position = self.positions.get(infinitive)
+        if position is not None:
+            num_tenses = len(TENSE_VALUES)
+            start, end = np.searchsorted(self.keys, (position*num_tenses, (position + 1)*num_tenses))
+            tenses = self.keys[start:end] - position*num_tenses
+            rates[tenses] = (
+                (self.key_errors[start:end] + self.strength*rates[tenses])/(self.key_attempts[start:end] + self.strength)
+            )
+        return (rates + self.floor).tolist()
+
+
+def report(stats, n=5, min_attempts=3):
+    '''Format report of weakest verbs and tense slots.
+    Params:
+        stats (AnswerStats): Answer statistics.
+        n (int, optional): Number of verbs and slots to list.
+        min_attempts (int, optional): Only list verbs and slots with at least this many answers.
+    Returns:
+        Report string (empty if no answers).
+    '''
+    if not stats.total:
+        return ""
+    lines = ["{0} answers, {1:.0f}% correct".format(stats.total, 100*stats.correct.sum()/stats.total)]
+    for title, weakest in (
+        ("Weakest verbs:", stats.weakest_cards(n, min_attempts)),
+        ("Weakest tenses:", stats.weakest_slots(n, min_attempts))
+    ):
+        if weakest:
+            lines.append(title)
+            for name, error_rate, accuracy, attempts in weakest:
+                lines.append("  {0}: {1:.0f}% recent errors ({2:.0f}% correct of {3})".format(
+                    name, 100*error_rate, 100*accuracy, attempts
+                ))
+    return "\n".join(lines)
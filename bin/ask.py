@@ -1,12 +1,90 @@
+import os, sys, time
+
+
+class _StdinLines:
+    '''
+    Lines read straight from the stdin file descriptor, rather than through Python's buffered `sys.stdin`, so 
+    waiting on the descriptor (see `timed()`) never misses lines already read into a buffer. Lines read but not 
+    yet taken are kept here instead. All questions read through the same instance, so none are lost between 
+    timed and untimed questions.
+
+    Params:
+        fd (int): File descriptor to read.
+    '''
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.buffer = b""
+        self.eof = False
+
+    def readline(self, timeout=None):
+        '''Get next line (without line ending), waiting up to timeout seconds if given.
+        Returns:
+            Line (str), or None if out of time.
+        Raises:
+            EOFError at end of input.
+        '''
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while b"\n" not in self.buffer and not self.eof:
+            if deadline is not None:
+                import select
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not select.select([self.fd], [], [], remaining)[0]:
+                    return None
+            data = os.read(self.fd, 4096)
+            if data:
+                self.buffer += data
+            else:
+                self.eof = True
+        if not self.buffer:
+            raise EOFError
+        line, _, self.buffer = self.buffer.partition(b"\n")
+        return line.decode(sys.stdin.encoding or "utf-8", errors="replace").rstrip("\r")
+
+    def discard(self):
+        self.buffer = b""
+
+
+_stdin_lines = None
+
+
+def _lines():
+    '''Get stdin line reader, or None if stdin has no file descriptor (e.g. replaced by a string buffer).'''
+    global _stdin_lines
+    try:
+        fd = sys.stdin.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+    if _stdin_lines is None or _stdin_lines.fd != fd:
+        _stdin_lines = _StdinLines(fd)
+    return _stdin_lines
+
+
+def _input(prompt=""):
+    '''Same as `input()`, but reads piped input through the stdin line reader (see `_StdinLines`), so it isn't 
+    buffered where timed questions can't see it. A terminal gives one line per read, so there `input()` is used 
+    (with the console's own encoding and line editing), unless lines typed ahead are still in the reader.'''
+    lines = _lines()
+    if lines is None or (not lines.buffer and os.isatty(lines.fd)):
+        return input(prompt)
+    print(prompt, end="", flush=True)
+    return lines.readline()
+
+
+def line(prompt="> "):
+    '''Read a line as typed (not stripped or lowercased). Use instead of `input()`, so all questions read stdin 
+    the same way and none are lost between them.'''
+    return _input(prompt)
+
 
 def _ask(question, same_line):
     if not question:
-        return input("> ").strip().lower()
+        return _input("> ").strip().lower()
     if same_line:
-        return input(question).strip().lower()
+        return _input(question).strip().lower()
     else:
         print(question)
-        return input("> ").strip().lower()
+        return _input("> ").strip().lower()
 
 
 def basic(question="", same_line=False, allow_empty=False):
@@ -16,6 +94,49 @@ def basic(question="", same_line=False, allow_empty=False):
     print("You did not specify a response. Try again.")
     return basic(question, same_line, allow_empty)
 
+def timed(question="", same_line=False, seconds=10):
+    '''Ask question with time limit, without blocking past it.
+    Params:
+        question (str, optional): Question prompt.
+        same_line (bool, optional): If True, answer is typed on same line as question.
+        seconds (float, optional): Time limit, in seconds. Empty answers don't reset the time limit.
+    Returns:
+        Response (stripped and lowercased), or None if out of time.
+    '''
+    lines = _lines()
+    try:
+        import select
+        select.select([lines.fd], [], [], 0)
+    except (AttributeError, ImportError, OSError, ValueError):
+        # can't wait on stdin (e.g. Windows console, or no file descriptor), ask without a limit
+        return basic(question, same_line)
+    deadline = time.perf_counter() + seconds
+    prompt = question if same_line else (question + "\n> " if question else "> ")
+    while True:
+        print(prompt, end="", flush=True)
+        line = lines.readline(timeout=max(0, deadline - time.perf_counter()))
+        if line is None:
+            print("")
+            _discard_typed(lines)
+            return None
+        response = line.strip().lower()
+        if response:
+            return response
+        print("You did not specify a response. Try again.")
+
+
+def _discard_typed(lines):
+    '''Discard anything typed in a terminal but not taken, so it isn't taken as the next answer. Piped input 
+    is kept, as it was never typed in answer to this question.'''
+    try:
+        import termios
+        if os.isatty(lines.fd):
+            termios.tcflush(lines.fd, termios.TCIFLUSH)
+            lines.discard()
+    except (ImportError, OSError):
+        pass
+
+
 def yes_no(question="", same_line=False):
     '''Ask yes/no question and parse input until acceptable answer given.'''
     response = _ask(question, same_line)
@@ -0,0 +1,208 @@
+from . import builder
+import os, time, asyncio, threading
+from contextlib import contextmanager
+
+
+class _Entry:
+    '''Pooled session with its usage.'''
+
+    def __init__(self, session, loop):
+        self.session = session
+        self.loop = loop
+        self.pages = 0
+        self.created = time.time()
+        self.broken = False
+
+
+def _browser_error(e):
+    '''Check if error came from browser (or launching it), which may leave it unusable, rather than from the 
+    page itself, e.g. page not served (HTTP 503) or not parsed.'''
+    if not isinstance(e, Exception):
+        # e.g. interrupted while rendering, which may leave pages open in browser
+        return True
+    if isinstance(e, asyncio.TimeoutError):
+        return True
+    return type(e).__module__.split(".")[0] in ("pyppeteer", "websockets")
+
+
+def _process_tree_memory(pid):
+    '''Get resident memory (in MB) of process and all its child processes (e.g. browser renderers). Linux only,
+    returns None elsewhere.'''
+    if not os.path.exists("/proc/{0}/status".format(pid)):
+        return None
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open("/proc/{0}/stat".format(name), "r") as inf:
+                # parent pid is 2nd field after command name (which may contain spaces, but is in parentheses)
+                ppid = int(inf.read().rpartition(")")[2].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    total = 0
+    to_visit = [pid]
+    while to_visit:
+        current = to_visit.pop()
+        to_visit.extend(children.get(current, []))
+        try:
+            with open("/proc/{0}/status".format(current), "r") as inf:
+                for line in inf:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total/1024
+
+
+class BrowserPool:
+    '''
+    Pool of long-lived HTTP sessions for the builder (see `builder.session()`), each with its own headless
+    browser for rendering pages. Browsers stay open between pages, so only the first page per browser pays the
+    launch cost. Sessions are health checked when taken from the pool, and replaced after a number of pages,
+    if over memory limit, or if the browser raised an error while in use (which may leave pages open in it).
+    Safe to use from multiple threads, each session is only used by one thread at a time.
+
+    Params:
+        size (int, optional): Max number of sessions (browsers) open at once. Defaults to 1.
+        max_pages (int, optional): Replace session after this many pages. Defaults to 200.
+        max_memory (float, optional): Replace session if its browser (and renderer processes) use more than
+            this many MB. None for no limit. Checked on Linux only. Defaults to 1024.
+        warm (bool, optional): If true, launches browser when session is created, rather than on first render.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        idle (list[_Entry]): Sessions not in use.
+        num_open (int): Number of sessions open, in use or not.
+        created (int): Number of sessions created.
+        recycled (int): Number of sessions closed and replaced.
+        pages (int): Number of pages used across all sessions.
+    '''
+
+    def __init__(self, size=1, max_pages=200, max_memory=1024, warm=False):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory = max_memory
+        self.warm = warm
+        self.condition = threading.Condition()
+        self.idle = []
+        self.num_open = 0
+        self.closed = False
+        self.created = 0
+        self.recycled = 0
+        self.pages = 0
+
+    def _create(self):
+        # each session gets own event loop, so it can be used from any thread (one at a time)
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        session = builder.session()
+        if self.warm:
+            try:
+                session.browser
+            except BaseException:
+                # browser failed to launch, close session and its event loop before giving up the slot
+                self._close_entry(_Entry(session, loop))
+                raise
+        with self.condition:
+            self.created += 1
+        return _Entry(session, loop)
+
+    def _browser_process(self, entry):
+        # requests_html only launches browser on first render
+        browser = getattr(entry.session, "_browser", None)
+        return getattr(browser, "process", None) if browser else None
+
+    def healthy(self, entry):
+        '''Check session is still usable: not broken, under page and memory limits, and browser still running.'''
+        if entry.broken or entry.pages >= self.max_pages:
+            return False
+        process = self._browser_process(entry)
+        if process is None:
+            return True
+        if process.poll() is not None:
+            return False
+        if self.max_memory:
+            memory = _process_tree_memory(process.pid)
+            if memory is not None and memory > self.max_memory:
+                return False
+        return True
+
+    def _close_entry(self, entry):
+        try:
+            entry.session.close()
+        except Exception:
+            # browser may already be gone, nothing left to clean up
+            pass
+        entry.loop.close()
+
+    def _acquire(self):
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise Exception("Browser pool is closed")
+                if self.idle:
+                    entry = self.idle.pop()
+                    break
+                if self.num_open < self.size:
+                    self.num_open += 1
+                    entry = None
+                    break
+                self.condition.wait()
+        if entry is not None and not self.healthy(entry):
+            self._close_entry(entry)
+            with self.condition:
+                self.recycled += 1
+            entry = None
+        if entry is None:
+            try:
+                entry = self._create()
+            except Exception:
+                with self.condition:
+                    self.num_open -= 1
+                    self.condition.notify()
+                raise
+        # use session's loop in this thread, as rendering runs on current event loop
+        asyncio.set_event_loop(entry.loop)
+        return entry
+
+    def _release(self, entry):
+        entry.pages += 1
+        with self.condition:
+            self.pages += 1
+            discard = self.closed or entry.broken
+            if discard:
+                self.num_open -= 1
+                self.recycled += entry.broken
+            else:
+                self.idle.append(entry)
+            self.condition.notify()
+        if discard:
+            self._close_entry(entry)
+
+    @contextmanager
+    def session(self):
+        '''Take session from pool for one page, waiting if all in use. Use as `with pool.session() as session:`.
+        If the browser raises an error while in use, the session is closed and replaced. Other errors (e.g. page
+        not served) leave it in the pool.'''
+        entry = self._acquire()
+        try:
+            yield entry.session
+        except BaseException as e:
+            if _browser_error(e):
+                entry.broken = True
+            raise
+        finally:
+            self._release(entry)
+
+    def close(self):
+        '''Close all sessions. Sessions in use are closed when returned.'''
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.num_open -= len(idle)
+            self.condition.notify_all()
+        for entry in idle:
+            self._close_entry(entry)
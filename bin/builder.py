@@ -1,30 +1,10 @@
-import os, csv, time
+import os, csv, asyncio
 from .constants import TENSE, TENSE_NAMES, TENSE_VALUES
-from requests_html import HTMLSession
+from .constants import KEY_FIELD, SUPPLIED_FIELDS, BASIC_FIELDS, BUILT_FIELDS, FIELDS
 
 
-KEY_FIELD = ("inf",)
-SUPPLIED_FIELDS = (
-    "hint", "hint-rules", "use-eng-defs", 
-    "eng-inf", "eng-gerund", 
-    "eng-1", "eng-3", "eng-p", 
-    "eng-past", "eng-past-perf"
-)
-BASIC_FIELDS = KEY_FIELD + SUPPLIED_FIELDS
-BUILT_FIELDS = (
-    "gerund", "participle", 
-    "present-1s", "present-2s", "present-3s", "present-1p", "present-2p", "present-3p", 
-    "imperfect-1s", "imperfect-2s", "imperfect-3s", "imperfect-1p", "imperfect-2p", "imperfect-3p", 
-    "perfect-1s", "perfect-2s", "perfect-3s", "perfect-1p", "perfect-2p", "perfect-3p", 
-    "future-1s", "future-2s", "future-3s", "future-1p", "future-2p", "future-3p", 
-    "futcond-1s", "futcond-2s", "futcond-3s", "futcond-1p", "futcond-2p", "futcond-3p", 
-    "imp1-2s", "imp1-3s", "imp1-1p", "imp1-2p", "imp1-3p", 
-    "imp0-2s", "imp0-3s", "imp0-1p", "imp0-2p", "imp0-3p"
-)
-FIELDS = BASIC_FIELDS + BUILT_FIELDS
-
-
-URL = "https://european-portuguese.info/conjugator/{0}"
+# override with CONJUGATOR_URL environment variable, e.g. to use local stand-in (see conjugator_server.py)
+URL = os.environ.get("CONJUGATOR_URL", "https://european-portuguese.info/conjugator/{0}")
 
 _TENSE_TABLE_NAMES = (
     "Presente", 
@@ -46,30 +26,147 @@ _TENSE_TABLE_MAP = {
 }
 
 
-def session():
-    '''Get HTTP session.'''
-    return HTMLSession()
+class PageError(Exception):
+    '''Conjugator page not served, or served without the conjugation tables (e.g. error page or incomplete 
+    render), as opposed to errors getting it at all (e.g. no network, requests_html not installed).'''
+    pass
+
+
+_session_class = None
+
+
+def _html_session():
+    # only imported when needed, so builds from local conjugation sources (see sources.py) don't need it
+    global _session_class
+    if _session_class is None:
+        from requests_html import HTMLSession
+        import pyppeteer
+
+        class _HTMLSession(HTMLSession):
+            '''HTMLSession that launches its browser without signal handlers. pyppeteer sets them by default, 
+            which only works on the main thread, so launching from a worker thread (e.g. pooled sessions, see 
+            browser.py) would raise after the browser was started and leave it running.'''
 
+            @property
+            def browser(self):
+                if not hasattr(self, "_browser"):
+                    self.loop = asyncio.get_event_loop()
+                    if self.loop.is_running():
+                        raise RuntimeError("Cannot use HTMLSession within an existing event loop.")
+                    self._browser = self.loop.run_until_complete(pyppeteer.launch(
+                        ignoreHTTPSErrors=not self.verify, 
+                        headless=True, 
+                        args=getattr(self, "_BaseSession__browser_args", ["--no-sandbox"]), 
+                        handleSIGINT=False, 
+                        handleSIGTERM=False, 
+                        handleSIGHUP=False
+                    ))
+                return self._browser
 
-def get(infinitive, session=None):
-    '''Get tense map using conjugator website and scraping.'''
+        _session_class = _HTMLSession
+    return _session_class()
 
-    # open page
+
+def session():
+    '''Get HTTP session.'''
+    return _html_session()
+
+
+def _check_status(page, infinitive):
+    '''Raise if page wasn't served, e.g. server error, so it's never taken as a (valid or invalid) verb page.'''
+    if page.status_code != 200:
+        raise PageError("Conjugator page not served (HTTP {0}) @ {1}".format(page.status_code, URL.format(infinitive)))
+
+
+def check_infinitive(infinitive, session=None, render=True):
+    '''Check infinitive is recognized by conjugator website. Only valid if the page has the conjugation 
+    tables, so error pages or incomplete renders never pass as valid.
+    Params:
+        infinitive (str): Portuguese infinitive.
+        session (HTMLSession, optional): HTTP session to reuse.
+        render (bool, optional): If false, parses page as served, without rendering it in browser.
+    Returns:
+        None if valid, otherwise Warning with website's explanation.
+    Raises:
+        Exception if page couldn't be fetched or has neither a warning nor the conjugation tables.
+    '''
+    close_session = False
+    if not session:
+        session = _html_session()
+        close_session = True
+    try:
+        page = session.get(URL.format(infinitive))
+        try:
+            _check_status(page, infinitive)
+            if render:
+                page.html.render()
+            tense_maps = _parse(page.html, infinitive)
+        finally:
+            page.close()
+    finally:
+        if close_session:
+            session.close()
+    return tense_maps if isinstance(tense_maps, Warning) else None
+
+
+def get(infinitive, session=None, render=True):
+    '''Get tense map using conjugator website and scraping. If render is false, parses page as served, without 
+    rendering it in browser (faster, but only works where page isn't built by script, e.g. local stand-in).
+    Returns Warning with website's explanation if infinitive is invalid. Raises if the page couldn't be fetched
+    or parsed, so failures are never mistaken for (and cached as) invalid infinitives.'''
+
+    # open page, always closing it (and session, if opened here) even if parsing fails
     close_session = False
     if not session:
-        session = HTMLSession()
+        session = _html_session()
         close_session = True
+    try:
+        page = session.get(URL.format(infinitive))
+        try:
+            _check_status(page, infinitive)
+            if render:
+                page.html.render()
+            return _parse(page.html, infinitive)
+        finally:
+            page.close()
+    finally:
+        if close_session:
+            session.close()
+
+
+def get_page(infinitive, session, render=True):
+    '''Get (rendered) conjugator page, to parse separately with `parse_page()`. Same as `get()` otherwise.
+    Returns:
+        Page HTML (str).
+    '''
     page = session.get(URL.format(infinitive))
-    page.html.render()
+    try:
+        _check_status(page, infinitive)
+        if render:
+            page.html.render()
+        return page.html.html
+    finally:
+        page.close()
+
+
+def parse_page(page_html, infinitive):
+    '''Parse tense map from page HTML, as from `get_page()`. Returns same as `get()`.'''
+    from requests_html import HTML
+    return _parse(HTML(html=page_html), infinitive)
+
+
+def _parse(doc, infinitive):
+    '''Parse tense map from (rendered) conjugator page document. Returns Warning if website says infinitive is
+    invalid, raises if tables are missing (e.g. error page or incomplete render).'''
 
     # check for warning if invalid/unrecognized infinitive
-    warning = page.html.find("#warning", first=True)
+    warning = doc.find("#warning", first=True)
     if warning and warning.text:
         return Warning(warning.text)
 
     # parse tense tables
     tense_tables = {}
-    conjugations = page.html.find("span.tense")
+    conjugations = doc.find("span.tense")
     for table in conjugations:
         tense_name = table.find("span.tense-name", first=True).text
         # recognized tense name, skip 2nd/duplicate which are for subjective forms
@@ -78,7 +175,7 @@ def get(infinitive, session=None):
     # check for missing tense tables
     missing = list(set(_TENSE_TABLE_MAP.values()) - set(tense_tables.keys()))
     if len(missing):
-        return Warning("Unable to find {0} table(s) @ {1}".format(
+        raise PageError("Unable to find {0} table(s) @ {1}".format(
             " and ".join([TENSE_NAMES[t] for t in missing]), 
             URL.format(infinitive))
         )
@@ -93,7 +190,7 @@ def get(infinitive, session=None):
             tense_map[span_person.text] = span_forms[i].text
 
     # parse gerund and participle forms
-    gerund_past_spans = page.html.find("#gerund-past > span", first=False)
+    gerund_past_spans = doc.find("#gerund-past > span", first=False)
     save_as = False
     for span in gerund_past_spans:
         if save_as:
@@ -107,10 +204,6 @@ def get(infinitive, session=None):
         else:
             save_as = "-"
 
-    page.close()
-    if close_session:
-        session.close()
-
     return tense_maps
 
 
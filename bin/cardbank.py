@@ -1,6 +1,11 @@
 from .constants import *
 from . import guess
-import os, csv, random
+from .misc import compile_hint_rules
+from .lookup import FormIndex
+from .fuzzy import FuzzyIndex
+from .search import GlossIndex
+from collections.abc import Mapping
+import os, csv, copy, random, threading
 
 
 
@@ -21,54 +26,80 @@ def read(card_bank_filepath, build_forms=True):
         return card_bank
 
     for card in card_bank:
-        # question formation and answer hint rules
-        card["use-eng-defs"] = int(card["use-eng-defs"]) if card["use-eng-defs"] else 0
-        if card["hint-rules"]:
-            card["hint-rules"] = tuple(s.strip().lower() for s in card["hint-rules"].split(";"))
-        else:
-            card["hint-rules"] = tuple()
-        # split by multiple forms
-        card["eng-1"] = tuple(s.strip().lower() for s in card["eng-1"].split("/"))
-        # split existing, or same as singular from singular 1st person forms
-        if card["eng-inf"]:
-            card["eng-inf"] = tuple(s.strip().lower() for s in card["eng-inf"].split("/"))
-        else:
-            card["eng-inf"] = card["eng-1"]
-        # split existing, or dynamically create from singular 1st person forms
-        if card["eng-3"]:
-            card["eng-3"] = tuple(s.strip().lower() for s in card["eng-3"].split("/"))
-        else:
-            card["eng-3"] = tuple(guess.eng_plural(form) for form in card["eng-1"])
-        # split existing, or same as singular 1st person forms
-        if card["eng-p"]:
-            card["eng-p"] = tuple(s.strip().lower() for s in card["eng-p"].split("/"))
-        else:
-            card["eng-p"] = card["eng-1"]
-        # split existing, or dynamically create from singular 1st person forms
-        if card["eng-past"]:
-            card["eng-past"] = tuple(s.strip().lower() for s in card["eng-past"].split("/"))
-        else:
-            card["eng-past"] = tuple(guess.eng_past(form) for form in card["eng-1"])
-        # split existing, or same as standard past forms
-        if card["eng-past-perf"]:
-            card["eng-past-perf"] = tuple(s.strip().lower() for s in card["eng-past-perf"].split("/"))
-        else:
-            card["eng-past-perf"] = card["eng-past"]
-        # split existing, or dynamically create from infinitive forms
-        if card["eng-gerund"]:
-            card["eng-gerund"] = tuple(s.strip().lower() for s in card["eng-gerund"].split("/"))
-        else:
-            card["eng-gerund"] = tuple(guess.eng_gerund(form) for form in card["eng-inf"])
+        build_card(card)
 
     return card_bank
 
 
-def get_pronouns(person=PERSON.FIRST, singular=True):
+def read_similars(similar_table):
+    '''Reads a CSV of similar groups (synonyms in Portuguese), one group of infinitives per row.
+    Params:
+        similar_table (str): Filepath to CSV.
+    Returns:
+        List of groups (as list[list[str]]).
+    '''
+    with open(similar_table, "r", encoding="utf-8") as csvf:
+        return [group for group in csv.reader(csvf)]
+
+
+def build_card(card):
+    '''Builds additional fields of a card read from the card bank that are dynamically generated, in place. 
+    E.g. splits multiple forms into tuples and guesses English forms left empty.
+    Params:
+        card (dict): Word definition dict, as read from CSV.
+    Returns:
+        The same card dict.
+    '''
+    # question formation and answer hint rules
+    card["use-eng-defs"] = int(card["use-eng-defs"]) if card["use-eng-defs"] else 0
+    if card["hint-rules"]:
+        card["hint-rules"] = tuple(s.strip().lower() for s in card["hint-rules"].split(";"))
+    else:
+        card["hint-rules"] = tuple()
+    card["hint-mask"] = compile_hint_rules(card["hint-rules"])
+    # split by multiple forms
+    card["eng-1"] = tuple(s.strip().lower() for s in card["eng-1"].split("/"))
+    # split existing, or same as singular from singular 1st person forms
+    if card["eng-inf"]:
+        card["eng-inf"] = tuple(s.strip().lower() for s in card["eng-inf"].split("/"))
+    else:
+        card["eng-inf"] = card["eng-1"]
+    # split existing, or dynamically create from singular 1st person forms
+    if card["eng-3"]:
+        card["eng-3"] = tuple(s.strip().lower() for s in card["eng-3"].split("/"))
+    else:
+        card["eng-3"] = tuple(guess.eng_plural(form) for form in card["eng-1"])
+    # split existing, or same as singular 1st person forms
+    if card["eng-p"]:
+        card["eng-p"] = tuple(s.strip().lower() for s in card["eng-p"].split("/"))
+    else:
+        card["eng-p"] = card["eng-1"]
+    # split existing, or dynamically create from singular 1st person forms
+    if card["eng-past"]:
+        card["eng-past"] = tuple(s.strip().lower() for s in card["eng-past"].split("/"))
+    else:
+        card["eng-past"] = tuple(guess.eng_past(form) for form in card["eng-1"])
+    # split existing, or same as standard past forms
+    if card["eng-past-perf"]:
+        card["eng-past-perf"] = tuple(s.strip().lower() for s in card["eng-past-perf"].split("/"))
+    else:
+        card["eng-past-perf"] = card["eng-past"]
+    # split existing, or dynamically create from infinitive forms
+    if card["eng-gerund"]:
+        card["eng-gerund"] = tuple(s.strip().lower() for s in card["eng-gerund"].split("/"))
+    else:
+        card["eng-gerund"] = tuple(guess.eng_gerund(form) for form in card["eng-inf"])
+
+    return card
+
+
+def get_pronouns(person=PERSON.FIRST, singular=True, rng=random):
     '''Get pronoun forms. If multiple choices, picks one. Note that 3rd-person could result in 'você[s]' which
     Then appropriate maps to return 2nd person English form.
     Params:
         person (constants.PERSON): Which person to construct pronoun form for. Defaults to PERSON.FIRST.
         singular (bool): Defaults to True.
+        rng (random.Random, optional): Random generator to use. Defaults to the `random` module.
     Returns:
         Dictionary with "english" and "portuguese" pronoun forms.
     '''
@@ -83,7 +114,7 @@ def get_pronouns(person=PERSON.FIRST, singular=True):
     if person != PERSON.THIRD:
         raise Exception("Unknown person given")
     # 3rd person via random choice
-    por = random.choice(por[3][1:])
+    por = rng.choice(por[3][1:])
     # check second person using 2nd form, if singular match pronoun gender, or plural is basic
     if por.startswith("você"):
         eng = eng[2]
@@ -97,6 +128,167 @@ def get_pronouns(person=PERSON.FIRST, singular=True):
     }
 
 
+def read_rows(card_bank_filepath):
+    '''Reads a CSV of card bank definitions as raw rows, without parsing them, noting the infinitive of each
+    row. Much faster than `read()`, for when only some cards are needed or to tell which rows changed.
+    Params:
+        card_bank_filepath (str): Filepath to CSV.
+    Returns:
+        Tuple of CSV header fields (as list[str]) and rows (as list of (infinitive, row bytes) tuples).
+    '''
+    with open(card_bank_filepath, "rb") as csvf:
+        data = csvf.read()
+    fieldnames = None
+    rows = []
+    start = 0
+    row_start = 0
+    quotes = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = size
+        quotes += data.count(b'"', start, end)
+        start = end + 1
+        # newline inside quoted field, row continues on next line
+        if quotes % 2:
+            continue
+        row = data[row_start:end].rstrip(b"\r")
+        row_start = start
+        quotes = 0
+        if not row:
+            continue
+        if fieldnames is None:
+            fieldnames = next(csv.reader([row.decode("utf-8")]))
+            if fieldnames[0] != "inf":
+                raise Exception("Card bank CSV must start with 'inf' column")
+            continue
+        # only the infinitive is read now, full row is parsed when needed
+        if row.startswith(b'"'):
+            infinitive = next(csv.reader([row.decode("utf-8")]))[0]
+        else:
+            comma = row.find(b",")
+            infinitive = (row[:comma] if comma >= 0 else row).decode("utf-8")
+        rows.append((infinitive, row))
+    return fieldnames, rows
+
+
+def parse_row(fieldnames, row, build_forms=True):
+    '''Parses and builds a card from a raw row. See `read_rows()` and `build_card()`.
+    Params:
+        fieldnames (list[str]): CSV header fields.
+        row (bytes): Raw row.
+        build_forms (bool, optional): If true, builds additional fields that are dynamic generated.
+    Returns:
+        Dict with word card definitions.
+    '''
+    values = next(csv.reader(row.decode("utf-8").splitlines(keepends=True)))
+    card = dict(zip(fieldnames, values))
+    for field in fieldnames[len(values):]:
+        card[field] = None
+    return build_card(card) if build_forms else card
+
+
+def _row_hash(row):
+    # only compared within this process (see `CardBank.reload()`), so builtin hash is enough, and much quicker
+    return hash(row)
+
+
+def _stamps(*filepaths):
+    '''Get modified time and size of files, to check if any changed.'''
+    stamps = []
+    for filepath in filepaths:
+        if filepath and os.path.exists(filepath):
+            stat = os.stat(filepath)
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        else:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+class LazyCards:
+    '''
+    Sequence of cards from raw card bank rows (see `read_rows()`), each parsed and built (see `parse_row()`) 
+    when first accessed, then kept. Safe to access from multiple threads.
+
+    Params:
+        fieldnames (list[str]): CSV header fields.
+        rows (list[tuple]): Rows as (infinitive, row bytes) tuples.
+        on_load (callable, optional): If supplied, called with each card after it is built.
+        cards (list[dict], optional): Cards already built, by row, or None where not yet built.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        fieldnames (list[str]): CSV header fields.
+        rows (list[bytes]): Raw rows. Kept as bytes, much smaller than built cards.
+        index (dict): Dictionary of row number by Portuguese infinitive.
+    '''
+
+    def __init__(self, fieldnames, rows, on_load=None, cards=None):
+        self.on_load = on_load
+        self.lock = threading.Lock()
+        self.fieldnames = fieldnames
+        self.rows = [row for infinitive, row in rows]
+        self.index = {infinitive: i for i, (infinitive, row) in enumerate(rows)}
+        self._cards = list(cards) if cards else [None]*len(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        for i in range(len(self.rows)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        card = self._cards[i]
+        if card is not None:
+            return card
+        with self.lock:
+            # may have been built by another thread while waiting
+            if self._cards[i] is not None:
+                return self._cards[i]
+            card = parse_row(self.fieldnames, self.rows[i])
+            if self.on_load:
+                self.on_load(card)
+            self._cards[i] = card
+            return card
+
+    def loaded(self):
+        '''Get cards already read.'''
+        return [card for card in self._cards if card is not None]
+
+    def get_loaded(self, infinitive):
+        '''Get card by infinitive if already read, otherwise None.'''
+        return self._cards[self.index[infinitive]] if infinitive in self.index else None
+
+
+class LazyCardMap(Mapping):
+    '''
+    Dictionary-like access to LazyCards by Portuguese infinitive. Checking if an infinitive exists doesn't 
+    read the card.
+
+    Params:
+        cards (LazyCards): Lazily read cards.
+    '''
+
+    def __init__(self, cards):
+        self.cards = cards
+
+    def __getitem__(self, infinitive):
+        return self.cards[self.cards.index[infinitive]]
+
+    def __contains__(self, infinitive):
+        return infinitive in self.cards.index
+
+    def __iter__(self):
+        return iter(self.cards.index)
+
+    def __len__(self):
+        return len(self.cards.index)
+
+
 class CardBank:
     '''
     Card bank and handler. Is iterable. Can be accessed like list/tuple or dictionary by index or key value 
@@ -105,6 +297,8 @@ class CardBank:
     Params:
         card_bank_table (str): Filepath to CSV defining card bank.
         similar_table (str, optional): Optional filepath to CSV defining Portuguese synonyms.
+        lazy (bool, optional): If true, only indexes where each card is in the CSV up front, and reads and 
+            builds each card when first accessed. Useful when only a few cards are used from a large bank.
 
     Attributes:
         [Note: attributes generally shouldn't be accessed or modified directly.]
@@ -112,59 +306,173 @@ class CardBank:
         card_map (dict):  Dictionary of word cards by Portuguese infinitive.
         estar_card (dict): Card for 'estar', necessary for building other verb forms in certain tenses.
         similars (tuple[tuple[str]]): Similar groups of synonyms in Portuguese.
+        similar_map (dict): Dictionary of similars (as tuple[str], excluding itself) by Portuguese infinitive.
+        row_hashes (dict): Dictionary of hashes of raw CSV rows by Portuguese infinitive, to tell which cards
+            changed on reload. See `reload()`.
+        stamps (tuple): Modified time and size of card bank files when read.
+        form_index (FormIndex): Reverse index of verb forms, built on first use. See `get_form_index()`.
+        fuzzy_index (FuzzyIndex): Index of all Portuguese and English forms for near-match searches, built on 
+            first use. See `get_fuzzy_index()`.
+        gloss_index (GlossIndex): Index of English definitions and infinitives for dictionary searches, built 
+            on first use. See `get_gloss_index()`.
     '''
     cards = tuple()
     card_map = {}
     estar_card = None
     ir_card = None
     similars = tuple()
+    similar_map = {}
+    row_hashes = {}
+    form_index = None
+    fuzzy_index = None
+    gloss_index = None
 
-    def __init__(self, card_bank_table, similar_table=None):
-        # read cards
+    def __init__(self, card_bank_table, similar_table=None, lazy=False):
         assert isinstance(card_bank_table, str)
         assert os.path.exists(card_bank_table)
-        self.cards = tuple(read(card_bank_table, build_forms=True))
+        if similar_table:
+            assert isinstance(similar_table, str)
+            assert os.path.exists(similar_table)
+        self.card_bank_table = card_bank_table
+        self.similar_table = similar_table
+        self.lazy = lazy
+        self.stamps = _stamps(card_bank_table, similar_table)
+        # read cards
+        fieldnames, rows = read_rows(card_bank_table)
+        self.row_hashes = {infinitive: _row_hash(row) for infinitive, row in rows}
+        self._read_similars()
+        self._set_cards(fieldnames, rows)
+
+    def _read_similars(self):
+        '''Read similars, removing missing verbs from group, and map similars of each verb.'''
+        self.similars = tuple()
+        self.similar_map = {}
+        if not self.similar_table:
+            return
+        similars = []
+        for group in read_similars(self.similar_table):
+            missing_infs = []
+            for infinitive in group:
+                if not infinitive in self.row_hashes:
+                    missing_infs.append(infinitive)
+            for missing_inf in missing_infs:
+                group.remove(missing_inf)
+            similars.append(group)
+        self.similars = tuple(tuple(group) for group in similars)
+        # create/append similars for verbs
+        similar_map = {}
+        for group in self.similars:
+            for infinitive in group:
+                if infinitive not in similar_map:
+                    similar_map[infinitive] = group
+                else:
+                    similar_map[infinitive] = tuple(set(similar_map[infinitive] + group))
+        # filter out same from similars of each verb
+        for infinitive, group in similar_map.items():
+            similar_map[infinitive] = tuple(verb for verb in group if verb != infinitive)
+        self.similar_map = similar_map
+
+    def _set_cards(self, fieldnames, rows, cards=None):
+        '''Set cards from raw rows, reusing cards already built where supplied (as list by row, None where 
+        not built).'''
+        self.fieldnames = fieldnames
+        if self.lazy:
+            self.cards = LazyCards(fieldnames, rows, on_load=self._attach_similars, cards=cards)
+            self.card_map = LazyCardMap(self.cards)
+        else:
+            built = []
+            for i, (infinitive, row) in enumerate(rows):
+                card = cards[i] if cards else None
+                if card is None:
+                    card = parse_row(fieldnames, row)
+                    self._attach_similars(card)
+                built.append(card)
+            self.cards = tuple(built)
+            self.card_map = {}
+            for card in self.cards:
+                self.card_map[card["inf"]] = card
         # find estar and ir cards, needed for continuous and simple-future forms respectively
-        for card in self.cards:
-            self.card_map[card["inf"]] = card
-            if card["inf"] == "estar":
-                self.estar_card = card
-            elif card["inf"] == "ir":
-                self.ir_card = card
+        self.estar_card = self.card_map.get("estar")
+        self.ir_card = self.card_map.get("ir")
         if not self.estar_card:
             raise Exception("No card found for 'estar' (to be)")
         if not self.ir_card:
             raise Exception("No card found for 'ir' (to go)")
-        # read similars, removing missing verbs from group
-        if similar_table:
-            assert isinstance(similar_table, str)
-            assert os.path.exists(similar_table)
-            similars = []
-            with open(similar_table, "r", encoding="utf-8") as csvf:
-                reader = csv.reader(csvf)
-                for group in reader:
-                    missing_infs = []
-                    for infinitive in group:
-                        if not infinitive in self.card_map:
-                            missing_infs.append(infinitive)
-                    for missing_inf in missing_infs:
-                        group.remove(missing_inf)
-                    similars.append(group)
-            self.similars = tuple(tuple(group) for group in similars)
-            # create/append similars to verb cards
-            for group in self.similars:
-                for infinitive in group:
-                    if "similars" not in self.card_map[infinitive]:
-                        self.card_map[infinitive]["similars"] = group
-                    else:
-                        self.card_map[infinitive]["similars"] = tuple(set(self.card_map[infinitive]["similars"] + group))
-            # filter out same from similars attached to each card
-            for card in self.cards:
-                if "similars" in card:
-                    card["similars"] = tuple(verb for verb in card["similars"] if verb != card["inf"])
+
+    def _attach_similars(self, card):
+        '''Attach similars (Portuguese synonyms) to card, if any.'''
+        if card["inf"] in self.similar_map:
+            card["similars"] = self.similar_map[card["inf"]]
+
+    def _get_loaded(self, infinitive):
+        '''Get card by infinitive if already built, otherwise None.'''
+        if self.lazy:
+            return self.cards.get_loaded(infinitive)
+        return self.card_map.get(infinitive)
+
+    def reload(self):
+        '''Check card bank files for changes and, if changed, read them into a new version of the card bank.
+        The files are read again to find which rows were added, changed, or removed (by row hash), but only 
+        those rows are parsed, and unchanged cards are shared with the new version. Indexes already built are 
+        updated for the changed cards instead of rebuilt, sharing unchanged entries (see `misc.Overlay`), so 
+        cost past reading the files grows with the cards changed. This version is left as is, so anything 
+        still using it (or its cards) is unaffected.
+        Returns:
+            New CardBank instance if files changed, otherwise this instance.
+        '''
+        stamps = _stamps(self.card_bank_table, self.similar_table)
+        if stamps == self.stamps:
+            return self
+        fieldnames, rows = read_rows(self.card_bank_table)
+        if fieldnames != self.fieldnames:
+            return type(self)(self.card_bank_table, self.similar_table, lazy=self.lazy)
+
+        bank = copy.copy(self)
+        bank.stamps = stamps
+        bank.row_hashes = {infinitive: _row_hash(row) for infinitive, row in rows}
+        bank._read_similars()
+        cards = []
+        changed = []
+        for infinitive, row in rows:
+            if (
+                self.row_hashes.get(infinitive) == bank.row_hashes[infinitive] and 
+                self.similar_map.get(infinitive) == bank.similar_map.get(infinitive)
+            ):
+                cards.append(self._get_loaded(infinitive))
+            else:
+                cards.append(None)
+                changed.append(infinitive)
+        removed = [infinitive for infinitive in self.row_hashes if infinitive not in bank.row_hashes]
+        bank._set_cards(fieldnames, rows, cards)
+
+        bank.form_index = None
+        bank.fuzzy_index = None
+        bank.gloss_index = None
+        # other cards' continuous and future forms are built from these, so can't just update indexes
+        if "estar" in changed or "ir" in changed:
+            return bank
+        old_cards = [self.get(infinitive) for infinitive in changed + removed if infinitive in self.row_hashes]
+        new_cards = [bank.get(infinitive) for infinitive in changed]
+        if self.form_index is not None:
+            bank.form_index = self.form_index.updated(
+                [pair for card in old_cards for pair in FormIndex.card_forms(self, card)], 
+                [pair for card in new_cards for pair in FormIndex.card_forms(bank, card)]
+            )
+        if self.fuzzy_index is not None:
+            bank.fuzzy_index = self.fuzzy_index.updated(
+                list(self._fuzzy_forms(old_cards)), 
+                list(bank._fuzzy_forms(new_cards))
+            )
+        if self.gloss_index is not None:
+            bank.gloss_index = self.gloss_index.updated(old_cards, new_cards)
+        return bank
 
     def __len__(self):
         return len(self.cards)
+
+    def infinitives(self):
+        '''Get Portuguese infinitives of all cards, in card bank order, without building cards.'''
+        return list(self.row_hashes)
     
     def __iter__(self):
         return iter(self.cards)
@@ -189,13 +497,87 @@ class CardBank:
         if isinstance(query, str):
             return self.card_map[query]
         if isinstance(query, dict):
-            if query and query in self.cards:
+            # check by key first, avoid scanning all cards
+            if query and query.get("inf") in self.card_map and (
+                self.card_map[query["inf"]] is query or self.card_map[query["inf"]] == query
+            ):
                 return query
             else:
                 raise ValueError()
         raise TypeError()
 
-    def get_verbs(self, card, person=PERSON.FIRST, singular=True, tense=TENSE.INFINITIVE, similars=False):
+    def find_words(self, words):
+        '''Find cards for words given as options (e.g. -words), suggesting close matches for any not found.
+        Params:
+            words (list[str]): Portuguese infinitives.
+        Returns:
+            Tuple of infinitives of cards found (list[str]), in the given order, and messages for words not
+            recognized (list[str]).
+        '''
+        found = []
+        unrecognized = []
+        for inf in words:
+            try:
+                found.append(self[inf]["inf"])
+            except Exception:
+                suggestions = self.get_gloss_index().suggest(inf)
+                if suggestions:
+                    unrecognized.append("Unrecognized word option: {0} (did you mean: {1}?)".format(
+                        inf, ", ".join(suggestions)
+                    ))
+                else:
+                    unrecognized.append("Unrecognized word option: {0}".format(inf))
+        return found, unrecognized
+
+    def get_form_index(self):
+        '''Get reverse index of verb forms, building it on first call.
+        Returns:
+            FormIndex instance.
+        '''
+        if self.form_index is None:
+            self.form_index = FormIndex(self)
+        return self.form_index
+
+    def get_fuzzy_index(self):
+        '''Get index for near-match searches over all Portuguese and English verb forms, building it on first 
+        call. Portuguese forms map to form index entries (see `lookup.FormIndex`), English forms map to 
+        (infinitive, field) tuples.
+        Returns:
+            FuzzyIndex instance.
+        '''
+        if self.fuzzy_index is None:
+            def forms():
+                form_index = self.get_form_index()
+                for key, entries in form_index.forms.items():
+                    for entry in entries:
+                        yield key, entry
+                for card in self:
+                    for field in ENG_FIELDS:
+                        for form in card[field]:
+                            yield form, (card["inf"], field)
+            self.fuzzy_index = FuzzyIndex(forms())
+        return self.fuzzy_index
+
+    def _fuzzy_forms(self, cards):
+        '''Generate (form, value) pairs of cards as in fuzzy index. See `get_fuzzy_index()`.'''
+        for card in cards:
+            for entry, form in FormIndex.card_forms(self, card):
+                yield form, entry
+            for field in ENG_FIELDS:
+                for form in card[field]:
+                    yield form, (card["inf"], field)
+
+    def get_gloss_index(self):
+        '''Get index for searching cards by English definition or Portuguese infinitive, building it on first 
+        call.
+        Returns:
+            GlossIndex instance.
+        '''
+        if self.gloss_index is None:
+            self.gloss_index = GlossIndex(self)
+        return self.gloss_index
+
+    def get_verbs(self, card, person=PERSON.FIRST, singular=True, tense=TENSE.INFINITIVE, similars=False, rng=random):
         '''Get verb definition. This includes the parameters, the English and Portuguese equivalents, hints, 
         hint rules, and other relevant information to create a test question. Note that supplied form 
         parameters will be automically changed if invalid (see returned dict).
@@ -206,6 +588,7 @@ class CardBank:
             tense (constants.TENSE): The tense to construct the verb form for. Defaults to TENSE.INFINITIVE. 
                 Note 'você[s]' may be result of 3rd person, but returned value will denote 2nd person.
             similars (bool, optional): If true, also pulls Portuguese synonyms. Defaults to False.
+            rng (random.Random, optional): Random generator to use. Defaults to the `random` module.
         Returns:
             Dict with verb definitions.
             - person (constants.PERSON): Person of verb form. Note 'você[s]' will be considered 2nd person but
@@ -224,6 +607,7 @@ class CardBank:
                 - pronoun (str): English pronoun.
             - hint (str): Hint.
             - hint-rules (tuple[str]): Tuple of rules for showing hints.
+            - hint-mask (int): Hint rules compiled into bitmask. See `misc.compile_hint_rules()`.
             - use-eng-defs (int): Limits which English translations to use to form questions. A value of 0 
               means all English translations can be used to form an English-to-Portuguese question. Any 
               positive value means only up to this variation. E.g. if there are two translations allowed for
@@ -266,7 +650,7 @@ class CardBank:
                 }
 
         if not pronouns:
-            pronouns = get_pronouns(person=person, singular=singular)
+            pronouns = get_pronouns(person=person, singular=singular, rng=rng)
 
         verbs["portuguese"]["infinitive"] = card["inf"]
         verbs["portuguese"]["verbs"] = self.get_portuguese_verb(card, person=person, singular=singular, tense=tense)
@@ -274,7 +658,7 @@ class CardBank:
 
         if similars and "similars" in card and len(card["similars"]):
             verbs["portuguese"]["similars"] = tuple(
-                self.get_portuguese_verb(self.card_map[inf], person=person, singular=singular, tense=tense)
+                self.get_portuguese_verb(self.get(inf), person=person, singular=singular, tense=tense)
                 for inf in card["similars"]
                 if inf != card["inf"]
             )
@@ -296,6 +680,7 @@ class CardBank:
 
         verbs["hint"] = card["hint"]
         verbs["hint-rules"] = card["hint-rules"]
+        verbs["hint-mask"] = card.get("hint-mask")
         verbs["use-eng-defs"] = card["use-eng-defs"]
 
         return verbs
@@ -463,6 +848,6 @@ class CardBank:
 
         elif tense == TENSE.IMPERATIVE_AFM or tense == TENSE.IMPERATIVE_NEG:
             # aux. verb will be checked elsewhere (must/must not/should/should not)
-            return card(["eng-p"])
+            return card["eng-p"]
 
         raise Exception("{0} tense currently unsupported for english".format(TENSE_NAMES[tense]))
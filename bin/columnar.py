@@ -0,0 +1,201 @@
+from .constants import *
+from .cardbank import CardBank, read, read_similars, build_card
+import os, sys, mmap, struct, array, threading
+
+
+DEFAULT_COLUMNAR = "bank/card-bank-built.pvcb"
+
+# file layout (all integers unsigned 32-bit, in the byte order flagged in the header):
+#   header      magic, version, byte order flag, num. rows, num. columns, heap offset
+#   names       per column, length-prefixed UTF-8 name, padded to 4 bytes
+#   offsets     per column, num. rows + 1 offsets into the string heap
+#   inf index   row numbers sorted by infinitive, for lookup by binary search
+#   heap        UTF-8 field values, back-to-back
+_MAGIC = b"PVCB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIIIII")
+_LITTLE, _BIG = 1, 2
+
+
+def write(card_bank_table, columnar_filepath=DEFAULT_COLUMNAR):
+    '''Convert a CSV card bank into the columnar format.
+    Params:
+        card_bank_table (str): Filepath to CSV of (built) card bank.
+        columnar_filepath (str, optional): Filepath to write.
+    Returns:
+        Number of cards written.
+    '''
+    cards = read(card_bank_table, build_forms=False)
+    columns = FIELDS
+    num_rows = len(cards)
+
+    names = b""
+    for name in columns:
+        encoded = name.encode("utf-8")
+        entry = struct.pack("<I", len(encoded)) + encoded
+        names += entry + b"\0"*(-len(entry) % 4)
+
+    heap = bytearray()
+    offsets = array.array("I")
+    for field in columns:
+        for card in cards:
+            offsets.append(len(heap))
+            heap += (card.get(field) or "").encode("utf-8")
+        offsets.append(len(heap))
+    inf_index = array.array("I", sorted(range(num_rows), key=lambda row: cards[row]["inf"].encode("utf-8")))
+
+    heap_offset = _HEADER.size + len(names) + 4*(len(offsets) + len(inf_index))
+    byte_order = _LITTLE if sys.byteorder == "little" else _BIG
+    with open(columnar_filepath, "wb") as outf:
+        outf.write(_HEADER.pack(_MAGIC, _VERSION, byte_order, num_rows, len(columns), heap_offset))
+        outf.write(names)
+        outf.write(offsets.tobytes())
+        outf.write(inf_index.tobytes())
+        outf.write(heap)
+    return num_rows
+
+
+class ColumnarCardBank(CardBank):
+    '''
+    Read-only card bank memory-mapped from the columnar format (see `write()`). Opening it doesn't read any
+    cards, and cards are only decoded when first accessed. Processes opening the same file share one copy
+    in the OS page cache, instead of each holding every card in memory. Otherwise works the same as
+    CardBank.
+
+    Params:
+        columnar_filepath (str, optional): Filepath to columnar card bank.
+        similar_table (str, optional): Optional filepath to CSV defining Portuguese synonyms.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        num_rows (int): Number of cards.
+        columns (dict): Dictionary of column position by field name.
+        card_map (dict): Dictionary of word cards decoded so far by Portuguese infinitive.
+    '''
+
+    def __init__(self, columnar_filepath=DEFAULT_COLUMNAR, similar_table=None):
+        assert os.path.exists(columnar_filepath)
+        with open(columnar_filepath, "rb") as inf:
+            self._mm = mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, num_rows, num_columns, heap_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise Exception("Unrecognized columnar card bank format: {0}".format(columnar_filepath))
+        if byte_order != (_LITTLE if sys.byteorder == "little" else _BIG):
+            raise Exception("Columnar card bank written on machine with different byte order, rebuild it")
+        self.num_rows = num_rows
+        self.columns = {}
+        position = _HEADER.size
+        for i in range(num_columns):
+            length = struct.unpack_from("<I", self._mm, position)[0]
+            name = bytes(self._mm[position+4:position+4+length]).decode("utf-8")
+            self.columns[name] = i
+            position += 4 + length
+            position += -position % 4
+        view = memoryview(self._mm)
+        offsets_size = 4*num_columns*(num_rows+1)
+        self._offsets = view[position:position+offsets_size].cast("I")
+        self._inf_index = view[position+offsets_size:position+offsets_size+4*num_rows].cast("I")
+        self._heap = view[heap_offset:]
+        self._inf_column = self.columns["inf"]
+
+        self.card_map = {}
+        self._rows = {}
+        self._lock = threading.Lock()
+
+        # similars are small, so read up front but only attach when a card is decoded
+        self._similar_map = {}
+        if similar_table:
+            assert os.path.exists(similar_table)
+            for group in read_similars(similar_table):
+                group = [inf for inf in group if self._find(inf) is not None]
+                for inf in group:
+                    others = self._similar_map.get(inf, tuple())
+                    self._similar_map[inf] = others + tuple(verb for verb in group if verb != inf and verb not in others)
+
+        self.estar_card = self.get("estar") if self._find("estar") is not None else None
+        self.ir_card = self.get("ir") if self._find("ir") is not None else None
+        if not self.estar_card:
+            raise Exception("No card found for 'estar' (to be)")
+        if not self.ir_card:
+            raise Exception("No card found for 'ir' (to go)")
+
+    def _value(self, row, column):
+        '''Decode a single field value.'''
+        start = column*(self.num_rows+1) + row
+        return bytes(self._heap[self._offsets[start]:self._offsets[start+1]]).decode("utf-8")
+
+    def _find(self, infinitive):
+        '''Find row of infinitive by binary search on sorted infinitive index, or None if not found.'''
+        target = infinitive.encode("utf-8")
+        lo, hi = 0, self.num_rows
+        base = self._inf_column*(self.num_rows+1)
+        while lo < hi:
+            mid = (lo + hi)//2
+            row = self._inf_index[mid]
+            value = bytes(self._heap[self._offsets[base+row]:self._offsets[base+row+1]])
+            if value < target:
+                lo = mid + 1
+            elif value > target:
+                hi = mid
+            else:
+                return row
+        return None
+
+    def _card(self, row):
+        '''Decode card at row, memoizing so the same card dict is returned each time.'''
+        card = self._rows.get(row)
+        if card is not None:
+            return card
+        with self._lock:
+            if row in self._rows:
+                return self._rows[row]
+            card = {field: self._value(row, column) for field, column in self.columns.items()}
+            build_card(card)
+            if card["inf"] in self._similar_map:
+                card["similars"] = self._similar_map[card["inf"]]
+            self.card_map[card["inf"]] = card
+            self._rows[row] = card
+            return card
+
+    def __len__(self):
+        return self.num_rows
+
+    def infinitives(self):
+        '''Get Portuguese infinitives of all cards, in card bank order, without decoding cards.'''
+        return [self._value(row, self._inf_column) for row in range(self.num_rows)]
+
+    def __iter__(self):
+        for row in range(self.num_rows):
+            yield self._card(row)
+
+    def __getitem__(self, i):
+        if isinstance(i, int):
+            if i < 0:
+                i += self.num_rows
+            if i < 0 or i >= self.num_rows:
+                raise IndexError(i)
+            return self._card(i)
+        if isinstance(i, str):
+            return self.get(i)
+        raise TypeError()
+
+    def reload(self):
+        '''Columnar card bank is a read-only snapshot, reconvert it to reload. Returns this instance.'''
+        return self
+
+    def get(self, query):
+        '''Get word card/definition. See `CardBank.get()`.'''
+        if isinstance(query, int):
+            return self[query]
+        if isinstance(query, str):
+            if query in self.card_map:
+                return self.card_map[query]
+            row = self._find(query)
+            if row is None:
+                raise KeyError(query)
+            return self._card(row)
+        if isinstance(query, dict):
+            if query and query.get("inf") in self.card_map and self.card_map[query["inf"]] is query:
+                return query
+            raise ValueError()
+        raise TypeError()
@@ -54,6 +54,45 @@ TENSE_GROUPS = SimpleNamespace(
     IMPERATIVE=(TENSE.IMPERATIVE_NEG, TENSE.IMPERATIVE_AFM), 
 )
 
+# hint rules (see card "hint-rules"), compiled into bitmasks of these flags
+HINT_RULE = SimpleNamespace(
+    FROM_ENG=1, 
+    TO_ENG=2, 
+    FIRST_DEF=4, 
+    SECOND_DEF=8, 
+    THIRD_DEF=16
+)
+HINT_RULE_NAMES = {
+    "from-eng":   HINT_RULE.FROM_ENG, 
+    "to-eng":     HINT_RULE.TO_ENG, 
+    "first-def":  HINT_RULE.FIRST_DEF, 
+    "second-def": HINT_RULE.SECOND_DEF, 
+    "third-def":  HINT_RULE.THIRD_DEF
+}
+# index-selective rules, by index of English definition
+HINT_RULE_DEFS = (HINT_RULE.FIRST_DEF, HINT_RULE.SECOND_DEF, HINT_RULE.THIRD_DEF)
+
+KEY_FIELD = ("inf",)
+SUPPLIED_FIELDS = (
+    "hint", "hint-rules", "use-eng-defs", 
+    "eng-inf", "eng-gerund", 
+    "eng-1", "eng-3", "eng-p", 
+    "eng-past", "eng-past-perf"
+)
+BASIC_FIELDS = KEY_FIELD + SUPPLIED_FIELDS
+BUILT_FIELDS = (
+    "gerund", "participle", 
+    "present-1s", "present-2s", "present-3s", "present-1p", "present-2p", "present-3p", 
+    "imperfect-1s", "imperfect-2s", "imperfect-3s", "imperfect-1p", "imperfect-2p", "imperfect-3p", 
+    "perfect-1s", "perfect-2s", "perfect-3s", "perfect-1p", "perfect-2p", "perfect-3p", 
+    "future-1s", "future-2s", "future-3s", "future-1p", "future-2p", "future-3p", 
+    "futcond-1s", "futcond-2s", "futcond-3s", "futcond-1p", "futcond-2p", "futcond-3p", 
+    "imp1-2s", "imp1-3s", "imp1-1p", "imp1-2p", "imp1-3p", 
+    "imp0-2s", "imp0-3s", "imp0-1p", "imp0-2p", "imp0-3p"
+)
+FIELDS = BASIC_FIELDS + BUILT_FIELDS
+ENG_FIELDS = ("eng-inf", "eng-gerund", "eng-1", "eng-3", "eng-p", "eng-past", "eng-past-perf")
+
 VOWELS = ("a", "e", "i", "o", "u")
 
 SPECIAL_CHARS = {
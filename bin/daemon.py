@@ -0,0 +1,325 @@
+from .constants import *
+from .cardbank import CardBank
+import os, json, time, random, socket, socketserver, threading
+
+
+DEFAULT_SOCKET = "bank/card-bank.sock"
+
+# index methods that may be called remotely, by index name
+INDEX_METHODS = {
+    "form":  ("lookup", "prefix", "search"),
+    "fuzzy": ("search",),
+    "gloss": ("search", "prefix", "fuzzy", "suggest")
+}
+
+# errors passed back to client as the same type, anything else is raised as generic Exception
+_ERRORS = {error.__name__: error for error in (KeyError, IndexError, ValueError, TypeError, AssertionError)}
+
+
+def _tuples(value):
+    '''Convert lists (as decoded from JSON) back to tuples, as used in cards and verbs dicts.'''
+    if isinstance(value, list):
+        return tuple(_tuples(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _tuples(item) for key, item in value.items()}
+    return value
+
+
+class CardBankDaemon:
+    '''
+    Keeps a card bank loaded, with its indexes built, and serves it over a local Unix socket (see `serve()`)
+    so short sessions don't each pay for loading it. Watches the card bank files and reloads only the changed
+    cards (see `CardBank.reload()`). The new version is swapped in once ready, so requests are never blocked
+    on a reload and requests already running finish on the version they started with.
+
+    Params:
+        card_bank_table (str): Filepath to CSV of (built) card bank.
+        similar_table (str, optional): Optional filepath to CSV defining Portuguese synonyms.
+        interval (float, optional): Seconds between checks for changed card bank files. Defaults to 2.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        bank (CardBank): Currently served card bank.
+        generation (int): Incremented each time card bank is (re)loaded.
+        loaded (float): Time card bank was last (re)loaded.
+    '''
+
+    def __init__(self, card_bank_table, similar_table=None, interval=2.0):
+        self.interval = interval
+        self.server = None
+        self.bank = CardBank(card_bank_table, similar_table)
+        self.generation = 0
+        self.publish(self.bank)
+
+    def publish(self, bank):
+        '''Build indexes of card bank version (if not already updated) before swapping it in.'''
+        bank.get_form_index()
+        bank.get_gloss_index()
+        self.bank = bank
+        self.generation += 1
+        self.loaded = time.time()
+
+    def watch(self):
+        '''Check for changed card bank files every interval, reloading changed cards. Runs until server stops.'''
+        while self.server:
+            time.sleep(self.interval)
+            try:
+                bank = self.bank.reload()
+            except Exception as e:
+                # likely caught mid-write, keep serving old version and retry next check
+                print("Card bank reload failed, retrying: {0}".format(e))
+                continue
+            if bank is not self.bank:
+                self.publish(bank)
+                print("Card bank reloaded ({0} cards)".format(len(bank)))
+
+    def call(self, request):
+        '''Handle a single request.
+        Params:
+            request (dict): Request with "op" (str) and any arguments for it.
+        Returns:
+            JSON-serializable result.
+        '''
+        bank = self.bank
+        op = request.get("op")
+        if op == "status":
+            return {
+                "cards":      len(bank),
+                "generation": self.generation,
+                "loaded":     self.loaded,
+                "pid":        os.getpid()
+            }
+        if op == "len":
+            return len(bank)
+        if op == "infinitives":
+            return bank.infinitives()
+        if op == "card":
+            return bank[request["key"]]
+        if op == "verbs":
+            # client supplies seed so the same random choices are made as if generated locally
+            return bank.get_verbs(
+                request["inf"],
+                person=request["person"],
+                singular=request["singular"],
+                tense=request["tense"],
+                similars=request.get("similars", False),
+                rng=random.Random(request.get("seed"))
+            )
+        if op == "index":
+            if request["method"] not in INDEX_METHODS.get(request["name"], tuple()):
+                raise ValueError("Unknown index method: {0}.{1}".format(request["name"], request["method"]))
+            index = getattr(bank, "get_{0}_index".format(request["name"]))()
+            return getattr(index, request["method"])(*request.get("args", []), **request.get("kwargs", {}))
+        if op == "stop":
+            # shutdown waits for serve loop, so can't be called from this (handler) thread
+            threading.Thread(target=self.server.shutdown).start()
+            return True
+        raise ValueError("Unknown op: {0}".format(op))
+
+    def serve(self, socket_path=DEFAULT_SOCKET):
+        '''Serve card bank until stopped. Each client connection is handled in its own thread.
+        Params:
+            socket_path (str, optional): Filepath of Unix socket to listen on.
+        '''
+        if os.path.exists(socket_path):
+            if is_running(socket_path):
+                raise Exception("Card bank daemon already running at: {0}".format(socket_path))
+            # left over from daemon that didn't shut down cleanly
+            os.remove(socket_path)
+        self.server = _Server(socket_path, _Handler)
+        self.server.card_daemon = self
+        watcher = threading.Thread(target=self.watch, daemon=True)
+        watcher.start()
+        try:
+            self.server.serve_forever()
+        finally:
+            server = self.server
+            self.server = None
+            server.server_close()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    '''Reads one JSON request per line, writing one JSON response per line.'''
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                result = self.server.card_daemon.call(json.loads(line))
+                response = json.dumps({"ok": True, "result": result, "generation": self.server.card_daemon.generation})
+            except Exception as e:
+                response = json.dumps({
+                    "ok":      False,
+                    "error":   type(e).__name__,
+                    "message": str(e.args[0]) if len(e.args) == 1 else str(e)
+                })
+            self.wfile.write((response + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def is_running(socket_path=DEFAULT_SOCKET):
+    '''Check if a card bank daemon is accepting connections at the socket.'''
+    if not os.path.exists(socket_path):
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+class RemoteIndex:
+    '''
+    Stand-in for a card bank index held by the daemon. Only the methods in `INDEX_METHODS` are available.
+
+    Params:
+        bank (RemoteCardBank): Connected card bank.
+        name (str): Index name, e.g. "form" for `CardBank.get_form_index()`.
+    '''
+
+    def __init__(self, bank, name):
+        self.bank = bank
+        self.name = name
+
+    def __getattr__(self, method):
+        if method not in INDEX_METHODS[self.name]:
+            raise AttributeError(method)
+        def call(*args, **kwargs):
+            return _tuples(self.bank.call("index", name=self.name, method=method, args=args, kwargs=kwargs))
+        return call
+
+
+class RemoteCardBank(CardBank):
+    '''
+    Card bank served by a running card bank daemon (see `CardBankDaemon`). Connecting doesn't read any cards,
+    and cards are fetched on first access and kept. Verb definitions and index searches are done by the
+    daemon. Otherwise works the same as CardBank.
+
+    Params:
+        socket_path (str, optional): Filepath of daemon's Unix socket.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        card_map (dict): Dictionary of word cards fetched so far by Portuguese infinitive.
+        generation (int): Daemon's card bank generation when cards were fetched. Fetched cards are dropped
+            when this changes, as the card bank was reloaded.
+    '''
+
+    def __init__(self, socket_path=DEFAULT_SOCKET):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.rfile = self.sock.makefile("rb")
+        self.lock = threading.Lock()
+        self.generation = None
+        self.card_map = {}
+        self.index_map = {}
+        self.num_cards = None
+        self.form_index = RemoteIndex(self, "form")
+        self.fuzzy_index = RemoteIndex(self, "fuzzy")
+        self.gloss_index = RemoteIndex(self, "gloss")
+        self.estar_card = self.get("estar")
+        self.ir_card = self.get("ir")
+
+    def call(self, op, **kwargs):
+        '''Send request to daemon and wait for result.
+        Params:
+            op (str): Request op. See `CardBankDaemon.call()`.
+            **kwargs: Arguments for op.
+        Returns:
+            Result, as decoded from JSON.
+        '''
+        kwargs["op"] = op
+        with self.lock:
+            self.sock.sendall((json.dumps(kwargs) + "\n").encode("utf-8"))
+            line = self.rfile.readline()
+        if not line:
+            raise Exception("Card bank daemon closed connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise _ERRORS.get(response["error"], Exception)(response["message"])
+        if response["generation"] != self.generation:
+            self.generation = response["generation"]
+            self.card_map = {}
+            self.index_map = {}
+            self.num_cards = None
+        return response["result"]
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+    def _fetch(self, key):
+        card = _tuples(self.call("card", key=key))
+        # keep same card dict if already fetched (e.g. by index, then by infinitive)
+        card = self.card_map.setdefault(card["inf"], card)
+        if isinstance(key, int):
+            self.index_map[key] = card
+        return card
+
+    def __len__(self):
+        if self.num_cards is None:
+            self.num_cards = self.call("len")
+        return self.num_cards
+
+    def infinitives(self):
+        '''Get Portuguese infinitives of all cards, in card bank order, in one request to daemon.'''
+        return self.call("infinitives")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, int):
+            if i < 0:
+                i += len(self)
+            if i in self.index_map:
+                return self.index_map[i]
+            return self._fetch(i)
+        if isinstance(i, str):
+            return self.get(i)
+        raise TypeError()
+
+    def reload(self):
+        '''Daemon reloads the card bank itself, fetched cards are dropped once it has. Returns this instance.'''
+        return self
+
+    def get(self, query):
+        '''Get word card/definition. See `CardBank.get()`.'''
+        if isinstance(query, int):
+            return self[query]
+        if isinstance(query, str):
+            if query in self.card_map:
+                return self.card_map[query]
+            return self._fetch(query)
+        if isinstance(query, dict):
+            if query and query.get("inf") in self.card_map and self.card_map[query["inf"]] is query:
+                return query
+            # may be card fetched before a reload
+            try:
+                if query and self.get(query.get("inf")) == query:
+                    return query
+            except KeyError:
+                pass
+            raise ValueError()
+        raise TypeError()
+
+    def get_verbs(self, card, person=PERSON.FIRST, singular=True, tense=TENSE.INFINITIVE, similars=False, rng=random):
+        '''Get verb definition from daemon. See `CardBank.get_verbs()`.'''
+        return _tuples(self.call(
+            "verbs",
+            inf=card["inf"] if isinstance(card, dict) else self.get(card)["inf"],
+            person=person,
+            singular=singular,
+            tense=tense,
+            similars=similars,
+            seed=rng.getrandbits(32)
+        ))
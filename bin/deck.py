@@ -0,0 +1,112 @@
+from .constants import *
+from . import tester
+import random
+
+
+# fields of each generated question, in export order
+QUESTION_FIELDS = (
+    "n", "word-n", "inf", "to-english", "tense", "person", "singular",
+    "prompt", "hint", "answers", "answer-text"
+)
+
+
+def generate(cardbank, seed=None, words=None, tense_group=None, num_questions=3, count=None):
+    '''Generate questions without asking them, following the same word and question rules as an interactive
+    session (minus the retest section). Questions are generated lazily, so any number can be streamed.
+    Params:
+        cardbank (CardBank): CardBank instance.
+        seed (int|str, optional): Random seed. Same seed and options always give the same questions.
+        words (list[str], optional): If supplied, limits questions to these Portuguese infinitives.
+        tense_group (tuple[constants.TENSE], optional): If supplied, limits questions to these tenses. See
+            `tester.get_tense_group()`.
+        num_questions (int, optional): Questions per word. Defaults to 3.
+        count (int, optional): Total number of questions. If supplied, cycles through words (reshuffled each
+            pass) until reached. Otherwise stops after one pass through the words.
+    Raises:
+        Exception if a pass through the words gives no questions, e.g. only 'poder' with imperative tenses.
+    Yields:
+        Question dicts.
+        - n (int): Question number (starting at 1).
+        - word-n (int): Word number (starting at 1).
+        - inf (str): Portuguese infinitive.
+        - to-english (bool): True if Portuguese-to-English question.
+        - tense (str): Tense name, e.g. 'present_continuous'.
+        - person (int): Person (constants.PERSON).
+        - singular (bool): True if singular form.
+        - prompt (str): Prompt text.
+        - hint (str): Hint shown in prompt, or empty if not shown.
+        - answers (list[str]): Correct answers.
+        - answer-text (str): Formatted answer, as shown to user when wrong.
+    '''
+    rng = random.Random(seed)
+    default_exclude_tenses = []
+    if tense_group:
+        default_exclude_tenses = [tense for tense in TENSE_VALUES if tense not in tense_group]
+
+    if words:
+        cards = [cardbank[inf] for inf in words]
+    else:
+        cards = list(range(len(cardbank)))
+
+    if not cards:
+        return
+
+    n = 0
+    word_n = 0
+    while True:
+        rng.shuffle(cards)
+        # so cycling stops if no word has any valid tenses, instead of looping forever
+        pass_word_n = word_n
+        for card in cards:
+            card = cardbank.get(card)
+            exclude_tenses = tester.get_exclude_tenses(card, default_exclude_tenses)
+            # skip words with no valid tenses left, e.g. 'poder' if only testing imperative
+            if len(exclude_tenses) == len(TENSE_VALUES):
+                continue
+            word_n += 1
+            # same question direction rules as an interactive session
+            to_english = True if num_questions > 2 else bool(rng.getrandbits(1))
+            tested = []
+            for j in range(num_questions):
+                if j > 0:
+                    if to_english or num_questions <= 3:
+                        to_english = False
+                    elif num_questions > 3:
+                        to_english = bool(rng.getrandbits(1))
+                if len(exclude_tenses) == len(TENSE_VALUES):
+                    exclude_tenses = default_exclude_tenses[:]
+                params = tester.get_params(no_repeats=tested, exclude_tenses=exclude_tenses, rng=rng)
+                verbs, prompt = tester.prepare_question(cardbank, card, params, to_english, rng=rng)
+                # question may change params, if they don't make sense
+                params["tense"] = verbs["tense"]
+                params["person"] = verbs["person"]
+                params["singular"] = verbs["singular"]
+                tested.append(params)
+                # don't retest infinitive tense in any case
+                if params["tense"] == TENSE.INFINITIVE:
+                    exclude_tenses.append(params["tense"])
+
+                answers = tester.get_answers(verbs, to_english)
+                n += 1
+                yield {
+                    "n":           n,
+                    "word-n":      word_n,
+                    "inf":         card["inf"],
+                    "to-english":  to_english,
+                    "tense":       TENSE_NAMES[verbs["tense"]].lower(),
+                    "person":      verbs["person"],
+                    "singular":    verbs["singular"],
+                    "prompt":      prompt["prompt"],
+                    "hint":        verbs["hint"] if prompt["show_hint"] else "",
+                    "answers":     list(answers),
+                    "answer-text": tester.answer_formatted(verbs, answers, to_english)
+                }
+                if count and n >= count:
+                    return
+                # don't test to-english twice in a row
+                if to_english:
+                    to_english = False
+        if word_n == pass_word_n:
+            raise Exception("No questions can be generated: none of the words have any of the tenses asked for.")
+        if not count:
+            return
@@ -0,0 +1,259 @@
+from .misc import replace_special_chars, Overlay
+import copy
+
+
+# default thresholds for classifying wrong answers
+TYPO_DISTANCE = 1
+NEAR_DISTANCE = 1
+MIN_TYPO_LENGTH = 4
+
+
+def fold(in_str):
+    '''Normalize string for fuzzy comparison (lowercase, stripped, special characters replaced).'''
+    return replace_special_chars(in_str.strip().lower())
+
+
+def edit_distance(a, b, max_distance=None):
+    '''Get edit distance between two strings, counting insertions, deletions, substitutions, and swaps of
+    adjacent characters (optimal string alignment distance).
+    Params:
+        a (str): First string.
+        b (str): Second string.
+        max_distance (int, optional): If supplied, stops early once distance is known to exceed this.
+    Returns:
+        Edit distance, or max_distance+1 if exceeding max_distance.
+    '''
+    if a == b:
+        return 0
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        curr = [i] + [0]*len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i-1] == b[j-1] else 1
+            curr[j] = min(prev[j] + 1, curr[j-1] + 1, prev[j-1] + cost)
+            if prev2 and i > 1 and j > 1 and a[i-1] == b[j-2] and a[i-2] == b[j-1]:
+                curr[j] = min(curr[j], prev2[j-2] + 1)
+            if curr[j] < row_min:
+                row_min = curr[j]
+        if max_distance is not None and row_min > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, curr
+    return prev[-1]
+
+
+def deletions(word, max_distance):
+    '''Get all strings formed by deleting up to max_distance characters from word (including word itself).'''
+    found = {word}
+    edge = {word}
+    for _ in range(max_distance):
+        next_edge = set()
+        for variant in edge:
+            for i in range(len(variant)):
+                next_edge.add(variant[:i] + variant[i+1:])
+        next_edge -= found
+        found |= next_edge
+        edge = next_edge
+    return found
+
+
+def edits(word, alphabet, max_distance=1):
+    '''Get all strings within edit distance of word (including word itself), using characters of alphabet for
+    insertions and substitutions. Lets a plain dictionary be searched for near-matches of one word without an
+    index (see `FuzzyIndex`), but grows quickly with distance, so keep it small.
+    Params:
+        word (str): String to vary.
+        alphabet (str): Characters to insert or substitute.
+        max_distance (int, optional): Max edit distance. Defaults to 1.
+    Returns:
+        Set of strings.
+    '''
+    found = {word}
+    edge = {word}
+    for _ in range(max_distance):
+        next_edge = set()
+        for variant in edge:
+            for i in range(len(variant) + 1):
+                head, tail = variant[:i], variant[i:]
+                for char in alphabet:
+                    next_edge.add(head + char + tail)
+                if tail:
+                    next_edge.add(head + tail[1:])
+                    for char in alphabet:
+                        next_edge.add(head + char + tail[1:])
+                if len(tail) > 1:
+                    next_edge.add(head + tail[1] + tail[0] + tail[2:])
+        next_edge -= found
+        found |= next_edge
+        edge = next_edge
+    return found
+
+
+class FuzzyIndex:
+    '''
+    Deletion-neighborhood index for finding strings within a small edit distance. Every indexed form is
+    stored under each variant made by deleting up to `max_distance` characters, so a query only has to look
+    up its own deletion variants and verify the few candidates found, instead of comparing against everything.
+
+    Params:
+        forms (iterable): Iterable of (form, value) pairs to index. Forms are folded before indexing.
+        max_distance (int, optional): Max edit distance supported by searches. Defaults to 1. Memory grows
+            quickly with this, so keep it small.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        max_distance (int): Max edit distance supported.
+        values (dict): Dictionary of values (as tuple) by folded form. An `Overlay` once updated.
+        neighbors (dict): Dictionary of folded forms (as tuple[str]) by deletion variant. An `Overlay` once 
+            updated.
+    '''
+
+    def __init__(self, forms, max_distance=1):
+        self.max_distance = max_distance
+        values = {}
+        for form, value in forms:
+            key = fold(form)
+            if not key:
+                continue
+            if key not in values:
+                values[key] = [value]
+            elif value not in values[key]:
+                values[key].append(value)
+        neighbors = {}
+        for key in values:
+            for variant in deletions(key, max_distance):
+                if variant not in neighbors:
+                    neighbors[variant] = [key]
+                else:
+                    neighbors[variant].append(key)
+        self.values = {key: tuple(vals) for key, vals in values.items()}
+        self.neighbors = {variant: tuple(keys) for variant, keys in neighbors.items()}
+
+    def __len__(self):
+        return len(self.values)
+
+    def updated(self, removed, added):
+        '''Get copy of index with some (form, value) pairs removed and others added. The copy shares 
+        unchanged entries with this index (see `misc.Overlay`), so costs as much as the pairs changed rather 
+        than the index size. This index is left unchanged.
+        Params:
+            removed (iterable): Iterable of (form, value) pairs to remove.
+            added (iterable): Iterable of (form, value) pairs to add.
+        Returns:
+            New FuzzyIndex instance.
+        '''
+        index = copy.copy(self)
+        index.values = values = Overlay(self.values)
+        index.neighbors = neighbors = Overlay(self.neighbors)
+        for form, value in removed:
+            key = fold(form)
+            if key not in values or value not in values[key]:
+                continue
+            remaining = tuple(existing for existing in values[key] if existing != value)
+            if remaining:
+                values[key] = remaining
+                continue
+            del values[key]
+            for variant in deletions(key, self.max_distance):
+                keys = tuple(existing for existing in neighbors.get(variant, tuple()) if existing != key)
+                if keys:
+                    neighbors[variant] = keys
+                elif variant in neighbors:
+                    del neighbors[variant]
+        for form, value in added:
+            key = fold(form)
+            if not key:
+                continue
+            if key in values:
+                if value not in values[key]:
+                    values[key] += (value,)
+                continue
+            values[key] = (value,)
+            for variant in deletions(key, self.max_distance):
+                neighbors[variant] = neighbors.get(variant, tuple()) + (key,)
+        return index
+
+    def search(self, query, max_distance=None):
+        '''Find indexed forms within edit distance of query.
+        Params:
+            query (str): String to search for. Folded before searching.
+            max_distance (int, optional): Max edit distance. Defaults to (and is capped at) index max distance.
+        Returns:
+            List of (distance, form, values) tuples, sorted by distance then form.
+        '''
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        query = fold(query)
+        checked = set()
+        found = []
+        for variant in deletions(query, max_distance):
+            for key in self.neighbors.get(variant, tuple()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                distance = edit_distance(query, key, max_distance)
+                if distance <= max_distance:
+                    found.append((distance, key, self.values[key]))
+        found.sort(key=lambda match: (match[0], match[1]))
+        return found
+
+
+def is_typo(answers, guess, max_distance=TYPO_DISTANCE, min_length=MIN_TYPO_LENGTH):
+    '''Check if guess is a near-miss of any answer. Multi-word answers are compared against the same number of
+    trailing words in guess, so leading aux. verbs in English answers don't count against it.
+    Params:
+        answers (str|tuple[str]): Accepted answer(s).
+        guess (str): User inputted guess.
+        max_distance (int, optional): Max edit distance still considered a typo.
+        min_length (int, optional): Answers shorter than this never count as a typo, as short words are too
+            easily confused with other real words.
+    Returns:
+        True if guess is within distance of an answer (but not an exact match).
+    '''
+    if isinstance(answers, str):
+        answers = (answers,)
+    guess = fold(guess)
+    guess_words = guess.split(" ")
+    for answer in answers:
+        answer = fold(answer)
+        if len(answer) < min_length:
+            continue
+        num_words = len(answer.split(" "))
+        compare_to = " ".join(guess_words[-num_words:]) if len(guess_words) > num_words else guess
+        distance = edit_distance(answer, compare_to, max_distance)
+        if 0 < distance <= max_distance:
+            return True
+    return False
+
+
+def classify(answers, guess, index=None, typo_distance=TYPO_DISTANCE, near_distance=NEAR_DISTANCE,
+             min_length=MIN_TYPO_LENGTH):
+    '''Classify a wrong guess.
+    Params:
+        answers (str|tuple[str]): Accepted answer(s).
+        guess (str): User inputted guess.
+        index (FuzzyIndex|lookup.FormIndex, optional): If supplied, used to find near-matches of other forms.
+        typo_distance (int, optional): Max edit distance to consider a typo of the answer.
+        near_distance (int, optional): Max edit distance to consider a near-match of another form.
+        min_length (int, optional): Min length of answer to allow typos for, and of guess to search for near-
+            matches. See `is_typo()`.
+    Returns:
+        Tuple of (classification, matches) where classification is one of "typo" (close to the answer),
+        "near" (close to some other indexed form, matches being list of (distance, form, values) tuples), or
+        "unrelated".
+    '''
+    if is_typo(answers, guess, max_distance=typo_distance, min_length=min_length):
+        return "typo", []
+    # short guesses are within a typo of too many unrelated forms to be meaningful
+    if index is not None and len(fold(guess)) >= min_length:
+        folded_answers = set(fold(answer) for answer in ((answers,) if isinstance(answers, str) else answers))
+        matches = [
+            match for match in index.search(guess, max_distance=near_distance) 
+            if match[1] not in folded_answers
+        ]
+        if matches:
+            return "near", matches
+    return "unrelated", []
@@ -0,0 +1,216 @@
+from .cardbank import read_rows
+import os, csv, json, time, hashlib
+
+
+DEFAULT_HISTORY = "bank/history"
+
+# layout under history directory:
+#   objects/    raw CSV rows and version manifests, each stored once under (a prefix of) its hash
+#   *.log       per card bank file, one JSON line per version (time, manifest hash, num. rows, message)
+
+
+def _hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _object_path(history, object_hash):
+    return os.path.join(history, "objects", object_hash[:2], object_hash[2:])
+
+
+def _write_object(history, data, object_hash=None):
+    '''Store data under its hash, if not already stored. Returns hash.'''
+    object_hash = object_hash or _hash(data)
+    path = _object_path(history, object_hash)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to temp then rename, so an interrupted write never leaves a partial object
+        temp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        with open(temp_path, "wb") as outf:
+            outf.write(data)
+        os.replace(temp_path, path)
+    return object_hash
+
+
+def _read_object(history, object_hash):
+    with open(_object_path(history, object_hash), "rb") as inf:
+        return inf.read()
+
+
+def _log_path(history, table):
+    return os.path.join(history, os.path.splitext(os.path.basename(table))[0] + ".log")
+
+
+def versions(table, history=DEFAULT_HISTORY):
+    '''Get versions of card bank file recorded in history.
+    Params:
+        table (str): Filepath of card bank CSV, e.g. "bank/card-bank-built.csv".
+        history (str, optional): History directory.
+    Returns:
+        List of version dicts, oldest first.
+        - n (int): Version number (starting at 1).
+        - time (float): Time version was recorded.
+        - manifest (str): Hash of version manifest.
+        - rows (int): Number of rows (cards).
+        - message (str): Description of change.
+    '''
+    log_path = _log_path(history, table)
+    if not os.path.exists(log_path):
+        return []
+    found = []
+    with open(log_path, "r", encoding="utf-8") as inf:
+        for line in inf:
+            if line.strip():
+                version = json.loads(line)
+                version["n"] = len(found) + 1
+                found.append(version)
+    return found
+
+
+def get_version(table, n=None, history=DEFAULT_HISTORY):
+    '''Get version by number.
+    Params:
+        table (str): Filepath of card bank CSV.
+        n (int, optional): Version number. Negative numbers count back from latest. Defaults to latest.
+        history (str, optional): History directory.
+    Returns:
+        Version dict. See `versions()`.
+    '''
+    found = versions(table, history)
+    if not found:
+        raise Exception("No history recorded for: {0}".format(table))
+    if n is None:
+        return found[-1]
+    if n < 0:
+        n += len(found) + 1
+    if n < 1 or n > len(found):
+        raise Exception("No version {0} of {1} (versions 1-{2})".format(n, table, len(found)))
+    return found[n-1]
+
+
+def snapshot(table, message="", history=DEFAULT_HISTORY):
+    '''Record current contents of card bank file as a new version, storing only rows not already stored.
+    Nothing is recorded if unchanged since the latest version.
+    Params:
+        table (str): Filepath of card bank CSV.
+        message (str, optional): Description of change.
+        history (str, optional): History directory.
+    Returns:
+        Version dict (see `versions()`) of new version, or latest version if unchanged.
+    '''
+    fieldnames, rows = read_rows(table)
+    # keep header and line endings as they were, so rolling back restores the exact file
+    with open(table, "rb") as inf:
+        header = inf.readline()
+    newline = "\r\n" if header.endswith(b"\r\n") else "\n"
+    found = versions(table, history)
+    # rows in latest version are already stored, skip checking for those
+    stored = set()
+    if found:
+        stored = set(json.loads(_read_object(history, found[-1]["manifest"]))["rows"])
+    row_hashes = []
+    for infinitive, row in rows:
+        row_hash = _hash(row)
+        if row_hash not in stored:
+            _write_object(history, row, row_hash)
+            stored.add(row_hash)
+        row_hashes.append(row_hash)
+    manifest = _write_object(history, json.dumps({
+        "header":  header.decode("utf-8").rstrip("\r\n"),
+        "newline": newline,
+        "fields":  fieldnames,
+        "rows":    row_hashes
+    }).encode("utf-8"))
+    if found and found[-1]["manifest"] == manifest:
+        return found[-1]
+    version = {
+        "time":     time.time(),
+        "manifest": manifest,
+        "rows":     len(row_hashes),
+        "message":  message
+    }
+    with open(_log_path(history, table), "a", encoding="utf-8") as outf:
+        outf.write(json.dumps(version) + "\n")
+    version["n"] = len(found) + 1
+    return version
+
+
+def read_version(table, n=None, history=DEFAULT_HISTORY):
+    '''Read raw rows of a version. See `cardbank.read_rows()`.
+    Params:
+        table (str): Filepath of card bank CSV.
+        n (int, optional): Version number. See `get_version()`.
+        history (str, optional): History directory.
+    Returns:
+        Tuple of CSV header fields (as list[str]) and rows (as list of (infinitive, row bytes) tuples).
+    '''
+    manifest = _read_manifest(table, n, history)
+    rows = []
+    for row_hash in manifest["rows"]:
+        row = _read_object(history, row_hash)
+        rows.append((next(csv.reader(row.decode("utf-8").splitlines(keepends=True)))[0], row))
+    return manifest["fields"], rows
+
+
+def _read_manifest(table, n=None, history=DEFAULT_HISTORY):
+    return json.loads(_read_object(history, get_version(table, n, history)["manifest"]))
+
+
+def diff(table, from_n, to_n=None, history=DEFAULT_HISTORY):
+    '''Compare two versions by card.
+    Params:
+        table (str): Filepath of card bank CSV.
+        from_n (int): Version number to compare from. See `get_version()`.
+        to_n (int, optional): Version number to compare to. Defaults to latest.
+        history (str, optional): History directory.
+    Returns:
+        Dict of changes.
+        - added (list[str]): Infinitives of cards added.
+        - removed (list[str]): Infinitives of cards removed.
+        - changed (list[tuple]): Cards changed, as (infinitive, list of (field, old value, new value)).
+    '''
+    from_fields, from_rows = read_version(table, from_n, history)
+    to_fields, to_rows = read_version(table, to_n, history)
+    from_map = dict(from_rows)
+    to_map = dict(to_rows)
+    changes = {
+        "added":   [inf for inf, row in to_rows if inf not in from_map],
+        "removed": [inf for inf, row in from_rows if inf not in to_map],
+        "changed": []
+    }
+    for inf, row in to_rows:
+        # unchanged rows are the same bytes, so only changed rows are parsed
+        if inf not in from_map or from_map[inf] == row:
+            continue
+        old = _parse(from_fields, from_map[inf])
+        new = _parse(to_fields, row)
+        fields = [(field, old.get(field) or "", new.get(field) or "") for field in to_fields]
+        changes["changed"].append((inf, [field for field in fields if field[1] != field[2]]))
+    return changes
+
+
+def _parse(fieldnames, row):
+    '''Parse row into dict of field values, without building card.'''
+    values = next(csv.reader(row.decode("utf-8").splitlines(keepends=True)))
+    return dict(zip(fieldnames, values))
+
+
+def rollback(table, n, history=DEFAULT_HISTORY):
+    '''Restore card bank file to a version. The rollback is itself recorded as a new version, so it can be
+    undone too.
+    Params:
+        table (str): Filepath of card bank CSV.
+        n (int): Version number. See `get_version()`.
+        history (str, optional): History directory.
+    Returns:
+        Version dict (see `versions()`) of new version.
+    '''
+    version = get_version(table, n, history)
+    manifest = _read_manifest(table, version["n"], history)
+    newline = manifest["newline"].encode("utf-8")
+    temp_path = "{0}.{1}.tmp".format(table, os.getpid())
+    with open(temp_path, "wb") as outf:
+        outf.write(manifest["header"].encode("utf-8") + newline)
+        for row_hash in manifest["rows"]:
+            outf.write(_read_object(history, row_hash) + newline)
+    os.replace(temp_path, table)
+    return snapshot(table, message="rollback to version {0}".format(version["n"]), history=history)
@@ -0,0 +1,173 @@
+from .constants import BASIC_FIELDS
+from . import builder
+from .browser import BrowserPool
+import os, csv, json, concurrent.futures
+
+
+CHECK_CACHE = "bank/infinitive-checks.json"
+
+# columns in order, for import files without a header row
+IMPORT_FIELDS = ("inf", "eng-1", "eng-3", "eng-p", "eng-inf", "eng-gerund", "eng-past", "eng-past-perf", "hint")
+
+# English form fields, which need the same number of forms as 'eng-1' if given
+_FORM_FIELDS = ("eng-inf", "eng-gerund", "eng-3", "eng-p", "eng-past", "eng-past-perf")
+
+
+def _forms(value):
+    forms = [form.strip().lower() for form in (value or "").split("/")]
+    return [form for form in forms if form]
+
+
+def make_card(values):
+    '''Create basic card definition (as in card-bank-basic.csv) from imported values. English forms left out
+    are left empty, so they are guessed from the 1st person forms the same as when accepting the guesses in
+    `add_word.create_word()`.
+    Params:
+        values (dict): Imported values by field name. Only 'inf' and 'eng-1' are required.
+    Returns:
+        Card dict.
+    '''
+    infinitive = (values.get("inf") or "").strip().lower()
+    if not infinitive:
+        raise ValueError("Missing infinitive")
+    eng_1 = _forms(values.get("eng-1"))
+    if not eng_1:
+        raise ValueError("Missing English form(s) for '{0}'".format(infinitive))
+    card = {field: "" for field in BASIC_FIELDS}
+    card["inf"] = infinitive
+    card["eng-1"] = "/".join(eng_1)
+    for field in _FORM_FIELDS:
+        forms = _forms(values.get(field))
+        if forms and len(forms) != len(eng_1):
+            raise ValueError("Expected {0} {1} form(s) for '{2}', got {3}".format(
+                len(eng_1), field, infinitive, len(forms)
+            ))
+        card[field] = "/".join(forms)
+    card["hint"] = (values.get("hint") or "").strip()
+    card["hint-rules"] = ";".join(
+        rule.strip().lower() for rule in (values.get("hint-rules") or "").split(";") if rule.strip()
+    )
+    use_eng_defs = (values.get("use-eng-defs") or "").strip()
+    if use_eng_defs:
+        if not use_eng_defs.isdigit() or int(use_eng_defs) > len(eng_1):
+            raise ValueError("Invalid use-eng-defs for '{0}': {1}".format(infinitive, use_eng_defs))
+        if int(use_eng_defs) in (0, len(eng_1)):
+            use_eng_defs = ""
+    card["use-eng-defs"] = use_eng_defs
+    return card
+
+
+def read_words(filepath):
+    '''Read words to import from CSV or TSV (by file extension '.tsv' or '.tab'). If the first row starts with
+    'inf', it is read as a header of card bank field names. Otherwise columns are read in the order of
+    `IMPORT_FIELDS`. Blank lines and lines starting with '#' are skipped.
+    Params:
+        filepath (str): Filepath of words to import.
+    Returns:
+        Tuple of cards (list[dict], see `make_card()`) and errors (list of (line number, message) tuples).
+    '''
+    delimiter = "\t" if filepath.lower().endswith((".tsv", ".tab")) else ","
+    with open(filepath, "r", newline="", encoding="utf-8-sig") as inf:
+        rows = list(csv.reader(inf, delimiter=delimiter))
+    fields = IMPORT_FIELDS
+    start = 1
+    if rows and rows[0] and rows[0][0].strip().lower() == "inf":
+        fields = [field.strip().lower() for field in rows[0]]
+        unknown = [field for field in fields if field and field not in BASIC_FIELDS]
+        if unknown:
+            raise Exception("Unrecognized import field(s): {0}".format(", ".join(unknown)))
+        rows = rows[1:]
+        start = 2
+    cards = []
+    errors = []
+    seen = {}
+    for line, row in enumerate(rows, start=start):
+        if not row or not "".join(row).strip() or row[0].strip().startswith("#"):
+            continue
+        try:
+            card = make_card(dict(zip(fields, row)))
+        except ValueError as e:
+            errors.append((line, str(e)))
+            continue
+        if card["inf"] in seen:
+            errors.append((line, "Duplicate of line {0}: '{1}'".format(seen[card["inf"]], card["inf"])))
+            continue
+        seen[card["inf"]] = line
+        cards.append(card)
+    return cards, errors
+
+
+class WebChecker:
+    '''
+    Checks infinitives with the conjugator website (see `builder.check_infinitive()`). Safe to call from
+    multiple threads, each check takes a session from the browser pool. Call `close()` when done.
+
+    Params:
+        pool (BrowserPool, optional): Browser pool to share (e.g. with the build after). Defaults to own pool
+            of `size` browsers, closed with checker.
+        size (int, optional): Size of own pool, if no pool given. Defaults to 8.
+    '''
+
+    def __init__(self, pool=None, size=8):
+        self.own_pool = pool is None
+        self.pool = pool or BrowserPool(size=size)
+
+    def __call__(self, infinitive):
+        with self.pool.session() as session:
+            return builder.check_infinitive(infinitive, session=session)
+
+    def close(self):
+        if self.own_pool:
+            self.pool.close()
+
+
+def validate(infinitives, check, known=None, cache_file=CHECK_CACHE, workers=8):
+    '''Check infinitives are valid, running checks concurrently. Results are cached, so each infinitive is
+    only ever checked once. Checks that fail (e.g. no network) aren't cached.
+    Params:
+        infinitives (list[str]): Infinitives to check.
+        check (callable): Check function, given infinitive and returning None if valid or a Warning/message
+            if invalid. E.g. a `WebChecker` instance.
+        known (set[str], optional): Infinitives known to be valid (e.g. already in card bank), not checked.
+        cache_file (str, optional): Filepath of JSON cache of check results. None to not cache.
+        workers (int, optional): Number of checks to run at once. Defaults to 8.
+    Returns:
+        Dictionary of invalid infinitives with reason.
+    '''
+    known = known or set()
+    cache = {}
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file, "r", encoding="utf-8") as inf:
+            cache = json.load(inf)
+    to_check = [inf for inf in infinitives if inf not in known and inf not in cache]
+    failed = {}
+
+    def run_check(infinitive):
+        try:
+            result = check(infinitive)
+            return infinitive, str(result) if result else "", True
+        except Exception as e:
+            return infinitive, "Check failed: {0}".format(e), False
+
+    if to_check:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            for infinitive, result, cacheable in pool.map(run_check, to_check):
+                if cacheable:
+                    cache[infinitive] = result
+                else:
+                    failed[infinitive] = result
+        if cache_file:
+            temp_path = "{0}.{1}.tmp".format(cache_file, os.getpid())
+            with open(temp_path, "w", encoding="utf-8") as outf:
+                json.dump(cache, outf, ensure_ascii=False, indent=0, sort_keys=True)
+            os.replace(temp_path, cache_file)
+
+    invalid = {}
+    for infinitive in infinitives:
+        if infinitive in known:
+            continue
+        if infinitive in failed:
+            invalid[infinitive] = failed[infinitive]
+        elif cache.get(infinitive):
+            invalid[infinitive] = cache[infinitive]
+    return invalid
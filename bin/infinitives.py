@@ -0,0 +1,158 @@
+import os, csv, json, bisect
+
+
+DEFAULT_WORDLIST = "bank/infinitives.txt"
+
+# Portuguese infinitives all end in -ar, -er, -ir, or -or (e.g. 'pôr', 'compor')
+_ENDINGS = ("ar", "er", "ir", "or", "ôr")
+
+# part-of-speech tags marking verbs in tagged wordlists (see `read_tagged_wordlist()`)
+VERB_TAGS = ("v", "verb", "vblex")
+
+
+def is_infinitive_form(word):
+    '''Check word looks like a Portuguese infinitive (single lowercase word with an infinitive ending). Many 
+    nouns and adjectives do too (e.g. 'mar', 'flor', 'melhor'), so this alone doesn't make a word a verb.'''
+    return bool(word) and word.isalpha() and word.islower() and word.endswith(_ENDINGS)
+
+
+def read_wordlist(filepath):
+    '''Read words from wordlist file, one per line. Blank lines and lines starting with '#' are skipped.'''
+    with open(filepath, "r", encoding="utf-8") as inf:
+        return [line.strip().lower() for line in inf if line.strip() and not line.startswith("#")]
+
+
+def read_tagged_wordlist(filepath):
+    '''Read words from wordlist file, with part-of-speech tag if given after the word (separated by whitespace,
+    e.g. 'falar VERB'), as in most dictionary exports. Blank lines and lines starting with '#' are skipped.
+    Returns:
+        Tuple of words tagged as verbs (see `VERB_TAGS`) and untagged words (list[str] each). Words with other 
+        tags are left out.
+    '''
+    verbs = []
+    untagged = []
+    for line in read_wordlist(filepath):
+        parts = line.split()
+        if len(parts) == 1:
+            untagged.append(parts[0])
+        elif parts[1] in VERB_TAGS:
+            verbs.append(parts[0])
+    return verbs, untagged
+
+
+def write_wordlist(words, filepath=DEFAULT_WORDLIST):
+    '''Write words to wordlist file, sorted and without repeats, one per line.'''
+    temp_path = "{0}.{1}.tmp".format(filepath, os.getpid())
+    with open(temp_path, "w", encoding="utf-8", newline="\n") as outf:
+        for word in sorted(set(words)):
+            outf.write(word + "\n")
+    os.replace(temp_path, filepath)
+
+
+class InfinitiveIndex:
+    '''
+    Index of known valid Portuguese infinitives, read from a sorted wordlist file (see `write_wordlist()`).
+    Lookups are a binary search, so checking a word is valid takes microseconds and needs no network.
+
+    Params:
+        filepath (str, optional): Filepath of wordlist. If it doesn't exist, index starts empty.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        filepath (str): Filepath of wordlist.
+        words (list[str]): Known infinitives, in sorted order.
+    '''
+
+    def __init__(self, filepath=DEFAULT_WORDLIST):
+        self.filepath = filepath
+        self.words = []
+        if os.path.exists(filepath):
+            words = read_wordlist(filepath)
+            # wordlist is written sorted, only sort if edited by hand
+            if any(words[i] >= words[i+1] for i in range(len(words)-1)):
+                words = sorted(set(words))
+            self.words = words
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, infinitive):
+        infinitive = infinitive.strip().lower()
+        i = bisect.bisect_left(self.words, infinitive)
+        return i < len(self.words) and self.words[i] == infinitive
+
+    def prefix(self, prefix, limit=20):
+        '''Find known infinitives starting with prefix.
+        Params:
+            prefix (str): Start of infinitive.
+            limit (int, optional): Max number of infinitives to return. Defaults to 20.
+        Returns:
+            List of infinitives, in sorted order.
+        '''
+        prefix = prefix.strip().lower()
+        found = []
+        i = bisect.bisect_left(self.words, prefix)
+        while i < len(self.words) and len(found) < limit and self.words[i].startswith(prefix):
+            found.append(self.words[i])
+            i += 1
+        return found
+
+    def add(self, infinitives, save=True):
+        '''Add infinitives found to be valid (e.g. by web check).
+        Params:
+            infinitives (list[str]): Infinitives to add.
+            save (bool, optional): If true, also writes wordlist file. Defaults to True.
+        Returns:
+            Number of infinitives added (not already known).
+        '''
+        added = 0
+        for infinitive in infinitives:
+            infinitive = infinitive.strip().lower()
+            i = bisect.bisect_left(self.words, infinitive)
+            if i < len(self.words) and self.words[i] == infinitive:
+                continue
+            self.words.insert(i, infinitive)
+            added += 1
+        if added and save:
+            write_wordlist(self.words, self.filepath)
+        return added
+
+
+def build_wordlist(card_bank_tables=(), check_cache=None, wordlists=(), check=None, filepath=DEFAULT_WORDLIST):
+    '''Build (or add to) wordlist of known infinitives.
+    Params:
+        card_bank_tables (list[str], optional): Card bank CSVs, all infinitives in them are valid.
+        check_cache (str, optional): Filepath of web check cache (see `importer.validate()`), infinitives
+            checked valid are added.
+        wordlists (list[str], optional): Other wordlist files, e.g. from a dictionary (see 
+            `read_tagged_wordlist()`). Words tagged as verbs are added. Untagged words that look like 
+            infinitives (see `is_infinitive_form()`) are only added if `check` finds them valid.
+        check (callable, optional): Check for untagged words, e.g. `importer.WebChecker`. Results are cached in
+            check_cache. If not given, untagged words are skipped.
+        filepath (str, optional): Filepath of wordlist to write. Existing words are kept.
+    Returns:
+        Tuple of number of words in wordlist and number of untagged words skipped (not checked, or failed 
+        check).
+    '''
+    words = set(read_wordlist(filepath)) if os.path.exists(filepath) else set()
+    for table in card_bank_tables:
+        with open(table, "r", encoding="utf-8") as csvf:
+            words.update(row["inf"].strip().lower() for row in csv.DictReader(csvf) if row.get("inf"))
+    if check_cache and os.path.exists(check_cache):
+        with open(check_cache, "r", encoding="utf-8") as cachef:
+            words.update(word for word, warning in json.load(cachef).items() if not warning)
+    candidates = set()
+    for wordlist in wordlists:
+        verbs, untagged = read_tagged_wordlist(wordlist)
+        words.update(word for word in verbs if is_infinitive_form(word))
+        candidates.update(word for word in untagged if is_infinitive_form(word))
+    candidates -= words
+    skipped = len(candidates)
+    if candidates and check:
+        # only imported when needed, as it needs the browser to check
+        from .importer import validate
+        invalid = validate(sorted(candidates), check, cache_file=check_cache)
+        words.update(word for word in candidates if word not in invalid)
+        skipped = len(invalid)
+    write_wordlist(words, filepath)
+    return len(words), skipped
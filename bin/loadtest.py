@@ -0,0 +1,139 @@
+from .constants import *
+from . import tester, fuzzy
+from .session import Session
+import math, time, random
+
+
+# stages timed for each question, in report order
+STAGES = ("select", "params", "question", "grade", "diagnose")
+
+
+def percentile(sorted_values, p):
+    '''Get percentile (nearest rank) of sorted values, e.g. p=95 for 95th percentile.'''
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values)-1, max(0, math.ceil(p/100*len(sorted_values))-1))]
+
+
+class VirtualLearner:
+    '''
+    Runs sessions (see session.py) like an interactive session, answering questions itself rather than reading
+    stdin, timing each stage: word selection, question parameters, question generation (verbs and prompt), 
+    grading, and diagnosing wrong answers (as explained to learners, see `tester._question()`).
+
+    Params:
+        cardbank (CardBank): CardBank instance. May be shared between learners in different threads.
+        mix (tuple[float], optional): Fractions of answers which are correct, typos, and wrong (another form of
+            the verb, or another verb's definition). Defaults to (0.7, 0.15, 0.15).
+        num_words (int, optional): Words per session. Defaults to 10.
+        num_questions (int, optional): Questions per word. Defaults to 3.
+        seed (int, optional): Random seed.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        timings (dict): Seconds taken each time, by stage name (list[float]). Selection is timed once per
+            session, other stages per question (including retest questions).
+        questions (int): Number of questions answered.
+        correct (int): Number of answers graded correct.
+    '''
+
+    def __init__(self, cardbank, mix=(0.7, 0.15, 0.15), num_words=10, num_questions=3, seed=None):
+        self.cardbank = cardbank
+        self.mix = mix
+        self.num_words = min(num_words, len(cardbank))
+        self.num_questions = num_questions
+        self.rng = random.Random(seed)
+        self.timings = {stage: [] for stage in STAGES}
+        self.questions = 0
+        self.correct = 0
+
+    def _time(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        self.timings[stage].append(time.perf_counter() - start)
+        return value
+
+    def answer(self, card, verbs, to_english):
+        '''Make up answer from answer mix.'''
+        correct = tester.get_answers(verbs, to_english)[0]
+        kind = self.rng.choices(("correct", "typo", "wrong"), weights=self.mix, k=1)[0]
+        if kind == "correct":
+            return correct
+        if kind == "typo" and len(correct) > 3:
+            # swap two letters, or drop one
+            i = self.rng.randrange(1, len(correct)-1)
+            if self.rng.getrandbits(1):
+                return correct[:i-1] + correct[i] + correct[i-1] + correct[i+1:]
+            return correct[:i] + correct[i+1:]
+        if to_english:
+            other = self.cardbank[self.rng.randrange(len(self.cardbank))]
+            return other["eng-1"][0] if isinstance(other["eng-1"], tuple) else other["eng-1"].split("/")[0]
+        form = card[self.rng.choice(BUILT_FIELDS[2:])]
+        return form[0] if isinstance(form, tuple) else form.split("/")[0]
+
+    def run_session(self):
+        '''Run one session, including retest section.'''
+        session = self._time(
+            "select", Session.new, self.cardbank, num_words=self.num_words, num_questions=self.num_questions,
+            seed=self.rng.getrandbits(32)
+        )
+        for section in ("test", "retest"):
+            while session.word < session.num_words:
+                self._time("params", session.draw)
+                question = self._time("question", session.next_question)
+                guess = self.answer(question["card"], question["verbs"], question["to_english"])
+                result = self._time("grade", session.submit, guess)
+                self.questions += 1
+                if result["correct"]:
+                    self.correct += 1
+                else:
+                    self._time("diagnose", self.diagnose, question["verbs"], result, question["to_english"])
+            # retest section only ends after enough correct answers
+            if section == "test" and self.mix[0]:
+                session.start_retest()
+            else:
+                break
+
+    def diagnose(self, verbs, result, to_english):
+        '''Explain wrong answer, as for a learner (see `tester._question()`), without printing.'''
+        if not to_english:
+            diagnosis = tester.diagnose_form(self.cardbank, verbs, result["guess"])
+            if diagnosis:
+                return diagnosis
+            return fuzzy.classify(result["answers"], result["guess"], index=self.cardbank.get_form_index())
+        diagnosis = tester.diagnose_english(self.cardbank, verbs, result["guess"])
+        if diagnosis:
+            return diagnosis
+        return fuzzy.classify(tester.english_answers(verbs), result["guess"])
+
+
+def summarize(learners, elapsed):
+    '''Combine results of learners.
+    Params:
+        learners (list): VirtualLearner instances, or dicts of their timings, questions, and correct.
+        elapsed (float): Wall time all learners took (seconds).
+    Returns:
+        Summary dict.
+        - questions (int): Total questions answered.
+        - correct (int): Total answers graded correct.
+        - rate (float): Questions per second.
+        - stages (dict): Latency stats by stage name, as dict of count, p50, p95, p99, and max (seconds).
+    '''
+    learners = [learner if isinstance(learner, dict) else vars(learner) for learner in learners]
+    questions = sum(learner["questions"] for learner in learners)
+    stages = {}
+    for stage in STAGES:
+        values = sorted(value for learner in learners for value in learner["timings"][stage])
+        stages[stage] = {
+            "count": len(values),
+            "p50":   percentile(values, 50),
+            "p95":   percentile(values, 95),
+            "p99":   percentile(values, 99),
+            "max":   values[-1] if values else 0
+        }
+    return {
+        "questions": questions,
+        "correct":   sum(learner["correct"] for learner in learners),
+        "rate":      questions/elapsed if elapsed else 0,
+        "stages":    stages
+    }
@@ -0,0 +1,189 @@
+from .constants import *
+from .misc import replace_special_chars, Overlay
+from .fuzzy import edits, edit_distance
+import copy, bisect
+
+
+# non-finite forms stored as-is from the card, which don't map to a tense/person slot
+_NONFINITE_FIELDS = ("gerund", "participle")
+
+# English card fields, in the order to explain them by when a form is in several (e.g. 'walk')
+ENG_FIELD_NAMES = (
+    ("eng-3",         "3rd person singular present form"),
+    ("eng-1",         "1st person present form"),
+    ("eng-p",         "plural present form"),
+    ("eng-past",      "past form"),
+    ("eng-past-perf", "past participle"),
+    ("eng-gerund",    "gerund"),
+    ("eng-inf",       "infinitive")
+)
+
+
+def describe(entry):
+    '''Describe index entry in readable form.
+    Params:
+        entry (tuple): Index entry as (infinitive, tense, person, singular).
+    Returns:
+        String description, e.g. "present 1st person singular of 'fazer'".
+    '''
+    inf, tense, person, singular = entry
+    if tense is None:
+        return "non-finite form of '{0}'".format(inf)
+    tense_name = TENSE_NAMES[tense].lower().replace("_", " ")
+    if tense == TENSE.INFINITIVE:
+        return "infinitive of '{0}'".format(inf)
+    return "{0} {1} person {2} of '{3}'".format(
+        tense_name,
+        ("1st", "2nd", "3rd")[person-1],
+        "singular" if singular else "plural",
+        inf
+    )
+
+
+class FormIndex:
+    '''
+    Reverse index of Portuguese verb forms to the slots they fill. Built from every conjugated form on each
+    card, including compound continuous (estar + gerund) and simple future (ir + infinitive) forms. Forms are
+    keyed with special characters replaced, so lookups match the same way answers are checked.
+
+    Params:
+        cardbank (CardBank): Card bank to index.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        forms (dict): Dictionary of index entries (as tuple[tuple]) by folded form. Each entry is a tuple of
+            (infinitive, tense, person, singular). Gerund and participle forms have tense, person, and
+            singular values of None. An `Overlay` once updated.
+        sorted_forms (list[str]): Folded forms in sorted order, for prefix queries.
+        alphabet (str): Characters used in folded forms, for near-match searches. See `search()`.
+    '''
+
+    def __init__(self, cardbank):
+        forms = {}
+        for card in cardbank:
+            for entry, form in self.card_forms(cardbank, card):
+                key = replace_special_chars(form.strip().lower())
+                if key not in forms:
+                    forms[key] = [entry]
+                elif entry not in forms[key]:
+                    forms[key].append(entry)
+        self.forms = {key: tuple(entries) for key, entries in forms.items()}
+        self.sorted_forms = sorted(self.forms)
+        self.alphabet = "".join(sorted(set("".join(self.sorted_forms))))
+
+    def __len__(self):
+        return len(self.forms)
+
+    def __contains__(self, form):
+        return replace_special_chars(form.strip().lower()) in self.forms
+
+    @staticmethod
+    def card_forms(cardbank, card):
+        '''Generate all (entry, form) pairs for a card.
+        Params:
+            cardbank (CardBank): Card bank card is from.
+            card (dict): Word card.
+        '''
+        for field in _NONFINITE_FIELDS:
+            if card.get(field) and card[field] != "-":
+                yield (card["inf"], None, None, None), card[field]
+        for tense in TENSE_VALUES:
+            for singular in (True, False):
+                for person in PERSON_VALUES:
+                    # invalid forms raise, e.g. 1st person singular imperative or imperative of 'poder'
+                    try:
+                        verbs = cardbank.get_portuguese_verb(card, person=person, singular=singular, tense=tense)
+                    except Exception:
+                        continue
+                    for form in verbs:
+                        if form and form != "-":
+                            yield (card["inf"], tense, person, singular), form
+                    # infinitive has no person or number
+                    if tense == TENSE.INFINITIVE:
+                        break
+                if tense == TENSE.INFINITIVE:
+                    break
+
+    def updated(self, removed, added):
+        '''Get copy of index with some (entry, form) pairs removed and others added, e.g. for cards changed 
+        on reload (see `card_forms()`). The copy shares unchanged entries with this index (see `misc.Overlay`), 
+        so costs as much as the pairs changed, apart from copying the sorted form list (references only, 
+        which is quick even for large banks). This index is left unchanged.
+        Params:
+            removed (iterable): Iterable of (entry, form) pairs to remove.
+            added (iterable): Iterable of (entry, form) pairs to add.
+        Returns:
+            New FormIndex instance.
+        '''
+        index = copy.copy(self)
+        index.forms = forms = Overlay(self.forms)
+        index.sorted_forms = sorted_forms = list(self.sorted_forms)
+        for entry, form in removed:
+            key = replace_special_chars(form.strip().lower())
+            if key not in forms or entry not in forms[key]:
+                continue
+            entries = tuple(existing for existing in forms[key] if existing != entry)
+            if entries:
+                forms[key] = entries
+            else:
+                del forms[key]
+                del sorted_forms[bisect.bisect_left(sorted_forms, key)]
+        for entry, form in added:
+            key = replace_special_chars(form.strip().lower())
+            if key not in forms:
+                forms[key] = (entry,)
+                bisect.insort(sorted_forms, key)
+                if not set(key) <= set(index.alphabet):
+                    index.alphabet = "".join(sorted(set(index.alphabet + key)))
+            elif entry not in forms[key]:
+                forms[key] += (entry,)
+        return index
+
+    def lookup(self, form):
+        '''Find slots a verb form fills.
+        Params:
+            form (str): Verb form to search for. Special characters and case are ignored.
+        Returns:
+            Tuple of entries as (infinitive, tense, person, singular). Empty if not found.
+        '''
+        return self.forms.get(replace_special_chars(form.strip().lower()), tuple())
+
+    def search(self, query, max_distance=1):
+        '''Find verb forms within edit distance of query, by looking up every string that close to it. Needs no 
+        near-match index (see `fuzzy.FuzzyIndex`, which is slow to build for large banks), but is only quick 
+        for small distances.
+        Params:
+            query (str): Verb form to search for. Special characters and case are ignored.
+            max_distance (int, optional): Max edit distance. Defaults to 1.
+        Returns:
+            List of (distance, form, entries) tuples, sorted by distance then form, same as 
+            `FuzzyIndex.search()`.
+        '''
+        query = replace_special_chars(query.strip().lower())
+        found = []
+        for variant in edits(query, self.alphabet, max_distance):
+            if variant in self.forms:
+                distance = edit_distance(query, variant, max_distance)
+                if distance <= max_distance:
+                    found.append((distance, variant, self.forms[variant]))
+        found.sort(key=lambda match: (match[0], match[1]))
+        return found
+
+    def prefix(self, prefix, limit=20):
+        '''Find verb forms starting with prefix.
+        Params:
+            prefix (str): Start of verb form. Special characters and case are ignored.
+            limit (int, optional): Max number of forms to return. Defaults to 20.
+        Returns:
+            List of (form, entries) tuples, in alphabetical order of folded form.
+        '''
+        prefix = replace_special_chars(prefix.strip().lower())
+        found = []
+        i = bisect.bisect_left(self.sorted_forms, prefix)
+        while i < len(self.sorted_forms) and len(found) < limit:
+            form = self.sorted_forms[i]
+            if not form.startswith(prefix):
+                break
+            found.append((form, self.forms[form]))
+            i += 1
+        return found
@@ -1,13 +1,13 @@
-import random
-from .constants import SPECIAL_CHARS
+import random, collections.abc
+from .constants import SPECIAL_CHARS, HINT_RULE_NAMES
 
 
-def pick_one(from_list):
+def pick_one(from_list, rng=random):
     if isinstance(from_list, str):
         return from_list
     elif len(from_list) == 1:
         return from_list[0]
-    return random.choice(from_list)
+    return rng.choice(from_list)
 
 
 def compare(answer, guess):
@@ -36,3 +36,99 @@ def replace_special_chars(in_str):
     for special, replace in SPECIAL_CHARS.items():
         in_str = in_str.replace(special, replace)
     return in_str
+
+
+def compile_hint_rules(hint_rules):
+    '''Compile hint rules (e.g. ("from-eng", "first-def")) into bitmask of `constants.HINT_RULE` flags.'''
+    mask = 0
+    for rule in hint_rules:
+        mask |= HINT_RULE_NAMES.get(rule, 0)
+    return mask
+
+
+# marks key removed from base in `Overlay` changes
+_DELETED = object()
+
+
+class Overlay(collections.abc.MutableMapping):
+    '''
+    Dictionary made of a base dictionary, shared and never modified, and the changes made on top of it. Copying 
+    an overlay (by creating one from it) copies only its changes, so an updated copy of a large dictionary 
+    costs as much as the changes rather than the whole dictionary. Once changes grow past a fraction of the 
+    base, a copy merges them into a new base, so lookups stay one or two dictionary lookups.
+
+    Params:
+        base (dict|Overlay): Dictionary to start from (shared, not copied), or overlay to copy.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        base (dict): Shared base dictionary.
+        changes (dict): Values set since base, by key, or a marker for keys removed.
+        size (int): Number of keys.
+    '''
+
+    # changes merged into new base once more than this fraction of base size
+    MERGE_FRACTION = 0.125
+
+    def __init__(self, base):
+        if not isinstance(base, Overlay):
+            self.base = base
+            self.changes = {}
+            self.size = len(base)
+        elif len(base.changes) > max(1, base.MERGE_FRACTION*len(base.base)):
+            self.base = dict(base.base)
+            for key, value in base.changes.items():
+                if value is _DELETED:
+                    del self.base[key]
+                else:
+                    self.base[key] = value
+            self.changes = {}
+            self.size = len(self.base)
+        else:
+            self.base = base.base
+            self.changes = dict(base.changes)
+            self.size = base.size
+
+    def __getitem__(self, key):
+        if key in self.changes:
+            value = self.changes[key]
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+        return self.base[key]
+
+    def get(self, key, default=None):
+        value = self.changes.get(key, self)
+        if value is self:
+            return self.base.get(key, default)
+        return default if value is _DELETED else value
+
+    def __contains__(self, key):
+        if key in self.changes:
+            return self.changes[key] is not _DELETED
+        return key in self.base
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self.size += 1
+        self.changes[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.size -= 1
+        if key in self.base:
+            self.changes[key] = _DELETED
+        else:
+            del self.changes[key]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for key in self.base:
+            if key not in self.changes:
+                yield key
+        for key, value in self.changes.items():
+            if value is not _DELETED:
+                yield key
@@ -0,0 +1,196 @@
+from .constants import BUILT_FIELDS, SUPPLIED_FIELDS, FIELDS
+from . import builder
+import csv, time, queue, threading
+
+
+# passed down queues after last job, once for each worker of next stage
+_STOP = None
+
+
+class _Job:
+    '''Card moving through pipeline.'''
+
+    def __init__(self, seq, card, action):
+        self.seq = seq
+        self.card = card
+        # "keep" (unchanged), "update" (supplied fields only), or "build"
+        self.action = action
+        self.answered = True
+        self.raw = None
+        self.tense_map = None
+        self.error = None
+
+
+def plan(card_bank_basic, existing, force_rebuild=()):
+    '''Decide what to do for each card, same as `build_card_bank.build_from_difference()`: keep existing built
+    card, update its supplied fields only, or build it.
+    Params:
+        card_bank_basic (iterable[dict]): Basic cards (may be streamed from CSV).
+        existing (dict): Existing built cards by infinitive, as card dicts or functions returning them (so rows
+            can be parsed only when needed).
+        force_rebuild (list[str], optional): Infinitives to rebuild even if unchanged.
+    Yields:
+        Tuples of action (str) and card (dict).
+    '''
+    for card in card_bank_basic:
+        if card["inf"] in force_rebuild or card["inf"] not in existing:
+            yield "build", card
+            continue
+        existing_card = existing[card["inf"]]
+        existing_card = existing_card() if callable(existing_card) else existing_card
+        # if any built fields missing, something's wrong, rebuild it entirely
+        if any(not existing_card.get(field) for field in BUILT_FIELDS):
+            yield "build", card
+            continue
+        # otherwise just update the supplied fields, which doesn't affect build fields
+        update = False
+        for field in SUPPLIED_FIELDS:
+            if existing_card.get(field) != card[field]:
+                update = True
+                existing_card[field] = card[field]
+        yield ("update" if update else "keep"), existing_card
+
+
+class BuildPipeline:
+    '''
+    Card bank build as a streaming pipeline of stages, each with its own worker threads, connected by bounded
+    queues: plan -> fetch (page requests and rendering) -> parse -> build -> write. Slow fetches overlap with
+    each other and with parsing, and only cards in the pipeline are held in memory. Cards are written in the
+    same order as planned, as soon as all cards before them are written.
+
+    Params:
+        source (ConjugationSource): Conjugation source (see sources.py). Sources which answer in two steps
+            (e.g. the website scraper) are parsed in the parse stage, others answer in the fetch stage.
+        fetch_workers (int, optional): Number of fetches at once. Best matched to browser pool size.
+        parse_workers (int, optional): Number of parse threads.
+        queue_size (int, optional): Max cards waiting between each pair of stages.
+        window (int, optional): Max cards in pipeline at once (including done but waiting for earlier cards to
+            be written). Defaults to 4x queue size.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        stage_time (dict): Total time spent working in each stage (summed across workers), by stage name.
+        stage_count (dict): Number of cards worked on by each stage, by stage name.
+    '''
+
+    def __init__(self, source, fetch_workers=4, parse_workers=2, queue_size=32, window=None):
+        self.source = source
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.window = window or 4*queue_size
+        self.lock = threading.Lock()
+        self.stage_time = {}
+        self.stage_count = {}
+        self.error = None
+
+    def _fetch(self, job):
+        job.answered, result = self.source.get_raw(job.card["inf"])
+        if job.answered:
+            job.tense_map = result
+        else:
+            job.raw = result
+
+    def _parse(self, job):
+        if not job.answered:
+            job.tense_map = self.source.parse_raw(job.card["inf"], job.raw)
+            job.raw = None
+
+    def _build(self, job):
+        if isinstance(job.tense_map, Warning):
+            job.error = str(job.tense_map)
+        else:
+            builder.build(job.card, job.tense_map)
+        job.tense_map = None
+
+    def _worker(self, name, work, in_queue, out_queue):
+        while True:
+            job = in_queue.get()
+            if job is _STOP:
+                return
+            # only cards to build have work, errored cards pass through to be reported in order
+            if job.action == "build" and job.error is None:
+                start = time.perf_counter()
+                try:
+                    work(job)
+                except Exception as e:
+                    job.error = "{0}: {1}".format(type(e).__name__, e)
+                with self.lock:
+                    self.stage_time[name] = self.stage_time.get(name, 0) + time.perf_counter() - start
+                    self.stage_count[name] = self.stage_count.get(name, 0) + 1
+            out_queue.put(job)
+
+    def _stage(self, name, work, workers, in_queue, out_queue, next_workers):
+        '''Start stage worker threads, and thread to pass on stop once all are done.'''
+        threads = [
+            threading.Thread(target=self._worker, args=(name, work, in_queue, out_queue), daemon=True)
+            for _ in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        def finish():
+            for thread in threads:
+                thread.join()
+            for _ in range(next_workers):
+                out_queue.put(_STOP)
+        threading.Thread(target=finish, daemon=True).start()
+
+    def _plan(self, planned, slots, out_queue, next_workers):
+        try:
+            for seq, (action, card) in enumerate(planned):
+                slots.acquire()
+                out_queue.put(_Job(seq, card, action))
+        except Exception as e:
+            # raised once pipeline drains
+            self.error = e
+        finally:
+            for _ in range(next_workers):
+                out_queue.put(_STOP)
+
+    def run(self, planned, outf):
+        '''Run pipeline, writing built card bank CSV as cards complete.
+        Params:
+            planned (iterable[tuple]): Planned actions and cards. See `plan()`.
+            outf (file): File to write CSV to (opened with newline="").
+        Returns:
+            Tuple of infinitives of new/rebuilt cards (list[str]), infinitives of updated cards (list[str]), and
+            errored cards (list of (infinitive, message) tuples). Errored cards aren't written.
+        '''
+        fetch_queue = queue.Queue(self.queue_size)
+        parse_queue = queue.Queue(self.queue_size)
+        build_queue = queue.Queue(self.queue_size)
+        write_queue = queue.Queue(self.queue_size)
+        slots = threading.Semaphore(self.window)
+        self._stage("fetch", self._fetch, self.fetch_workers, fetch_queue, parse_queue, self.parse_workers)
+        self._stage("parse", self._parse, self.parse_workers, parse_queue, build_queue, 1)
+        self._stage("build", self._build, 1, build_queue, write_queue, 1)
+        threading.Thread(
+            target=self._plan, args=(planned, slots, fetch_queue, self.fetch_workers), daemon=True
+        ).start()
+
+        writer = csv.DictWriter(outf, fieldnames=FIELDS)
+        writer.writeheader()
+        built, updated, errored = [], [], []
+        # jobs finished out of order, waiting for earlier ones
+        waiting = {}
+        next_seq = 0
+        while True:
+            job = write_queue.get()
+            if job is _STOP:
+                break
+            waiting[job.seq] = job
+            while next_seq in waiting:
+                job = waiting.pop(next_seq)
+                next_seq += 1
+                if job.error is not None:
+                    errored.append((job.card["inf"], job.error))
+                else:
+                    writer.writerow(job.card)
+                    if job.action == "build":
+                        built.append(job.card["inf"])
+                    elif job.action == "update":
+                        updated.append(job.card["inf"])
+                slots.release()
+        if self.error:
+            raise self.error
+        return built, updated, errored
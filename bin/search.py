@@ -0,0 +1,199 @@
+from .constants import ENG_FIELDS
+from .fuzzy import FuzzyIndex, fold
+from .misc import Overlay
+import re, copy, bisect
+
+
+# words too common in English definitions to be worth indexing
+STOP_WORDS = ("to", "a", "an", "the")
+
+_SPLIT_PATTERN = re.compile(r"[^\w']+")
+
+
+def tokenize(text):
+    '''Split text into folded word tokens, dropping stop words.'''
+    return [token for token in _SPLIT_PATTERN.split(fold(text)) if token and token not in STOP_WORDS]
+
+
+class GlossIndex:
+    '''
+    Inverted index of English definition tokens and Portuguese infinitives to cards, for dictionary-style
+    searches of the card bank. Prefix searches use sorted token lists and fuzzy searches use a deletion-
+    neighborhood index, so no search scans the whole bank.
+
+    Params:
+        cardbank (CardBank): Card bank to index.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        postings (dict): Dictionary of Portuguese infinitives (as tuple[str]) by English token. An `Overlay` 
+            once updated.
+        infinitives (dict): Dictionary of Portuguese infinitives by folded infinitive. An `Overlay` once 
+            updated.
+        sorted_tokens (list[str]): English tokens in sorted order.
+        sorted_infinitives (list[str]): Folded infinitives in sorted order.
+        fuzzy_index (FuzzyIndex): Near-match index over English tokens and folded infinitives.
+    '''
+
+    def __init__(self, cardbank):
+        postings = {}
+        self.infinitives = {}
+        for card in cardbank:
+            self.infinitives[fold(card["inf"])] = card["inf"]
+            for field in ENG_FIELDS:
+                for form in card[field]:
+                    for token in tokenize(form):
+                        if token not in postings:
+                            postings[token] = [card["inf"]]
+                        elif card["inf"] not in postings[token]:
+                            postings[token].append(card["inf"])
+        self.postings = {token: tuple(infs) for token, infs in postings.items()}
+        self.sorted_tokens = sorted(self.postings)
+        self.sorted_infinitives = sorted(self.infinitives)
+        self.fuzzy_index = FuzzyIndex(
+            [(token, ("english", token)) for token in self.postings] +
+            [(key, ("portuguese", inf)) for key, inf in self.infinitives.items()]
+        )
+
+    def updated(self, removed, added):
+        '''Get copy of index with some cards removed and others added, e.g. for cards changed on reload. The 
+        copy shares unchanged entries with this index (see `misc.Overlay`), so costs as much as the cards 
+        changed, apart from copying the sorted token and infinitive lists (references only). This index is 
+        left unchanged.
+        Params:
+            removed (list[dict]): Cards to remove.
+            added (list[dict]): Cards to add.
+        Returns:
+            New GlossIndex instance.
+        '''
+        index = copy.copy(self)
+        index.postings = postings = Overlay(self.postings)
+        index.infinitives = infinitives = Overlay(self.infinitives)
+        index.sorted_tokens = sorted_tokens = list(self.sorted_tokens)
+        index.sorted_infinitives = sorted_infinitives = list(self.sorted_infinitives)
+        fuzzy_removed = []
+        fuzzy_added = []
+        for card in removed:
+            key = fold(card["inf"])
+            if infinitives.get(key) == card["inf"]:
+                del infinitives[key]
+                del sorted_infinitives[bisect.bisect_left(sorted_infinitives, key)]
+                fuzzy_removed.append((key, ("portuguese", card["inf"])))
+            for token in self._card_tokens(card):
+                if card["inf"] not in postings.get(token, tuple()):
+                    continue
+                infs = tuple(inf for inf in postings[token] if inf != card["inf"])
+                if infs:
+                    postings[token] = infs
+                else:
+                    del postings[token]
+                    del sorted_tokens[bisect.bisect_left(sorted_tokens, token)]
+                    fuzzy_removed.append((token, ("english", token)))
+        for card in added:
+            key = fold(card["inf"])
+            if key not in infinitives:
+                bisect.insort(sorted_infinitives, key)
+                fuzzy_added.append((key, ("portuguese", card["inf"])))
+            infinitives[key] = card["inf"]
+            for token in self._card_tokens(card):
+                if token not in postings:
+                    postings[token] = (card["inf"],)
+                    bisect.insort(sorted_tokens, token)
+                    fuzzy_added.append((token, ("english", token)))
+                elif card["inf"] not in postings[token]:
+                    postings[token] += (card["inf"],)
+        index.fuzzy_index = self.fuzzy_index.updated(fuzzy_removed, fuzzy_added)
+        return index
+
+    @staticmethod
+    def _card_tokens(card):
+        '''Get English definition tokens of card (no repeats).'''
+        tokens = []
+        for field in ENG_FIELDS:
+            for form in card[field]:
+                for token in tokenize(form):
+                    if token not in tokens:
+                        tokens.append(token)
+        return tokens
+
+    def search(self, query):
+        '''Find Portuguese infinitives with English definitions matching query.
+        Params:
+            query (str): English words to search for, e.g. "to make".
+        Returns:
+            List of Portuguese infinitives, ordered by number of query words matched (then by bank order).
+        '''
+        counts = {}
+        for token in tokenize(query):
+            for inf in self.postings.get(token, tuple()):
+                counts[inf] = counts.get(inf, 0) + 1
+        return sorted(counts, key=lambda inf: -counts[inf])
+
+    def prefix(self, prefix, limit=20):
+        '''Find Portuguese infinitives, or infinitives with English definition words, starting with prefix.
+        Params:
+            prefix (str): Start of English word or Portuguese infinitive.
+            limit (int, optional): Max number of infinitives to return. Defaults to 20.
+        Returns:
+            List of Portuguese infinitives, with Portuguese matches first.
+        '''
+        prefix = fold(prefix)
+        found = []
+        i = bisect.bisect_left(self.sorted_infinitives, prefix)
+        while i < len(self.sorted_infinitives) and len(found) < limit:
+            if not self.sorted_infinitives[i].startswith(prefix):
+                break
+            found.append(self.infinitives[self.sorted_infinitives[i]])
+            i += 1
+        i = bisect.bisect_left(self.sorted_tokens, prefix)
+        while i < len(self.sorted_tokens) and len(found) < limit:
+            if not self.sorted_tokens[i].startswith(prefix):
+                break
+            for inf in self.postings[self.sorted_tokens[i]]:
+                if inf not in found and len(found) < limit:
+                    found.append(inf)
+            i += 1
+        return found
+
+    def fuzzy(self, word, max_distance=1):
+        '''Find Portuguese infinitives, or infinitives with English definition words, close to word.
+        Params:
+            word (str): Misspelled English word or Portuguese infinitive.
+            max_distance (int, optional): Max edit distance. Defaults to 1.
+        Returns:
+            List of Portuguese infinitives, closest first and Portuguese matches before English at the same
+            distance.
+        '''
+        found = []
+        matches = self.fuzzy_index.search(word, max_distance=max_distance)
+        for language in ("portuguese", "english"):
+            for distance in range(max_distance+1):
+                for match_distance, key, values in matches:
+                    if match_distance != distance:
+                        continue
+                    for match_language, value in values:
+                        if match_language != language:
+                            continue
+                        infs = (value,) if language == "portuguese" else self.postings[value]
+                        for inf in infs:
+                            if inf not in found:
+                                found.append(inf)
+            # always prefer Portuguese matches for a single word
+            if found:
+                break
+        return found
+
+    def suggest(self, word, limit=5):
+        '''Suggest Portuguese infinitives for an unrecognized word, trying exact English matches, then near
+        matches, then prefix matches.
+        Params:
+            word (str): Unrecognized word (either a misspelled infinitive or an English definition).
+            limit (int, optional): Max number of suggestions. Defaults to 5.
+        Returns:
+            List of Portuguese infinitives.
+        '''
+        for finder in (self.search, self.fuzzy, self.prefix):
+            found = finder(word)
+            if found:
+                return found[:limit]
+        return []
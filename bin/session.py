@@ -0,0 +1,450 @@
+from .constants import *
+from . import tester
+import os, json, math, random
+
+
+DEFAULT_CHECKPOINT = "bank/session.json"
+
+# serialization format version, bumped on incompatible changes
+_VERSION = 1
+
+
+def select_cards(cardbank, num_words, rng=random, tense_group=None, weights=None):
+    '''Pick random words to test, with similars of earlier words added at the end to test common mix-ups.
+    Params:
+        cardbank (CardBank): CardBank instance.
+        num_words (int): Number of words.
+        rng (random.Random, optional): Random generator to use. Defaults to the `random` module.
+        tense_group (tuple[constants.TENSE], optional): Tenses tested, if limited. See
+            `tester.get_tense_group()`.
+        weights (analytics.AdaptiveWeights, optional): If supplied, picks words weighted by past errors
+            instead of uniformly.
+    Returns:
+        List of cards, shuffled.
+    '''
+    num_cards = len(cardbank)
+    all_card_indices = range(0, num_cards)
+    if weights:
+        test_card_indices = weights.sample_cards(num_words, rng=rng)
+    else:
+        test_card_indices = rng.sample(all_card_indices, k=num_words)
+
+    test_cards = []
+    test_infs = []
+    similars = []
+    start_similars_at = math.ceil(num_words*0.85)-1
+    for n, i in enumerate(test_card_indices):
+        card = None
+        # add a few similars in the end, if applicable
+        if n >= start_similars_at and len(similars):
+            group = None
+            while len(similars) and (not group or not len(group)):
+                # pop off earliest group, clean up redundants
+                group = [inf for inf in similars.pop(0) if inf not in test_infs]
+            if group and len(group):
+                card = cardbank[rng.choice(group)]
+        # if no similars, add from random list, add its similars
+        if not card:
+            card = cardbank[i]
+            # special case to exclude (pick random replacement)
+            if tense_group == TENSE_GROUPS.INFINITIVE and card["inf"] == "poder":
+                card = None
+                ibreak = 100
+                while not card and ibreak > 0:
+                    i = rng.choice(all_card_indices)
+                    ibreak -= 1
+                    if i not in test_card_indices and cardbank[i]["inf"] not in test_infs:
+                        card = cardbank[i]
+            if "similars" in card and len(card["similars"]):
+                similars.append(card["similars"])
+        test_cards.append(card)
+        test_infs.append(card["inf"])
+
+    rng.shuffle(test_cards)
+    return test_cards
+
+
+def _encode_params(params):
+    encoded = [params["tense"], params["person"], int(params["singular"])]
+    if "to_english" in params:
+        encoded.append(int(params["to_english"]))
+    return encoded
+
+
+def _decode_params(encoded):
+    params = {"tense": encoded[0], "person": encoded[1], "singular": bool(encoded[2])}
+    if len(encoded) > 3:
+        params["to_english"] = bool(encoded[3])
+    return params
+
+
+class Session:
+    '''
+    Test session as a state machine, stepping through the same rules as an interactive session: questions for
+    each word, then a retest section for words with wrong answers. Call `next_question()` for the question,
+    then `submit()` the guess (or `record()` the result of asking it). `next_question()` returns None when the
+    test section is over, after which `start_retest()` starts the retest section.
+
+    Only infinitives and form parameters are kept, so sessions are small, and can be serialized (see
+    `to_dict()`) to checkpoint and resume. Random choices are seeded per question from the session seed, so a
+    resumed session asks the same question it was on.
+
+    Params:
+        cardbank (CardBank): CardBank instance.
+        words (list[str|dict]): Infinitives (or cards) to test, in order.
+        num_questions (int, optional): Questions per word (not including retest section). Defaults to 3.
+        tense_group (tuple[constants.TENSE], optional): If supplied, limits questions to these tenses.
+        seed (int, optional): Random seed. Defaults to random.
+        weights (analytics.AdaptiveWeights, optional): If supplied, tenses are weighted by past errors for each
+            word. Not serialized (supply again on resume).
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        phase (str): "test" or "retest".
+        word (int): Index of current word in section.
+        tally (dict): Counts of "total", "correct", "wrong", "timed_out" answers and "time" taken (seconds) in
+            test section.
+        timings (list[dict]): Form parameters and time taken ("tense", "person", "singular", "time") for each
+            answer in test section.
+        redo (list): Words to retest, as lists of infinitive and wrong parameters (list[dict]).
+    '''
+
+    def __init__(self, cardbank, words, num_questions=3, tense_group=None, seed=None, weights=None):
+        self.cardbank = cardbank
+        self.weights = weights
+        self.words = [word if isinstance(word, str) else word["inf"] for word in words]
+        self.num_questions = num_questions
+        self.tense_group = tuple(tense_group) if tense_group else None
+        self.default_exclude_tenses = []
+        if tense_group:
+            self.default_exclude_tenses = [tense for tense in TENSE_VALUES if tense not in tense_group]
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        # questions drawn so far, to seed each question
+        self.count = 0
+        self.phase = "test"
+        self.word = 0
+        # questions answered for current word
+        self.asked = 0
+        self.tally = {"total": 0, "correct": 0, "wrong": 0, "timed_out": 0, "time": 0}
+        self.timings = []
+        self.redo = []
+        # current word state
+        self.to_english = False
+        self.exclude_tenses = []
+        self.tested = []
+        self.wrong = []
+        self.new_incorrect = []
+        self.streak = 0
+        self.correct = 0
+        # drawn question not yet answered, as (params, to_english, was_retest), and its prepared verbs/prompt
+        self.pending = None
+        self._prepared = None
+
+    @classmethod
+    def new(cls, cardbank, num_words=None, words=None, num_questions=3, tense_group=None, seed=None, weights=None):
+        '''Start new session, either for given words or randomly selected ones (see `select_cards()`).
+        Params:
+            cardbank (CardBank): CardBank instance.
+            num_words (int, optional): Number of random words. Required if words not given.
+            words (list[str], optional): Infinitives to test (shuffled).
+            num_questions (int, optional): Questions per word. Defaults to 3.
+            tense_group (tuple[constants.TENSE], optional): If supplied, limits questions to these tenses.
+            seed (int, optional): Random seed. Same seed and options always give the same session.
+            weights (analytics.AdaptiveWeights, optional): If supplied, words and tenses are picked weighted
+                by past errors.
+        Returns:
+            Session instance.
+        '''
+        seed = seed if seed is not None else random.getrandbits(32)
+        rng = random.Random(seed)
+        if words is not None:
+            cards = list(words)
+            rng.shuffle(cards)
+        else:
+            cards = select_cards(cardbank, num_words, rng=rng, tense_group=tense_group, weights=weights)
+        return cls(cardbank, cards, num_questions=num_questions, tense_group=tense_group, seed=seed, weights=weights)
+
+    def _rng(self, salt=""):
+        return random.Random("{0}:{1}{2}".format(self.seed, self.count, salt))
+
+    @property
+    def num_words(self):
+        '''Number of words in current section.'''
+        return len(self.words) if self.phase == "test" else len(self.redo)
+
+    def _tense_weights(self, card):
+        return self.weights.tense_weights(card["inf"]) if self.weights else None
+
+    def _card(self):
+        inf = self.words[self.word] if self.phase == "test" else self.redo[self.word][0]
+        return self.cardbank[inf]
+
+    def draw(self):
+        '''Pick form parameters for next question, without preparing it (see `next_question()`). Until 
+        answered, returns the same parameters.
+        Returns:
+            Tuple of params dict (see `tester.get_params()`) and to-English (bool), or None if section is over.
+        '''
+        if self.word >= self.num_words:
+            return None
+        if self.pending is None:
+            card = self._card()
+            self.pending = self._draw_test(card) if self.phase == "test" else self._draw_retest(card)
+        return self.pending[:2]
+
+    def next_question(self):
+        '''Get next question, drawing its parameters first if not yet drawn (see `draw()`). Until answered, 
+        returns the same question.
+        Returns:
+            Question dict, or None if section is over.
+            - word (int): Index of word in section.
+            - first (bool): True if first question for this word.
+            - retest (bool): True if in retest section.
+            - card (dict): Word/card definition.
+            - params (dict): Verb form parameters. See `tester.random_parameters()`.
+            - to_english (bool): True if Portuguese-to-English question.
+            - verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+            - prompt (dict): Prompt dict. See `tester.english_to_portuguese_prompt()`.
+        '''
+        if self.draw() is None:
+            return None
+        card = self._card()
+        params, to_english, was_retest = self.pending
+        if self._prepared is None:
+            self._prepared = tester.prepare_question(self.cardbank, card, params, to_english, rng=self._rng("q"))
+        verbs, prompt = self._prepared
+        return {
+            "word":       self.word,
+            "first":      self.asked == 0,
+            "retest":     self.phase == "retest",
+            "card":       card,
+            "params":     params,
+            "to_english": to_english,
+            "verbs":      verbs,
+            "prompt":     prompt
+        }
+
+    def _draw_test(self, card):
+        rng = self._rng()
+        if self.asked == 0:
+            # first may or may not be to-english, unless more than 2 questions, then always start to-english
+            self.to_english = True if self.num_questions > 2 else bool(rng.getrandbits(1))
+            self.exclude_tenses = tester.get_exclude_tenses(card, self.default_exclude_tenses)
+            self.tested = []
+            self.wrong = []
+        elif self.num_questions > 3:
+            # if more than 3 questions, can test to-english again, otherwise never
+            self.to_english = bool(rng.getrandbits(1))
+        else:
+            self.to_english = False
+        # make sure we're not excluding everything..
+        if len(self.exclude_tenses) == len(TENSE_VALUES):
+            self.exclude_tenses = self.default_exclude_tenses[:]
+        params = tester.get_params(
+            no_repeats=self.tested, exclude_tenses=self.exclude_tenses, rng=rng, tense_weights=self._tense_weights(card)
+        )
+        return params, self.to_english, False
+
+    def _draw_retest(self, card):
+        if self.asked == 0:
+            self.tested = []
+            self.exclude_tenses = tester.get_exclude_tenses(card, self.default_exclude_tenses[:])
+            self.wrong = list(self.redo[self.word][1])
+            self.new_incorrect = []
+            self.streak = 2
+            self.correct = 3
+        if len(self.exclude_tenses) == len(TENSE_VALUES):
+            self.exclude_tenses = self.default_exclude_tenses[:]
+        if len(self.wrong):
+            # start with wrong parameters from original test
+            params = self.wrong.pop(0)
+            return params, params.get("to_english", False), False
+        if self.correct <= 0 and self.streak <= len(self.new_incorrect):
+            # if nearing break conditions, retest new incorrects from this retest
+            return self.new_incorrect.pop(0), False, True
+        params = tester.get_params(
+            no_repeats=self.tested, exclude_tenses=self.exclude_tenses, rng=self._rng(),
+            tense_weights=self._tense_weights(card)
+        )
+        return params, False, False
+
+    def submit(self, guess, seconds=0):
+        '''Grade guess for current question (without asking anything) and move on.
+        Params:
+            guess (str): Guess (stripped and lowercased).
+            seconds (float, optional): Time taken to answer.
+        Returns:
+            Results dict. See `record()`.
+        '''
+        question = self.next_question()
+        if question is None:
+            raise Exception("No question to answer.")
+        result = tester.grade(question["verbs"], guess, question["to_english"])
+        result["time"] = seconds
+        result["timed_out"] = False
+        return self.record(result)
+
+    def record(self, result):
+        '''Record result of current question (e.g. asked with `tester.ask_question()`) and move on.
+        Params:
+            result (dict): Results dict. See `tester.english_to_portuguese()`.
+        Returns:
+            Same results dict, with "word_done" (bool) added, True if that was the last question for the word.
+        '''
+        if self.pending is None:
+            raise Exception("No question to answer.")
+        params, to_english, was_retest = self.pending
+        self.pending = None
+        self._prepared = None
+        self.count += 1
+        self.asked += 1
+        # because test may change params, if they don't make sense, use latest
+        params["tense"] = result["tense"]
+        params["person"] = result["person"]
+        params["singular"] = result["singular"]
+        if self.phase == "test":
+            word_done = self._record_test(params, to_english, result)
+        else:
+            word_done = self._record_retest(params, to_english, was_retest, result)
+        if word_done:
+            self.word += 1
+            self.asked = 0
+        result["word_done"] = word_done
+        return result
+
+    def _record_test(self, params, to_english, result):
+        self.tested.append(params)
+        self.tally["total"] += 1
+        self.tally["time"] += result.get("time", 0)
+        self.timings.append({
+            "tense":    params["tense"],
+            "person":   params["person"],
+            "singular": params["singular"],
+            "time":     result.get("time", 0)
+        })
+        if result.get("timed_out"):
+            self.tally["timed_out"] += 1
+        if not result["correct"]:
+            self.tally["wrong"] += 1
+            params["to_english"] = to_english
+            self.wrong.append(params)
+        else:
+            self.tally["correct"] += 1
+            # don't retest present-continuous if correctly answered
+            if params["tense"] == TENSE.PRESENT_CONTINUOUS:
+                self.exclude_tenses.append(params["tense"])
+        # don't retest infinitive tense in any case
+        if params["tense"] == TENSE.INFINITIVE:
+            self.exclude_tenses.append(params["tense"])
+        if self.asked < self.num_questions:
+            return False
+        if self.wrong:
+            self.redo.append([self.words[self.word], self.wrong])
+        return True
+
+    def _record_retest(self, params, to_english, was_retest, result):
+        if result["correct"]:
+            self.tested.append(params)
+            # don't retest certain tenses for this word, if correctly solved once
+            if params["tense"] == TENSE.PRESENT_CONTINUOUS or params["tense"] == TENSE.INFINITIVE:
+                self.exclude_tenses.append(params["tense"])
+            # de-increment towards break conditions
+            self.correct -= 1
+            self.streak -= 1
+        else:
+            # add to resting incorrects (with some exceptions)
+            if not to_english and not was_retest:
+                self.new_incorrect.append(params)
+            # if on retests, can end up single streak, otherwise need to end on 2-streak
+            self.streak = 2 if not was_retest else 1
+        # break conditions:
+        # 1. At least 3 correct answers
+        # 2. At least 2 correct in a row
+        # 3. All wrong answers have been retested (minus to-english)
+        return not (self.correct > 0 or self.streak > 0 or len(self.wrong) or len(self.new_incorrect))
+
+    def start_retest(self):
+        '''Start retest section, once test section is over.'''
+        if self.phase != "test" or self.word < len(self.words):
+            raise Exception("Test section not over.")
+        self.phase = "retest"
+        self.word = 0
+        self.asked = 0
+
+    @property
+    def done(self):
+        '''True if retest section is over.'''
+        return self.phase == "retest" and self.word >= len(self.redo)
+
+    def to_dict(self):
+        '''Serialize session to JSON-compatible dict (see `from_dict()`).'''
+        return {
+            "version":     _VERSION,
+            "words":       self.words,
+            "questions":   self.num_questions,
+            "tenses":      list(self.tense_group) if self.tense_group else None,
+            "seed":        self.seed,
+            "count":       self.count,
+            "phase":       self.phase,
+            "word":        self.word,
+            "asked":       self.asked,
+            "tally":       self.tally,
+            "timings":     [
+                [timing["tense"], timing["person"], int(timing["singular"]), round(timing["time"], 3)]
+                for timing in self.timings
+            ],
+            "redo":        [[inf, [_encode_params(params) for params in wrong]] for inf, wrong in self.redo],
+            "to_english":  int(self.to_english),
+            "exclude":     self.exclude_tenses,
+            "tested":      [_encode_params(params) for params in self.tested],
+            "wrong":       [_encode_params(params) for params in self.wrong],
+            "incorrect":   [_encode_params(params) for params in self.new_incorrect],
+            "streak":      self.streak,
+            "correct":     self.correct,
+            "pending":     [
+                _encode_params(self.pending[0]), int(self.pending[1]), int(self.pending[2])
+            ] if self.pending else None
+        }
+
+    @classmethod
+    def from_dict(cls, cardbank, data, weights=None):
+        '''Restore session serialized with `to_dict()`, with adaptive weights if any (see `Session`).'''
+        if data.get("version") != _VERSION:
+            raise Exception("Unsupported session version: {0}".format(data.get("version")))
+        session = cls(cardbank, data["words"], num_questions=data["questions"], tense_group=data["tenses"],
+                      seed=data["seed"], weights=weights)
+        session.count = data["count"]
+        session.phase = data["phase"]
+        session.word = data["word"]
+        session.asked = data["asked"]
+        session.tally = data["tally"]
+        session.timings = [
+            {"tense": tense, "person": person, "singular": bool(singular), "time": seconds}
+            for tense, person, singular, seconds in data["timings"]
+        ]
+        session.redo = [[inf, [_decode_params(params) for params in wrong]] for inf, wrong in data["redo"]]
+        session.to_english = bool(data["to_english"])
+        session.exclude_tenses = data["exclude"]
+        session.tested = [_decode_params(params) for params in data["tested"]]
+        session.wrong = [_decode_params(params) for params in data["wrong"]]
+        session.new_incorrect = [_decode_params(params) for params in data["incorrect"]]
+        session.streak = data["streak"]
+        session.correct = data["correct"]
+        if data["pending"]:
+            params, to_english, was_retest = data["pending"]
+            session.pending = (_decode_params(params), bool(to_english), bool(was_retest))
+        return session
+
+    def save(self, filepath=DEFAULT_CHECKPOINT):
+        '''Save session checkpoint to file.'''
+        # write to temp then rename, so a crash mid-write never leaves a partial checkpoint
+        temp_path = "{0}.{1}.tmp".format(filepath, os.getpid())
+        with open(temp_path, "w", encoding="utf-8") as outf:
+            json.dump(self.to_dict(), outf, separators=(",", ":"))
+        os.replace(temp_path, filepath)
+
+    @classmethod
+    def load(cls, cardbank, filepath=DEFAULT_CHECKPOINT, weights=None):
+        '''Load session checkpoint from file, with adaptive weights if any (see `Session`).'''
+        with open(filepath, "r", encoding="utf-8") as inf:
+            return cls.from_dict(cardbank, json.load(inf), weights=weights)
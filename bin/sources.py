@@ -0,0 +1,530 @@
+from .constants import TENSE, TENSE_NAMES, BUILT_FIELDS
+from . import builder
+from .browser import BrowserPool
+import os, csv, json, time
+
+
+DEFAULT_CACHE_DIR = "bank/sources"
+DEFAULT_DUMP = "bank/conjugations.json"
+DEFAULT_FIXTURES = "bank/fixtures"
+DEFAULT_CHAIN = ("dump", "rules", "scraper")
+
+# persons in tense maps, as named on conjugator website, in order
+_PERSONS = ("eu", "tu", "ele", "nós", "vós", "eles")
+_PERSON_KEYS = ("1s", "2s", "3s", "1p", "2p", "3p")
+_TENSE_KEYS = {
+    TENSE.PRESENT:        "present",
+    TENSE.IMPERFECT:      "imperfect",
+    TENSE.PERFECT:        "perfect",
+    TENSE.FUTURE_FORMAL:  "future",
+    TENSE.FUTURE_COND:    "futcond",
+    TENSE.IMPERATIVE_AFM: "imp1",
+    TENSE.IMPERATIVE_NEG: "imp0"
+}
+_IMPERATIVES = (TENSE.IMPERATIVE_AFM, TENSE.IMPERATIVE_NEG)
+
+
+def from_card(card):
+    '''Get tense map from built card (reverse of `builder.build()`).
+    Params:
+        card (dict): Card as read from built card bank CSV (not built forms, see `cardbank.read()`).
+    Returns:
+        Tense map, or None if card isn't built.
+    '''
+    if any(not card.get(field) for field in BUILT_FIELDS):
+        return None
+    tense_maps = {"gerund": card["gerund"], "participle": card["participle"]}
+    for tense, tense_key in _TENSE_KEYS.items():
+        tense_maps[tense] = {
+            person: card["{0}-{1}".format(tense_key, person_key)]
+            for person, person_key in zip(_PERSONS, _PERSON_KEYS)
+            # 1st person singular imperative doesn't exist
+            if not (tense in _IMPERATIVES and person == "eu")
+        }
+    return tense_maps
+
+
+def encode(result):
+    '''Convert tense map (or Warning) to JSON-serializable form, with tense names as keys.'''
+    if isinstance(result, Warning):
+        return {"warning": str(result)}
+    return {TENSE_NAMES.get(key, key): value for key, value in result.items()}
+
+
+def decode(value):
+    '''Convert tense map (or Warning) back from JSON-serializable form. See `encode()`.'''
+    if "warning" in value:
+        return Warning(value["warning"])
+    return {getattr(TENSE, key) if hasattr(TENSE, key) else key: item for key, item in value.items()}
+
+
+def compare(tense_maps_a, tense_maps_b):
+    '''Compare two tense maps.
+    Returns:
+        List of differences as (tense, person, form a, form b) tuples, with person None for gerund and
+        participle. Empty if the same.
+    '''
+    if isinstance(tense_maps_a, Warning) or isinstance(tense_maps_b, Warning):
+        if isinstance(tense_maps_a, Warning) and isinstance(tense_maps_b, Warning):
+            return []
+        return [(None, None, str(tense_maps_a)[:40], str(tense_maps_b)[:40])]
+    differences = []
+    for key in ("gerund", "participle"):
+        if tense_maps_a.get(key) != tense_maps_b.get(key):
+            differences.append((key, None, tense_maps_a.get(key), tense_maps_b.get(key)))
+    for tense in _TENSE_KEYS:
+        map_a = tense_maps_a.get(tense, {})
+        map_b = tense_maps_b.get(tense, {})
+        for person in _PERSONS:
+            if map_a.get(person) != map_b.get(person):
+                differences.append((tense, person, map_a.get(person), map_b.get(person)))
+    return differences
+
+
+class ConjugationSource:
+    '''
+    Source of verb conjugations (tense maps, as returned by `builder.get()`). Subclasses implement `fetch()`.
+    Results are cached per source, in memory and optionally in a JSON cache file, so each infinitive is only
+    ever fetched once from a source. Only answers are cached (tense maps, or Warning that the infinitive is 
+    invalid); sources raise when they fail (e.g. page not served), so failures are tried again next time.
+
+    Params:
+        cache_file (str, optional): Filepath of JSON cache of results. None to only cache in memory.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        name (str): Source name, as used in `make_chain()`.
+        cache (dict): Cached results by infinitive.
+        changed (bool): Whether cache has results not yet saved.
+    '''
+
+    name = None
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file
+        self.cache = {}
+        self.changed = False
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, "r", encoding="utf-8") as cachef:
+                self.cache = {inf: decode(value) for inf, value in json.load(cachef).items()}
+
+    def fetch(self, infinitive):
+        '''Get conjugations from source, without caching.
+        Returns:
+            Tense map, Warning if infinitive invalid, or None if source can't answer for this infinitive.
+        Raises:
+            Exception if source failed to get an answer.
+        '''
+        raise NotImplementedError()
+
+    def get(self, infinitive):
+        '''Get conjugations, from cache if already fetched. See `fetch()`. Can't answer (None) isn't cached.'''
+        if infinitive in self.cache:
+            return self.cache[infinitive]
+        result = self.fetch(infinitive)
+        if result is not None:
+            self.cache[infinitive] = result
+            self.changed = True
+        return result
+
+    def get_raw(self, infinitive):
+        '''Get conjugations in two steps, so slow fetching and parsing can run separately (e.g. in build pipeline,
+        see pipeline.py). Sources with nothing to parse (or already cached) answer in this step.
+        Returns:
+            Tuple of whether answered (bool), and answer (see `fetch()`) if so, otherwise raw value to give to
+            `parse_raw()`.
+        '''
+        return True, self.get(infinitive)
+
+    def parse_raw(self, infinitive, raw):
+        '''Parse raw value from `get_raw()` to answer, caching it as with `get()`. Subclasses parse before calling 
+        this, so raw values that fail to parse (raising) aren't cached.'''
+        self.cache[infinitive] = raw
+        self.changed = True
+        return raw
+
+    def save(self):
+        '''Write cache file, if any new results.'''
+        if not self.cache_file or not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        temp_path = "{0}.{1}.tmp".format(self.cache_file, os.getpid())
+        with open(temp_path, "w", encoding="utf-8") as outf:
+            json.dump(
+                {inf: encode(result) for inf, result in self.cache.items()},
+                outf, ensure_ascii=False, indent=0, sort_keys=True
+            )
+        os.replace(temp_path, self.cache_file)
+        self.changed = False
+
+    def close(self):
+        '''Save cache and release anything held by source.'''
+        self.save()
+
+
+class ScraperSource(ConjugationSource):
+    '''
+    Conjugator website, scraped by rendering page (see `builder.get()`). Slow, and needs network and
+    requests_html, so best last in chain.
+
+    Params:
+        cache_file (str, optional): Filepath of JSON cache of results.
+        delay (float, optional): Seconds to wait after each page, so as to not spam the website. Defaults to 1.
+        render (bool, optional): If false, parses pages without rendering. See `builder.get()`.
+        pool (BrowserPool, optional): Browser pool to share (e.g. with validity checks). Defaults to own pool of
+            one browser, closed with source.
+    '''
+
+    name = "scraper"
+
+    def __init__(self, cache_file=None, delay=1.0, render=True, pool=None):
+        super().__init__(cache_file)
+        self.delay = delay
+        self.render = render
+        self.own_pool = pool is None
+        self.pool = pool or BrowserPool()
+
+    def fetch(self, infinitive):
+        try:
+            with self.pool.session() as session:
+                return builder.get(infinitive, session=session, render=self.render)
+        finally:
+            if self.delay:
+                time.sleep(self.delay)
+
+    def get_raw(self, infinitive):
+        # raw value is page HTML
+        if infinitive in self.cache:
+            return True, self.cache[infinitive]
+        try:
+            with self.pool.session() as session:
+                return False, builder.get_page(infinitive, session, render=self.render)
+        finally:
+            if self.delay:
+                time.sleep(self.delay)
+
+    def parse_raw(self, infinitive, raw):
+        return super().parse_raw(infinitive, builder.parse_page(raw, infinitive))
+
+    def close(self):
+        super().close()
+        if self.own_pool:
+            self.pool.close()
+
+
+class RulesSource(ConjugationSource):
+    '''
+    Conjugates regular verbs by rule (European Portuguese), including regular spelling changes (e.g. 'ficar'
+    -> 'fiquei', 'conhecer' -> 'conheço'). Verbs which can't be conjugated by rule (irregular verbs, and endings
+    with stem or accent changes) aren't answered, so the next source in chain is used.
+
+    Params:
+        cache_file (str, optional): Filepath of JSON cache of results. Defaults to None, as rules are fast.
+        exceptions (set[str], optional): Infinitives not to answer for. Defaults to `IRREGULAR`.
+    '''
+
+    name = "rules"
+
+    # irregular, stem-changing, and irregular participle verbs (common ones, and their compounds)
+    IRREGULAR = set("""
+        abrir acudir advertir agredir ansiar aprazer caber cobrir competir conseguir construir convergir convir
+        crer cuspir deter despedir despir destruir digerir divertir dizer dormir engolir entreter entupir
+        escrever descrever inscrever prescrever subscrever estar expedir fazer ferir frigir fugir haver
+        impedir incendiar intervir investir ir ler manter medir mediar mentir morrer obter odiar ouvir parir
+        pedir perder poder polir preferir prevenir progredir provir querer referir refletir remediar repetir
+        requerer reter rever prever rir sorrir sacudir saber sentir consentir ser seguir perseguir servir subir
+        sugerir sumir consumir ter conter ater suster tossir trazer valer ver vestir vir
+        acender aceitar entregar expulsar ganhar gastar imprimir matar prender salvar soltar suspender eleger
+        proibir reunir saudar enraizar
+    """.split())
+
+    # endings with stem or accent changes, which rules don't handle
+    _SKIP_ENDINGS = ("ear", "air", "uir", "oer", "guer", "guir", "quir", "guar", "quar", "zer", "zir", "or", "ôr")
+
+    # endings by ending type, tense, then person (6 for each in order of `_PERSONS`)
+    _ENDINGS = {
+        "ar": {
+            TENSE.PRESENT:        ("o", "as", "a", "amos", "ais", "am"),
+            TENSE.IMPERFECT:      ("ava", "avas", "ava", "ávamos", "áveis", "avam"),
+            TENSE.PERFECT:        ("ei", "aste", "ou", "ámos", "astes", "aram"),
+            TENSE.IMPERATIVE_AFM: (None, "a", "e", "emos", "ai", "em"),
+            TENSE.IMPERATIVE_NEG: (None, "es", "e", "emos", "eis", "em")
+        },
+        "er": {
+            TENSE.PRESENT:        ("o", "es", "e", "emos", "eis", "em"),
+            TENSE.IMPERFECT:      ("ia", "ias", "ia", "íamos", "íeis", "iam"),
+            TENSE.PERFECT:        ("i", "este", "eu", "emos", "estes", "eram"),
+            TENSE.IMPERATIVE_AFM: (None, "e", "a", "amos", "ei", "am"),
+            TENSE.IMPERATIVE_NEG: (None, "as", "a", "amos", "ais", "am")
+        },
+        "ir": {
+            TENSE.PRESENT:        ("o", "es", "e", "imos", "is", "em"),
+            TENSE.IMPERFECT:      ("ia", "ias", "ia", "íamos", "íeis", "iam"),
+            TENSE.PERFECT:        ("i", "iste", "iu", "imos", "istes", "iram"),
+            TENSE.IMPERATIVE_AFM: (None, "e", "a", "amos", "i", "am"),
+            TENSE.IMPERATIVE_NEG: (None, "as", "a", "amos", "ais", "am")
+        }
+    }
+    _FUTURE = ("ei", "ás", "á", "emos", "eis", "ão")
+    _FUTURE_COND = ("ia", "ias", "ia", "íamos", "íeis", "iam")
+    _GERUND = {"ar": "ando", "er": "endo", "ir": "indo"}
+    _PARTICIPLE = {"ar": "ado", "er": "ido", "ir": "ido"}
+
+    # stem endings changed to keep pronunciation, by ending type, then letter ending starts with
+    _SPELLING = {
+        "ar": {"e": (("c", "qu"), ("g", "gu"), ("ç", "c"))},
+        "er": {"a": (("c", "ç"), ("g", "j")), "o": (("c", "ç"), ("g", "j"))},
+        "ir": {"a": (("c", "ç"), ("g", "j")), "o": (("c", "ç"), ("g", "j"))}
+    }
+
+    def __init__(self, cache_file=None, exceptions=None):
+        super().__init__(cache_file)
+        self.exceptions = self.IRREGULAR if exceptions is None else exceptions
+
+    def can_conjugate(self, infinitive):
+        '''Check infinitive can be conjugated by rule.'''
+        if infinitive in self.exceptions or not infinitive.isalpha() or len(infinitive) < 4:
+            return False
+        if infinitive[-2:] not in self._ENDINGS or infinitive.endswith(self._SKIP_ENDINGS):
+            return False
+        # -ir verbs with 'e', 'o', or 'u' as last stem vowel commonly change stem vowel (e.g. 'sentir' -> 'sinto')
+        if infinitive.endswith("ir"):
+            stem_vowels = [c for c in infinitive[:-2] if c in "aeiouáéíóúâêô"]
+            if stem_vowels and stem_vowels[-1] in "eo":
+                return False
+        return True
+
+    def _form(self, stem, ending_type, ending):
+        for start, changes in self._SPELLING[ending_type].items():
+            if ending.startswith(start):
+                for old, new in changes:
+                    if stem.endswith(old):
+                        return stem[:-len(old)] + new + ending
+        return stem + ending
+
+    def fetch(self, infinitive):
+        if not self.can_conjugate(infinitive):
+            return None
+        stem, ending_type = infinitive[:-2], infinitive[-2:]
+        tense_maps = {
+            "gerund":     stem + self._GERUND[ending_type],
+            "participle": stem + self._PARTICIPLE[ending_type]
+        }
+        for tense, endings in self._ENDINGS[ending_type].items():
+            tense_maps[tense] = {
+                person: self._form(stem, ending_type, ending)
+                for person, ending in zip(_PERSONS, endings) if ending
+            }
+        tense_maps[TENSE.FUTURE_FORMAL] = {person: infinitive + ending for person, ending in zip(_PERSONS, self._FUTURE)}
+        tense_maps[TENSE.FUTURE_COND] = {
+            person: infinitive + ending for person, ending in zip(_PERSONS, self._FUTURE_COND)
+        }
+        return tense_maps
+
+
+class DumpSource(ConjugationSource):
+    '''
+    Local dump of conjugations, either JSON of tense maps by infinitive (see `write_dump()`) or CSV in the same
+    format as the built card bank (e.g. a built card bank from elsewhere). Verbs not in dump aren't answered.
+
+    Params:
+        filepath (str, optional): Filepath of JSON or CSV (by file extension) dump. If it doesn't exist, the
+            source answers nothing.
+    '''
+
+    name = "dump"
+
+    def __init__(self, filepath=DEFAULT_DUMP):
+        super().__init__()
+        self.filepath = filepath
+        self.dump = {}
+        if not os.path.exists(filepath):
+            return
+        if filepath.lower().endswith(".csv"):
+            with open(filepath, "r", encoding="utf-8") as csvf:
+                for card in csv.DictReader(csvf):
+                    tense_maps = from_card(card)
+                    if tense_maps:
+                        self.dump[card["inf"]] = tense_maps
+        else:
+            with open(filepath, "r", encoding="utf-8") as dumpf:
+                self.dump = {inf: decode(value) for inf, value in json.load(dumpf).items()}
+
+    def fetch(self, infinitive):
+        return self.dump.get(infinitive)
+
+
+class FixtureSource(ConjugationSource):
+    '''
+    Recorded results of another source, one JSON file per infinitive, so builds and tests can run offline
+    with the same results (including invalid infinitive warnings). If given a source to record from, results
+    not yet recorded are fetched from it and recorded.
+
+    Params:
+        directory (str, optional): Directory of fixture files.
+        record_from (ConjugationSource, optional): Source to record new fixtures from. Defaults to None, so
+            infinitives without fixtures aren't answered.
+    '''
+
+    name = "fixture"
+
+    def __init__(self, directory=DEFAULT_FIXTURES, record_from=None):
+        super().__init__()
+        self.directory = directory
+        self.record_from = record_from
+
+    def _path(self, infinitive):
+        return os.path.join(self.directory, "{0}.json".format(infinitive))
+
+    def fetch(self, infinitive):
+        path = self._path(infinitive)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as inf:
+                return decode(json.load(inf))
+        if not self.record_from:
+            return None
+        result = self.record_from.get(infinitive)
+        if result is not None:
+            self.record(infinitive, result)
+        return result
+
+    def record(self, infinitive, result):
+        '''Write fixture of result for infinitive.'''
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(infinitive), "w", encoding="utf-8") as outf:
+            json.dump(encode(result), outf, ensure_ascii=False, indent=1)
+
+    def close(self):
+        super().close()
+        if self.record_from:
+            self.record_from.close()
+
+
+class SourceChain(ConjugationSource):
+    '''
+    Sources tried in priority order, using the first that can answer (so cheapest sources should be first).
+    Optionally cross-validates answers against another source, e.g. to check rules against the website.
+
+    Params:
+        sources (list[ConjugationSource]): Sources in priority order.
+        verify (ConjugationSource, optional): Source to check answers against, if it can answer. Differences
+            are kept in `mismatches`. Not used to check its own answers.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        answered_by (dict): Name of source that answered by infinitive.
+        mismatches (list[tuple]): Answers different from verify source, as (infinitive, source name,
+            differences) tuples. See `compare()`.
+    '''
+
+    name = "chain"
+
+    def __init__(self, sources, verify=None):
+        super().__init__()
+        self.sources = list(sources)
+        self.verify = verify
+        self.answered_by = {}
+        self.mismatches = []
+
+    def fetch(self, infinitive):
+        for source in self.sources:
+            result = source.get(infinitive)
+            if result is not None:
+                return self._answered(infinitive, source, result)
+        return None
+
+    def get(self, infinitive):
+        # no source answering isn't cached (as for any source), but is reported as warning
+        result = super().get(infinitive)
+        return self._unanswered() if result is None else result
+
+    def get_raw(self, infinitive):
+        # raw value is source and its raw value, for first source that answers or has something to parse
+        if infinitive in self.cache:
+            return True, self.cache[infinitive]
+        for source in self.sources:
+            answered, result = source.get_raw(infinitive)
+            if not answered:
+                return False, (source, result)
+            if result is not None:
+                return True, super().parse_raw(infinitive, self._answered(infinitive, source, result))
+        return True, self._unanswered()
+
+    def parse_raw(self, infinitive, raw):
+        source, raw = raw
+        result = self._answered(infinitive, source, source.parse_raw(infinitive, raw))
+        return super().parse_raw(infinitive, result)
+
+    def _answered(self, infinitive, source, result):
+        self.answered_by[infinitive] = source.name
+        if self.verify and self.verify is not source:
+            check = self.verify.get(infinitive)
+            if check is not None:
+                differences = compare(result, check)
+                if differences:
+                    self.mismatches.append((infinitive, source.name, differences))
+        return result
+
+    def _unanswered(self):
+        return Warning("No conjugation source could answer (tried {0})".format(
+            ", ".join(source.name for source in self.sources)
+        ))
+
+    def close(self):
+        closed = set()
+        for source in self.sources + ([self.verify] if self.verify else []):
+            if id(source) not in closed:
+                source.close()
+                closed.add(id(source))
+
+
+def make_source(name, cache_dir=DEFAULT_CACHE_DIR, pool=None):
+    '''Create source by name, with default settings.
+    Params:
+        name (str): One of "scraper", "rules", "dump", or "fixture". "record" for fixtures recorded from the
+            website as needed.
+        cache_dir (str, optional): Directory of per-source cache files. None to not cache to file.
+        pool (BrowserPool, optional): Browser pool for website sources to share.
+    Returns:
+        ConjugationSource instance.
+    '''
+    cache_file = os.path.join(cache_dir, "{0}.json".format(name)) if cache_dir else None
+    if name == "scraper":
+        return ScraperSource(cache_file, pool=pool)
+    if name == "rules":
+        return RulesSource()
+    if name == "dump":
+        return DumpSource()
+    if name == "fixture":
+        return FixtureSource()
+    if name == "record":
+        return FixtureSource(record_from=ScraperSource(cache_file=None, pool=pool))
+    raise Exception("Unknown conjugation source: {0}".format(name))
+
+
+def make_chain(names=DEFAULT_CHAIN, verify=None, cache_dir=DEFAULT_CACHE_DIR, pool=None):
+    '''Create source chain by source names. See `make_source()`.
+    Params:
+        names (list[str], optional): Source names in priority order. Defaults to `DEFAULT_CHAIN`.
+        verify (str, optional): Name of source to cross-validate answers against. If also in chain, the same
+            instance is used.
+        cache_dir (str, optional): Directory of per-source cache files.
+        pool (BrowserPool, optional): Browser pool for website sources to share.
+    Returns:
+        SourceChain instance.
+    '''
+    sources = [make_source(name, cache_dir, pool) for name in names]
+    verify_source = None
+    if verify:
+        verify_source = next((source for name, source in zip(names, sources) if name == verify), None)
+        verify_source = verify_source or make_source(verify, cache_dir, pool)
+    return SourceChain(sources, verify=verify_source)
+
+
+def write_dump(tense_maps_by_inf, filepath=DEFAULT_DUMP):
+    '''Write JSON dump of tense maps by infinitive, for `DumpSource`.'''
+    with open(filepath, "w", encoding="utf-8") as outf:
+        json.dump(
+            {inf: encode(tense_maps) for inf, tense_maps in tense_maps_by_inf.items()},
+            outf, ensure_ascii=False, indent=0, sort_keys=True
+        )
@@ -0,0 +1,351 @@
+from .constants import *
+from .cardbank import CardBank, read, read_similars, build_card
+from .misc import replace_special_chars
+import os, csv, sqlite3, threading
+
+
+DEFAULT_DATABASE = "bank/card-bank.db"
+
+# columns use the CSV field names, which need quoting in SQL
+_COLUMNS = ", ".join('"{0}"'.format(field) for field in FIELDS)
+
+_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS cards (
+        position INTEGER NOT NULL UNIQUE,
+        {0},
+        PRIMARY KEY ("inf")
+    )'''.format(", ".join('"{0}" TEXT NOT NULL DEFAULT \'\''.format(field) for field in FIELDS)),
+    # positions left by deleted cards, so deletes don't renumber later cards (see `delete_card()`)
+    '''CREATE TABLE IF NOT EXISTS gaps (
+        position INTEGER PRIMARY KEY
+    )''',
+    '''CREATE TABLE IF NOT EXISTS slots (
+        inf TEXT NOT NULL REFERENCES cards("inf") ON DELETE CASCADE,
+        field TEXT NOT NULL,
+        form TEXT NOT NULL,
+        folded TEXT NOT NULL
+    )''',
+    '''CREATE INDEX IF NOT EXISTS slots_inf ON slots(inf)''',
+    '''CREATE INDEX IF NOT EXISTS slots_folded ON slots(folded)''',
+    '''CREATE TABLE IF NOT EXISTS eng_forms (
+        inf TEXT NOT NULL REFERENCES cards("inf") ON DELETE CASCADE,
+        field TEXT NOT NULL,
+        form TEXT NOT NULL
+    )''',
+    '''CREATE INDEX IF NOT EXISTS eng_forms_inf ON eng_forms(inf)''',
+    '''CREATE INDEX IF NOT EXISTS eng_forms_form ON eng_forms(form)''',
+    '''CREATE TABLE IF NOT EXISTS similars (
+        group_id INTEGER NOT NULL,
+        inf TEXT NOT NULL
+    )''',
+    '''CREATE INDEX IF NOT EXISTS similars_group ON similars(group_id)''',
+    '''CREATE INDEX IF NOT EXISTS similars_inf ON similars(inf)'''
+)
+
+
+def connect(database=DEFAULT_DATABASE):
+    '''Open card bank database, creating tables if needed. Uses write-ahead logging so readers (e.g. running
+    sessions) aren't blocked while a card is being written.
+    Params:
+        database (str, optional): Filepath to SQLite database.
+    Returns:
+        sqlite3.Connection instance.
+    '''
+    conn = sqlite3.connect(database, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+
+def _card_rows(card):
+    '''Get slot and English form rows for a card (as read from CSV, not yet built).'''
+    slots = []
+    for field in BUILT_FIELDS:
+        for form in (card.get(field) or "").split("/"):
+            form = form.strip()
+            if form and form != "-":
+                slots.append((card["inf"], field, form, replace_special_chars(form.lower())))
+    # derived English forms are stored too, so they can be searched without building every card
+    built = build_card(dict(card))
+    eng_forms = []
+    for field in ENG_FIELDS:
+        for form in built[field]:
+            eng_forms.append((card["inf"], field, form))
+    return slots, eng_forms
+
+
+def _insert_card(conn, card, position):
+    conn.execute(
+        'INSERT INTO cards (position, {0}) VALUES (?, {1})'.format(_COLUMNS, ", ".join("?"*len(FIELDS))),
+        [position] + [card.get(field) or "" for field in FIELDS]
+    )
+    slots, eng_forms = _card_rows(card)
+    conn.executemany("INSERT INTO slots (inf, field, form, folded) VALUES (?, ?, ?, ?)", slots)
+    conn.executemany("INSERT INTO eng_forms (inf, field, form) VALUES (?, ?, ?)", eng_forms)
+
+
+def import_csv(conn, card_bank_table, similar_table=None):
+    '''Replace database contents with cards from CSV, in one transaction.
+    Params:
+        conn (sqlite3.Connection): Database connection. See `connect()`.
+        card_bank_table (str): Filepath to CSV of (built) card bank.
+        similar_table (str, optional): Filepath to CSV of similar groups.
+    Returns:
+        Number of cards imported.
+    '''
+    cards = read(card_bank_table, build_forms=False)
+    with conn:
+        conn.execute("DELETE FROM similars")
+        conn.execute("DELETE FROM slots")
+        conn.execute("DELETE FROM eng_forms")
+        conn.execute("DELETE FROM cards")
+        conn.execute("DELETE FROM gaps")
+        for position, card in enumerate(cards):
+            _insert_card(conn, card, position)
+        if similar_table:
+            conn.executemany(
+                "INSERT INTO similars (group_id, inf) VALUES (?, ?)",
+                [(group_id, inf) for group_id, group in enumerate(read_similars(similar_table)) for inf in group]
+            )
+    return len(cards)
+
+
+def export_csv(conn, card_bank_table, similar_table=None, basic=False):
+    '''Write database contents to CSV, in the same format as the card bank CSVs.
+    Params:
+        conn (sqlite3.Connection): Database connection. See `connect()`.
+        card_bank_table (str): Filepath to write CSV of card bank.
+        similar_table (str, optional): If supplied, filepath to write CSV of similar groups.
+        basic (bool, optional): If true, writes only basic fields (as in card-bank-basic.csv).
+    Returns:
+        Number of cards exported.
+    '''
+    fields = BASIC_FIELDS if basic else FIELDS
+    num_cards = 0
+    with open(card_bank_table, "w", newline="", encoding="utf-8") as csvf:
+        writer = csv.writer(csvf)
+        writer.writerow(fields)
+        columns = ", ".join('"{0}"'.format(field) for field in fields)
+        for row in conn.execute("SELECT {0} FROM cards ORDER BY position".format(columns)):
+            writer.writerow(row)
+            num_cards += 1
+    if similar_table:
+        groups = {}
+        for group_id, inf in conn.execute("SELECT group_id, inf FROM similars ORDER BY group_id, rowid"):
+            groups.setdefault(group_id, []).append(inf)
+        with open(similar_table, "w", newline="", encoding="utf-8") as csvf:
+            writer = csv.writer(csvf)
+            for group_id in sorted(groups):
+                writer.writerow(groups[group_id])
+    return num_cards
+
+
+def upsert_card(conn, card):
+    '''Add or replace a single card, keeping its position if replacing.
+    Params:
+        conn (sqlite3.Connection): Database connection. See `connect()`.
+        card (dict): Card as read from CSV (not built), e.g. as written by `build_card_bank`.
+    Returns:
+        True if card was added, False if replaced.
+    '''
+    with conn:
+        found = conn.execute('SELECT position FROM cards WHERE "inf" = ?', (card["inf"],)).fetchone()
+        if found:
+            position = found[0]
+            conn.execute('DELETE FROM cards WHERE "inf" = ?', (card["inf"],))
+        else:
+            # after last position used, including any gap left by deleting the last card
+            position = max(
+                conn.execute("SELECT COALESCE(MAX(position)+1, 0) FROM cards").fetchone()[0],
+                conn.execute("SELECT COALESCE(MAX(position)+1, 0) FROM gaps").fetchone()[0]
+            )
+        _insert_card(conn, card, position)
+    return not found
+
+
+def delete_card(conn, infinitive):
+    '''Delete a single card. Its position is recorded as a gap rather than shifting later cards down, so a
+    delete costs the same regardless of bank size (see `card_position()`).
+    Params:
+        conn (sqlite3.Connection): Database connection. See `connect()`.
+        infinitive (str): Portuguese infinitive of card.
+    Returns:
+        True if card was deleted, False if not found.
+    '''
+    with conn:
+        found = conn.execute('SELECT position FROM cards WHERE "inf" = ?', (infinitive,)).fetchone()
+        if not found:
+            return False
+        conn.execute('DELETE FROM cards WHERE "inf" = ?', (infinitive,))
+        conn.execute("INSERT INTO gaps (position) VALUES (?)", (found[0],))
+    return True
+
+
+def card_position(conn, i):
+    '''Get stored position of card by index, skipping gaps left by deleted cards. Costs as much as the number
+    of deletes since the last import, not the bank size.
+    Params:
+        conn (sqlite3.Connection): Database connection. See `connect()`.
+        i (int): Index of card (from 0).
+    Returns:
+        Position (int).
+    '''
+    position = i
+    for (gap,) in conn.execute("SELECT position FROM gaps ORDER BY position"):
+        if gap > position:
+            break
+        position += 1
+    return position
+
+
+def find_form(conn, form):
+    '''Find which cards and fields a Portuguese verb form belongs to, using the folded form index.
+    Params:
+        conn (sqlite3.Connection): Database connection. See `connect()`.
+        form (str): Verb form. Special characters and case are ignored.
+    Returns:
+        List of (infinitive, field) tuples.
+    '''
+    folded = replace_special_chars(form.strip().lower())
+    return conn.execute("SELECT inf, field FROM slots WHERE folded = ?", (folded,)).fetchall()
+
+
+class SqliteCardBank(CardBank):
+    '''
+    Card bank backed by a SQLite database (see `import_csv()` to create one). Cards are read on first access
+    by index or infinitive and kept, so lookups cost the same regardless of bank size and only cards actually
+    used are loaded. Otherwise works the same as CardBank. Cards written through this instance should use 
+    `upsert()` and `delete()`, so the card count is kept up to date.
+
+    Params:
+        database (str, optional): Filepath to SQLite database.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        conn (sqlite3.Connection): Database connection.
+        card_map (dict): Dictionary of word cards loaded so far by Portuguese infinitive.
+        num_cards (int): Number of cards, counted on open and only recounted if another connection (e.g. a 
+            build) changed the database since.
+        data_version (int): SQLite data version when cards were counted, to tell if another connection changed
+            the database.
+    '''
+
+    def __init__(self, database=DEFAULT_DATABASE):
+        assert os.path.exists(database)
+        self.conn = connect(database)
+        self.card_map = {}
+        self.lock = threading.Lock()
+        self.data_version = self._data_version()
+        self.num_cards = self._count()
+        self.estar_card = self.get("estar") if self._exists("estar") else None
+        self.ir_card = self.get("ir") if self._exists("ir") else None
+        if not self.estar_card:
+            raise Exception("No card found for 'estar' (to be)")
+        if not self.ir_card:
+            raise Exception("No card found for 'ir' (to go)")
+
+    def _exists(self, infinitive):
+        return bool(self.conn.execute('SELECT 1 FROM cards WHERE "inf" = ?', (infinitive,)).fetchone())
+
+    def _load(self, where, value):
+        '''Load card by query, memoizing so the same card dict is returned each time.'''
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT {0} FROM cards WHERE {1} = ?'.format(_COLUMNS, where), (value,)
+            ).fetchone()
+            if not row:
+                raise KeyError(value)
+            if row[0] in self.card_map:
+                return self.card_map[row[0]]
+            card = build_card(dict(zip(FIELDS, row)))
+            # only similars that are in the card bank, excluding itself
+            similars = [inf for (inf,) in self.conn.execute(
+                '''SELECT DISTINCT other.inf FROM similars this
+                JOIN similars other ON this.group_id = other.group_id
+                JOIN cards ON cards."inf" = other.inf
+                WHERE this.inf = ? AND other.inf != ?''', (card["inf"], card["inf"])
+            )]
+            if similars:
+                card["similars"] = tuple(similars)
+            self.card_map[card["inf"]] = card
+            return card
+
+    def _data_version(self):
+        # changes only when another connection commits, so cheap to check before trusting count
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+    def __len__(self):
+        data_version = self._data_version()
+        if data_version != self.data_version:
+            self.data_version = data_version
+            self.num_cards = self._count()
+        return self.num_cards
+
+    @property
+    def cards(self):
+        '''Cards in card bank order, for inherited CardBank methods. This instance, as cards are loaded as 
+        accessed (by index, or by iterating).'''
+        return self
+
+    def _get_loaded(self, infinitive):
+        return self.card_map.get(infinitive)
+
+    def upsert(self, card):
+        '''Add or replace a single card, keeping count up to date. See `upsert_card()`.'''
+        with self.lock:
+            self.card_map.pop(card["inf"], None)
+            if upsert_card(self.conn, card):
+                self.num_cards += 1
+
+    def delete(self, infinitive):
+        '''Delete a single card, keeping count up to date. See `delete_card()`.'''
+        with self.lock:
+            self.card_map.pop(infinitive, None)
+            if delete_card(self.conn, infinitive):
+                self.num_cards -= 1
+
+    def infinitives(self):
+        '''Get Portuguese infinitives of all cards, in card bank order, without loading cards.'''
+        return [inf for (inf,) in self.conn.execute('SELECT "inf" FROM cards ORDER BY position')]
+
+    def __iter__(self):
+        infinitives = [inf for (inf,) in self.conn.execute('SELECT "inf" FROM cards ORDER BY position')]
+        for infinitive in infinitives:
+            yield self.get(infinitive)
+
+    def __getitem__(self, i):
+        if isinstance(i, int):
+            if i < 0:
+                i += len(self)
+            try:
+                return self._load("position", card_position(self.conn, i))
+            except KeyError:
+                raise IndexError(i)
+        if isinstance(i, str):
+            return self.get(i)
+        raise TypeError()
+
+    def reload(self):
+        '''Cards are read from the database as needed, so there is nothing to reload. Returns this instance.'''
+        return self
+
+    def get(self, query):
+        '''Get word card/definition. See `CardBank.get()`.'''
+        if isinstance(query, int):
+            return self[query]
+        if isinstance(query, str):
+            if query in self.card_map:
+                return self.card_map[query]
+            return self._load('"inf"', query)
+        if isinstance(query, dict):
+            if query and query.get("inf") in self.card_map and self.card_map[query["inf"]] is query:
+                return query
+            raise ValueError()
+        raise TypeError()
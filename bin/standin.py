@@ -0,0 +1,249 @@
+from .constants import TENSE, TENSE_NAMES
+from . import sources, builder
+import os, csv, html, time, random, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote
+
+
+DEFAULT_PAGES = "bank/fixtures/pages"
+
+# pages recorded from the real website (see `record_page()`) and checked by `check_pages()`, so changes to the 
+# website's pages that the builder can't parse are caught offline: a regular verb, an irregular verb, and an 
+# invalid infinitive (warning page)
+FIXTURE_VERBS = ("falar", "fazer")
+FIXTURE_INVALID = ("xyzzyar",)
+
+# tense tables in page order, as (table name, tense), same names as on conjugator website (see `builder.get()`)
+_TABLES = (
+    ("Presente",              TENSE.PRESENT),
+    ("Pretérito Perfeito",    TENSE.PERFECT),
+    ("Pretérito Imperfeito",  TENSE.IMPERFECT),
+    ("Futuro",                TENSE.FUTURE_FORMAL),
+    ("(Futuro do Pretérito)", TENSE.FUTURE_COND),
+    ("Afirmativo",            TENSE.IMPERATIVE_AFM),
+    ("Negativo",              TENSE.IMPERATIVE_NEG)
+)
+_PERSONS = ("eu", "tu", "ele", "nós", "vós", "eles")
+
+
+def _tense_table(name, tense_map):
+    persons = [person for person in _PERSONS if person in tense_map]
+    return (
+        '<span class="tense"><span class="tense-name">{0}</span><span class="persons-forms">'
+        '<span class="persons">{1}</span><span class="forms">{2}</span></span></span>\n'
+    ).format(
+        html.escape(name),
+        "".join("<span>{0}</span>".format(html.escape(person)) for person in persons),
+        "".join("<span>{0}</span>".format(html.escape(tense_map[person])) for person in persons)
+    )
+
+
+def page_html(infinitive, tense_maps, missing=()):
+    '''Create conjugator page for verb, as parsed by `builder.get()`.
+    Params:
+        infinitive (str): Portuguese infinitive.
+        tense_maps (dict): Tense map. See `builder.get()`.
+        missing (list[int], optional): Tenses to leave out tables for, as for pages the builder can't use.
+    Returns:
+        Page HTML (str).
+    '''
+    tables = [_tense_table(name, tense_maps[tense]) for name, tense in _TABLES if tense not in missing]
+    # subjunctive tables come after, reusing tense names, and are skipped by builder
+    subjunctive = {
+        person: tense_maps[TENSE.IMPERATIVE_NEG].get(person, tense_maps[TENSE.IMPERATIVE_NEG]["ele"])
+        for person in _PERSONS
+    }
+    tables.append(_tense_table("Presente", subjunctive))
+    return (
+        '<html><head><meta charset="utf-8"><title>{0}</title></head><body>\n'
+        '<h1>{0}</h1>\n<div id="gerund-past"><span>Gerúndio:</span><span>{1}</span>'
+        '<span>Particípio Passado:</span><span>{2}</span></div>\n'
+        '<div id="conjugations">\n{3}</div>\n</body></html>\n'
+    ).format(
+        html.escape(infinitive), html.escape(tense_maps["gerund"]), html.escape(tense_maps["participle"]),
+        "".join(tables)
+    )
+
+
+def warning_html(infinitive):
+    '''Create conjugator page for unrecognized verb, with warning as parsed by `builder.get()`.'''
+    return (
+        '<html><head><meta charset="utf-8"><title>{0}</title></head><body>\n'
+        '<div id="warning">The verb "{0}" was not found.</div>\n</body></html>\n'
+    ).format(html.escape(infinitive))
+
+
+class StandinConjugator:
+    '''
+    Local stand-in for the conjugator website, serving pages for the verbs in the card bank (and any recorded
+    pages), so the builder can be tested and benchmarked without network. Point the builder at it by setting
+    `builder.URL` (or CONJUGATOR_URL environment variable) to `url`. Unknown verbs get a warning page.
+
+    Params:
+        card_bank_table (str, optional): Built card bank CSV to serve verbs of.
+        pages (str, optional): Directory of recorded pages (<infinitive>.html) to serve as is, e.g. saved
+            from the real website. Served instead of generated pages.
+        latency (float, optional): Seconds to wait before each response. Defaults to 0.
+        jitter (float, optional): Up to this many more seconds added to latency at random. Defaults to 0.
+        error_rate (float, optional): Fraction of requests to fail with server error (503). Defaults to 0.
+        broken (dict, optional): Tenses to leave out of pages, by infinitive, to test incomplete pages.
+        seed (int, optional): Seed for random latency and errors, for repeatable runs.
+
+    Attributes:
+        [Note: attributes generally shouldn't be accessed or modified directly.]
+        requests (int): Number of requests served.
+        errors (int): Number of errors injected.
+    '''
+
+    def __init__(self, card_bank_table="bank/card-bank-built.csv", pages=DEFAULT_PAGES, latency=0, jitter=0,
+                 error_rate=0, broken=None, seed=None):
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.broken = broken or {}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.server = None
+        self.tense_maps = {}
+        if card_bank_table and os.path.exists(card_bank_table):
+            with open(card_bank_table, "r", encoding="utf-8") as csvf:
+                for card in csv.DictReader(csvf):
+                    tense_maps = sources.from_card(card)
+                    if tense_maps:
+                        self.tense_maps[card["inf"]] = tense_maps
+
+    def respond(self, infinitive):
+        '''Get response for verb page.
+        Returns:
+            Tuple of HTTP status (int) and page HTML (str).
+        '''
+        with self.lock:
+            self.requests += 1
+            delay = self.latency + (self.rng.random()*self.jitter if self.jitter else 0)
+            error = self.error_rate and self.rng.random() < self.error_rate
+            if error:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if error:
+            return 503, "<html><body><h1>Service Unavailable</h1></body></html>"
+        # only plain words, so the path can't reach files outside the pages directory
+        if not infinitive.isalpha():
+            return 404, "<html><body><h1>Not Found</h1></body></html>"
+        recorded = os.path.join(self.pages, "{0}.html".format(infinitive)) if self.pages else None
+        if recorded and os.path.exists(recorded):
+            with open(recorded, "r", encoding="utf-8") as inf:
+                return 200, inf.read()
+        if infinitive not in self.tense_maps:
+            return 200, warning_html(infinitive)
+        return 200, page_html(infinitive, self.tense_maps[infinitive], self.broken.get(infinitive, ()))
+
+    def start(self, host="127.0.0.1", port=0):
+        '''Start serving in background thread.
+        Params:
+            host (str, optional): Host to listen on. Defaults to localhost only.
+            port (int, optional): Port to listen on. Defaults to any free port.
+        Returns:
+            URL format of verb pages, to use as `builder.URL`.
+        '''
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "http://{0}:{1}/conjugator/{{0}}".format(host, port)
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        path = unquote(self.path.split("?")[0])
+        if not path.startswith("/conjugator/"):
+            status, body = 404, "<html><body><h1>Not Found</h1></body></html>"
+        else:
+            status, body = self.server.standin.respond(path[len("/conjugator/"):].strip("/"))
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # quiet, as many requests are made when benchmarking
+        pass
+
+
+def record_page(infinitive, session, pages=DEFAULT_PAGES):
+    '''Save rendered page from conjugator website (see `builder.URL`), to be served by stand-in as is and
+    checked by `check_pages()`. Raises if page isn't served.'''
+    page_html = builder.get_page(infinitive, session)
+    os.makedirs(pages, exist_ok=True)
+    with open(os.path.join(pages, "{0}.html".format(infinitive)), "w", encoding="utf-8") as outf:
+        outf.write(page_html)
+
+
+def recorded_pages(pages=DEFAULT_PAGES):
+    '''Get infinitives of recorded pages (<infinitive>.html), sorted.'''
+    if not os.path.isdir(pages):
+        return []
+    return sorted(filename[:-5] for filename in os.listdir(pages) if filename.endswith(".html"))
+
+
+def missing_pages(pages=DEFAULT_PAGES):
+    '''Get infinitives of `FIXTURE_VERBS` and `FIXTURE_INVALID` pages not recorded yet (see `record_page()`).'''
+    recorded = recorded_pages(pages)
+    return [infinitive for infinitive in FIXTURE_VERBS + FIXTURE_INVALID if infinitive not in recorded]
+
+
+def check_pages(pages=DEFAULT_PAGES, card_bank_table="bank/card-bank-built.csv"):
+    '''Parse recorded pages with the builder, to check it still handles the real website's pages. Verbs in the
+    card bank must parse to the same forms, other verbs must parse, and `FIXTURE_INVALID` infinitives must parse
+    as the website's invalid infinitive warning. Pages not recorded aren't checked (see `missing_pages()`).
+    Params:
+        pages (str, optional): Directory of recorded pages (<infinitive>.html).
+        card_bank_table (str, optional): Built card bank CSV to compare verbs against.
+    Returns:
+        List of problems as (infinitive, message) tuples. Empty if all recorded pages parsed as expected.
+    '''
+    expected = {}
+    with open(card_bank_table, "r", encoding="utf-8") as csvf:
+        for card in csv.DictReader(csvf):
+            tense_maps = sources.from_card(card)
+            if tense_maps:
+                expected[card["inf"]] = tense_maps
+    problems = []
+    for infinitive in recorded_pages(pages):
+        with open(os.path.join(pages, "{0}.html".format(infinitive)), "r", encoding="utf-8") as inf:
+            page = inf.read()
+        try:
+            result = builder.parse_page(page, infinitive)
+        except Exception as e:
+            problems.append((infinitive, str(e)))
+            continue
+        if infinitive in FIXTURE_INVALID:
+            if not isinstance(result, Warning):
+                problems.append((infinitive, "expected invalid infinitive warning"))
+        elif isinstance(result, Warning):
+            problems.append((infinitive, "unexpected warning: {0}".format(result)))
+        elif infinitive in expected:
+            differences = sources.compare(result, expected[infinitive])
+            if differences:
+                tense, person, form, card_form = differences[0]
+                problems.append((infinitive, "{0} form(s) differ from card bank, e.g. {1} {2}: {3} (card: {4})".format(
+                    len(differences), TENSE_NAMES.get(tense, tense), person or "", form, card_form
+                )))
+    return problems
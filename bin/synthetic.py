@@ -0,0 +1,106 @@
+from .constants import BASIC_FIELDS, FIELDS
+from . import cardbank, builder, sources
+import os, csv, random
+
+
+# syllables for made up stems, and prefixes added to real verbs (for irregular forms, e.g. 'desfazer')
+_ONSETS = ("b", "c", "d", "f", "g", "l", "m", "n", "p", "r", "s", "t", "v", "br", "cr", "pl", "tr", "ch", "lh", "nh")
+_VOWELS = ("a", "e", "i", "o", "u")
+_CODAS = ("", "", "", "n", "r", "s", "l")
+_PREFIXES = ("des", "re", "pre", "con", "sobre", "entre", "contra", "trans", "inter", "sub")
+
+
+def _stem(rng):
+    syllables = rng.choice((1, 2, 2, 2, 3, 3))
+    return "".join(rng.choice(_ONSETS) + rng.choice(_VOWELS) + rng.choice(_CODAS) for _ in range(syllables))
+
+
+def generate(num_verbs, card_bank_basic="bank/card-bank-basic.csv", card_bank_built="bank/card-bank-built.csv",
+             similar_table="bank/card-bank-similar.csv", seed=None, irregular=0.15):
+    '''Generate synthetic card bank of any size, with the same distributions as the real card bank: verb
+    endings, irregular verbs, English definitions (number of forms, hints, etc.), and similar group sizes.
+    Real verbs are all included (as many as fit), made up regular verbs are conjugated by rule, and made up
+    irregular verbs are real verbs with a prefix (e.g. 'desfazer').
+    Params:
+        num_verbs (int): Number of verbs.
+        card_bank_basic (str, optional): Real basic card bank CSV, to sample English definitions from.
+        card_bank_built (str, optional): Real built card bank CSV, to take real (and prefixed) verbs from.
+        similar_table (str, optional): Real similars CSV, to sample similar group sizes from.
+        seed (int, optional): Random seed. Same seed and sizes always give the same card bank.
+        irregular (float, optional): Fraction of made up verbs which are prefixed real verbs.
+    Returns:
+        Tuple of built cards (list[dict], as read from built CSV without building forms) and similar groups
+        (list[list[str]]). Basic cards are the same with only `BASIC_FIELDS`.
+    '''
+    rng = random.Random(seed)
+    basic = cardbank.read(card_bank_basic, build_forms=False)
+    built = cardbank.read(card_bank_built, build_forms=False)
+    groups = cardbank.read_similars(similar_table)
+
+    # real verbs first, always keeping 'estar' and 'ir' which card bank requires
+    cards = [card for card in built if card["inf"] in ("estar", "ir")]
+    others = [card for card in built if card["inf"] not in ("estar", "ir")]
+    rng.shuffle(others)
+    cards += others[:max(0, num_verbs - len(cards))]
+    used = set(card["inf"] for card in cards)
+
+    rules = sources.RulesSource(exceptions=set())
+    endings = [card["inf"][-2:] for card in basic if card["inf"][-2:] in ("ar", "er", "ir")]
+    while len(cards) < num_verbs:
+        definition = rng.choice(basic)
+        if rng.random() < irregular:
+            real = rng.choice(built)
+            prefix = rng.choice(_PREFIXES)
+            infinitive = prefix + real["inf"]
+            if infinitive in used:
+                continue
+            card = {field: real[field] for field in FIELDS}
+            card.update({field: definition[field] for field in BASIC_FIELDS})
+            card["inf"] = infinitive
+            for field in builder.BUILT_FIELDS:
+                card[field] = "/".join(prefix + form for form in real[field].split("/"))
+        else:
+            infinitive = _stem(rng) + rng.choice(endings)
+            tense_maps = rules.fetch(infinitive)
+            if infinitive in used or not tense_maps:
+                continue
+            card = {field: definition[field] for field in BASIC_FIELDS}
+            card["inf"] = infinitive
+            builder.build(card, tense_maps)
+        used.add(infinitive)
+        cards.append(card)
+
+    # similar groups, about as many per verb as in real card bank
+    infinitives = [card["inf"] for card in cards]
+    sizes = [len(group) for group in groups if len(group) > 1] or [2]
+    num_groups = round(len(groups)*len(cards)/max(len(built), 1))
+    similars = [
+        group for group in groups if all(inf in used for inf in group)
+    ][:num_groups]
+    while len(similars) < num_groups:
+        similars.append(rng.sample(infinitives, k=min(rng.choice(sizes), len(infinitives))))
+    return cards, similars
+
+
+def write(cards, similars, directory):
+    '''Write synthetic card bank (see `generate()`) as card bank CSVs in directory: card-bank-basic.csv,
+    card-bank-built.csv, and card-bank-similar.csv.
+    Returns:
+        Tuple of filepaths of basic, built, and similar CSVs.
+    '''
+    os.makedirs(directory, exist_ok=True)
+    paths = tuple(
+        os.path.join(directory, name)
+        for name in ("card-bank-basic.csv", "card-bank-built.csv", "card-bank-similar.csv")
+    )
+    with open(paths[0], "w", newline="", encoding="utf-8") as csvf:
+        writer = csv.DictWriter(csvf, fieldnames=BASIC_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(cards)
+    with open(paths[1], "w", newline="", encoding="utf-8") as csvf:
+        writer = csv.DictWriter(csvf, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(cards)
+    with open(paths[2], "w", newline="", encoding="utf-8") as csvf:
+        csv.writer(csvf).writerows(similars)
+    return paths
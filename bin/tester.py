@@ -1,14 +1,23 @@
 from .constants import *
-from .misc import pick_one, compare_faster
+from .misc import compare_faster, compile_hint_rules
+from .lookup import describe, ENG_FIELD_NAMES
+from . import fuzzy
 from . import ask
-import random
+import time, random, functools
 
 
-def random_parameters(exclude_tenses=None):
+# compiled prompt and answer templates kept (by question slot and verb forms), see `_compile_to_portuguese()`
+_TEMPLATE_CACHE_SIZE = 1 << 16
+
+
+def random_parameters(exclude_tenses=None, rng=random, tense_weights=None):
     '''Gets random parameters for verb form.
     Params:
         exclude_tenses (list[constant.TENSE], optional): If supplied, excludes these tenses from 
         consideration. Note if everything is excluded, then defaults to infintive.
+        rng (random.Random, optional): Random generator to use. Defaults to the `random` module.
+        tense_weights (list[float], optional): If supplied, multiplies default tense weights by these (in order 
+            of `TENSE_VALUES`), e.g. to test weak tenses more often (see `analytics.AdaptiveWeights`).
     Returns:
         Dict with verb form parameters.
         - tense (constants.TENSE): Verb tense. Weighted to prefer certain tenses.
@@ -17,21 +26,23 @@ def random_parameters(exclude_tenses=None):
           form can result in Portuguese 'você[s]' in returned pronouns, which in to-English questions must be 
           translated to 2nd person.
     '''
-    tense_weights = list(DEFAULT_TENSE_WEIGHTS)
+    if tense_weights:
+        tense_weights = [weight*factor for weight, factor in zip(DEFAULT_TENSE_WEIGHTS, tense_weights)]
+    else:
+        tense_weights = list(DEFAULT_TENSE_WEIGHTS)
     if exclude_tenses:
         for exclude in exclude_tenses:
             tense_weights[TENSE_VALUES.index(exclude)] = 0
-        weight_vals = tuple(set(tense_weights))
-        if len(weight_vals) == 1 and weight_vals[0] == 0:
-            weight_vals[0] = 1
-    tense = random.choices(TENSE_VALUES, weights=tense_weights, k=1)[0]
+        if not any(tense_weights):
+            tense_weights[TENSE_VALUES.index(TENSE.INFINITIVE)] = 1
+    tense = rng.choices(TENSE_VALUES, weights=tense_weights, k=1)[0]
     if tense == TENSE.INFINITIVE:
         return {
             "tense": tense, 
             "singular": True, 
             "person": PERSON.FIRST
         }
-    singular = bool(random.getrandbits(1))
+    singular = bool(rng.getrandbits(1))
     pweights = [3,1,4]
     # 1st person singular imperative doesn't make sense
     if singular and (tense == TENSE.IMPERATIVE_AFM or tense == TENSE.IMPERATIVE_NEG):
@@ -39,11 +50,11 @@ def random_parameters(exclude_tenses=None):
     return {
         "tense": tense, 
         "singular": singular, 
-        "person": random.choices(PERSON_VALUES, weights=pweights, k=1)[0]
+        "person": rng.choices(PERSON_VALUES, weights=pweights, k=1)[0]
     }
 
 
-def get_params(no_repeats=None, exclude_tenses=None):
+def get_params(no_repeats=None, exclude_tenses=None, rng=random, tense_weights=None):
     '''Get random parameters, with special constraints. Attempts to find unique parameters that satisfy these
     constraints in eight attempts, after which returns whatever latest parameters were, to avoid potential 
     infinite loop if constraints are too strict.
@@ -51,18 +62,36 @@ def get_params(no_repeats=None, exclude_tenses=None):
         no_repeats (list[dict], optional): List of existing parameters. If supplied, 
         exclude_tenses (list[constant.TENSE], optional): If supplied, excludes these tenses from 
         consideration. Note if everything is excluded, then defaults to infintive.
+        rng (random.Random, optional): Random generator to use. Defaults to the `random` module.
+        tense_weights (list[float], optional): If supplied, adjusts tense weights. See `random_parameters()`.
     Returns:
         Dict with verb form parameters. See documentation for `random_parameters()` for details.
     '''
     variations = 8
     while variations > 0:
-        params = random_parameters(exclude_tenses=exclude_tenses)
+        params = random_parameters(exclude_tenses=exclude_tenses, rng=rng, tense_weights=tense_weights)
         variations -= 1
         if params and (not no_repeats or params not in no_repeats):
             break
     return params
 
 
+def get_tense_group(names):
+    '''Get tenses for tense group names, as used in the `-tense` option.
+    Params:
+        names (list[str]): Tense group names, e.g. 'present' or 'past'. See `constants.TENSE_GROUPS`.
+    Returns:
+        Tuple of tenses (constants.TENSE) in any of the groups.
+    '''
+    tense_group = []
+    for name in names:
+        group = getattr(TENSE_GROUPS, name.strip().upper(), None)
+        if not group:
+            raise Exception("Bad argument. Could not understand or recognize given tenses: {0}".format(", ".join(names)))
+        tense_group += group
+    return tuple(sorted(set(tense_group)))
+
+
 def get_exclude_tenses(card, append_to=None):
     '''Get list of tenses to exclude. This is used to handle special cases of words that don't make sense in 
     certain tenses. E.g. 'poder' (to be) in imperative.
@@ -85,7 +114,7 @@ def get_exclude_tenses(card, append_to=None):
     return exclude_tenses
 
 
-def question(cardbank, card, params, to_english):
+def question(cardbank, card, params, to_english, time_limit=None):
     '''Ask question. Use this function as entry point to ask question.
     Params:
         cardbank (CardBank): CardBank instance.
@@ -93,6 +122,8 @@ def question(cardbank, card, params, to_english):
         params (dict): Verb form parameters with values for "person" (constants.PERSON), "singular" (bool), 
             and "tense" (constants.TENSE).
         to_english (bool): True is asking Portuguese-to-English translation. False for reverse.
+        time_limit (float, optional): If supplied, seconds allowed to answer (each try), after which answer 
+            is wrong.
     Returns:
         Results dict. See documentation for `english_to_portuguese()` or 
         `portuguese_to_english()` for details (same keys but slightly different value types).
@@ -104,23 +135,68 @@ def question(cardbank, card, params, to_english):
         tense=params["tense"], 
         similars=(not to_english)
     )
-    return _question(verbs, to_english)
+    return _question(verbs, to_english, cardbank=cardbank, time_limit=time_limit)
+
+
+def ask_question(cardbank, verbs, to_english, time_limit=None):
+    '''Ask question for verbs already picked, e.g. with `prepare_question()`. See `question()`.'''
+    return _question(verbs, to_english, cardbank=cardbank, time_limit=time_limit)
+
+
+def prepare_question(cardbank, card, params, to_english, rng=random):
+    '''Build question without asking it.
+    Params:
+        cardbank (CardBank): CardBank instance.
+        card (dict): Word/card definition from CardBank.
+        params (dict): Verb form parameters. See `question()`.
+        to_english (bool): True is asking Portuguese-to-English translation. False for reverse.
+        rng (random.Random, optional): Random generator to use. Defaults to the `random` module.
+    Returns:
+        Tuple of verbs dict (see `cardbank.get_verbs()`) and prompt dict (see 
+        `english_to_portuguese_prompt()`). Note verbs dict may have adjusted form parameters.
+    '''
+    verbs = cardbank.get_verbs(
+        card, 
+        person=params["person"], 
+        singular=params["singular"], 
+        tense=params["tense"], 
+        similars=(not to_english), 
+        rng=rng
+    )
+    if to_english:
+        prompt = portuguese_to_english_prompt(verbs, rng=rng)
+    else:
+        prompt = english_to_portuguese_prompt(verbs, rng=rng)
+    return verbs, prompt
 
 
-def _question(verbs, to_english, dont_check_similars=False):
+def _question(verbs, to_english, dont_check_similars=False, cardbank=None, dont_check_typos=False, 
+              time_limit=None):
     '''Ask question. Split out to make recursion safe (logically, anyways). If the answer is deemed to be 
-    wrong but understandable mistake with synonym, re-asks the question (only applies to questions in English-
-    to-Portuguese).
+    wrong but understandable mistake with synonym (only applies to questions in English-to-Portuguese) or 
+    looks like a typo of the answer, re-asks the question once.
     Params:
         verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
         to_english (bool): True is asking Portuguese-to-English translation. False for reverse.
         dont_check_similars (bool): If True, doesn't allow mistakes for Portuguese synonyms. Only applicable 
             in English-to-Portuguese translations.
+        cardbank (CardBank, optional): If supplied, wrong Portuguese answers are looked up to explain which 
+            verb form was given instead.
+        dont_check_typos (bool): If True, doesn't allow another try for answers that look like a typo.
+        time_limit (float, optional): If supplied, seconds allowed to answer (each try).
     Returns:
         Results dict. See documentation for `english_to_portuguese()` or 
-        `portuguese_to_english()` for details (same keys but slightly different value types).
+        `portuguese_to_english()` for details (same keys but slightly different value types). Time includes 
+        all tries.
     '''
-    result = portuguese_to_english(verbs) if to_english else english_to_portuguese(verbs)
+    if to_english:
+        result = portuguese_to_english(verbs, time_limit=time_limit)
+    else:
+        result = english_to_portuguese(verbs, time_limit=time_limit)
+
+    if result["timed_out"]:
+        print("Out of time! The answer is: " + answer_formatted(verbs, result["answers"], to_english))
+        return result
 
     if result["correct"]:
         if to_english or result["guess"] in result["answers"]:
@@ -141,16 +217,100 @@ def _question(verbs, to_english, dont_check_similars=False):
         if err_similar:
             print("Close! But you may be confusing the word with a similar synonym.")
             print("Check the hint (if available) and try again!")
-            return _question(verbs, to_english, dont_check_similars=True)
+            return _retry(result, verbs, to_english, dont_check_similars=True, cardbank=cardbank, 
+                          dont_check_typos=dont_check_typos, time_limit=time_limit)
+
+    # a real form of another verb or slot is a mix-up, not a typo
+    diagnosis = None
+    if cardbank:
+        if to_english:
+            diagnosis = diagnose_english(cardbank, verbs, result["guess"])
+        else:
+            diagnosis = diagnose_form(cardbank, verbs, result["guess"])
+        if diagnosis:
+            print(diagnosis)
+
+    if not diagnosis and not dont_check_typos:
+        if to_english:
+            answers = english_answers(verbs)
+            index = None
+        else:
+            answers = result["answers"]
+            # searched a word at a time through the form index, a full near-match index is slow to build
+            index = cardbank.get_form_index() if cardbank else None
+        classification, matches = fuzzy.classify(answers, result["guess"], index=index)
+        if classification == "typo":
+            print("Close! But that looks like a typo. Check your spelling and try again!")
+            return _retry(result, verbs, to_english, dont_check_similars=dont_check_similars, cardbank=cardbank, 
+                          dont_check_typos=True, time_limit=time_limit)
+        if classification == "near":
+            distance, form, entries = matches[0]
+            print("That is close to '{0}', the {1}.".format(form, describe(entries[0])))
 
     print("Wrong! The answer is: " + answer_formatted(verbs, result["answers"], to_english))
     return result
 
 
-def english_to_portuguese(verbs):
+def _retry(result, verbs, to_english, **kwargs):
+    '''Ask question again, adding time taken on first try.'''
+    retry = _question(verbs, to_english, **kwargs)
+    retry["time"] += result["time"]
+    return retry
+
+
+def diagnose_form(cardbank, verbs, guess):
+    '''Explain a wrong Portuguese answer if it is a valid form of some verb in the card bank.
+    Params:
+        cardbank (CardBank): CardBank instance.
+        verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+        guess (str): User inputted guess.
+    Returns:
+        String explanation or None if guess is not a known verb form.
+    '''
+    entries = cardbank.get_form_index().lookup(guess)
+    if not entries:
+        return None
+    # prefer explaining a mix-up of the same verb
+    infinitive = verbs["portuguese"]["infinitive"]
+    same_verb = [entry for entry in entries if entry[0] == infinitive]
+    if same_verb:
+        return "You gave the {0}.".format(describe(same_verb[0]))
+    return "You gave the {0}.".format(describe(entries[0]))
+
+
+def english_answers(verbs):
+    '''Get all accepted English verb forms (without pronouns or aux. verbs) for question.'''
+    return verbs["english"]["verbs"] + tuple(verbs["english"].get("verbs-past-alt", tuple()))
+
+
+def diagnose_english(cardbank, verbs, guess):
+    '''Explain a wrong English answer if it is another form of the same verb, e.g. 'walks' for 'walk', so it 
+    isn't taken as a typo. Compared against the same number of trailing words, as in `fuzzy.is_typo()`.
+    Params:
+        cardbank (CardBank): CardBank instance.
+        verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+        guess (str): User inputted guess.
+    Returns:
+        String explanation or None if guess is not another form of the verb.
+    '''
+    card = cardbank.get(verbs["portuguese"]["infinitive"])
+    answers = set(fuzzy.fold(answer) for answer in english_answers(verbs))
+    guess_words = fuzzy.fold(guess).split(" ")
+    for field, name in ENG_FIELD_NAMES:
+        for form in card[field]:
+            form = fuzzy.fold(form)
+            if not form or form in answers:
+                continue
+            if " ".join(guess_words[-len(form.split(" ")):]) == form:
+                return "You gave the {0} of 'to {1}'.".format(name, card["eng-inf"][0])
+    return None
+
+
+def english_to_portuguese(verbs, time_limit=None):
     '''Ask question for Portuguese translation of English word.
     Params:
         verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+        time_limit (float, optional): If supplied, seconds allowed to answer, after which answer is wrong.
     Returns:
         Results dict.
         - person (constants.PERSON): Person.
@@ -159,6 +319,36 @@ def english_to_portuguese(verbs):
         - answers (tuple[str]): The correct answers (most of the time just one, but sometimes alt. spelling).
         - guess (str): User inputted guess (stripped and lowercased).
         - correct (bool): Whether answer was accepted.
+        - time (float): Seconds taken to answer.
+        - timed_out (bool): True if out of time (guess is empty).
+    '''
+    prompt = english_to_portuguese_prompt(verbs)
+    return _ask_timed(verbs, prompt, to_english=False, time_limit=time_limit)
+
+
+def _ask_timed(verbs, prompt, to_english, time_limit=None):
+    '''Ask prompt and grade answer, timing how long it took.'''
+    start = time.perf_counter()
+    if time_limit:
+        guess = ask.timed(question=prompt["prompt"], same_line=True, seconds=time_limit)
+    else:
+        guess = ask.basic(question=prompt["prompt"], same_line=True, allow_empty=False)
+    elapsed = time.perf_counter() - start
+    result = grade(verbs, guess or "", to_english=to_english)
+    result["time"] = elapsed
+    result["timed_out"] = guess is None
+    return result
+
+
+def english_to_portuguese_prompt(verbs, rng=random):
+    '''Build question prompt for Portuguese translation of English word, without asking it.
+    Params:
+        verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+        rng (random.Random, optional): Random generator to use. Defaults to the `random` module.
+    Returns:
+        Prompt dict.
+        - prompt (str): Prompt text, ending with the Portuguese pronoun (if any) the answer follows.
+        - show_hint (bool): Whether hint is shown in prompt.
     '''
     # get english verb forms
     if verbs["tense"] == TENSE.IMPERFECT:
@@ -166,82 +356,120 @@ def english_to_portuguese(verbs):
         pick_from = verbs["english"]["infinitive"]
     else:
         pick_from = verbs["english"]["verbs"]
+    past_alt = None
+    if verbs["tense"] == TENSE.IMPERFECT or verbs["tense"] == TENSE.PERFECT:
+        past_alt = _choices(verbs["english"]["verbs-past-alt"])
+    choices, formats, show_hints = _compile_to_portuguese(
+        verbs["tense"], 
+        verbs["person"], 
+        verbs["singular"], 
+        verbs["portuguese"]["infinitive"], 
+        verbs["english"]["pronoun"], 
+        verbs["portuguese"]["pronoun"], 
+        _choices(pick_from), 
+        verbs["hint"], 
+        _hint_mask(verbs), 
+        verbs["use-eng-defs"]
+    )
+    i = _pick(choices, rng)
+    qverb = choices[i]
+    if past_alt:
+        # imperfect and perfect ask with alternate past form (e.g. "used to ---" or "had ---")
+        qverb = past_alt[_pick(past_alt, rng)]
+    return {
+        "prompt":    formats[i].format(qverb), 
+        "show_hint": show_hints[i]
+    }
+
+
+def _choices(forms):
+    return (forms,) if isinstance(forms, str) else tuple(forms)
+
+
+def _pick(choices, rng):
+    '''Pick index of choice, drawing from rng the same way as `misc.pick_one()`.'''
+    return 0 if len(choices) == 1 else rng.randrange(len(choices))
+
+
+def _hint_mask(verbs):
+    mask = verbs.get("hint-mask")
+    return compile_hint_rules(verbs["hint-rules"]) if mask is None else mask
+
+
+def _escape(text):
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+@functools.lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _compile_to_portuguese(tense, person, singular, infinitive, eng_pronoun, pronoun, pick_from, hint, hint_mask, 
+                           use_eng_defs):
+    '''Compile English-to-Portuguese prompt for question slot, so asking it again is a lookup and a format.
+    Returns:
+        Tuple of English verb choices (tuple[str]), and for each choice, prompt format string (with English 
+        verb as "{0}") and whether hint is shown.
+    '''
     # certain english definitions are for answers only, remove from question construction choices
-    if verbs["use-eng-defs"] and verbs["use-eng-defs"] < len(pick_from):
-        pick_from = pick_from[:verbs["use-eng-defs"]]
-    qverb = pick_one(pick_from)
-
-    show_hint = False
-    if verbs["hint"] and "from-eng" in verbs["hint-rules"]:
-        # check index-selective rules
-        index_selective = False
-        qindex = pick_from.index(qverb)
-        for i, order in enumerate(("first", "second", "third")):
-            if "{0}-def".format(order) in verbs["hint-rules"]:
-                index_selective = True
-                if i == qindex:
-                    show_hint = True
-            if show_hint and index_selective:
-                break
-        # just generically show hint if no index-selective rule
-        if not index_selective:
-            show_hint = True
+    if use_eng_defs and use_eng_defs < len(pick_from):
+        pick_from = pick_from[:use_eng_defs]
+
+    show_hints = []
+    for qverb in pick_from:
+        show_hint = False
+        if hint and hint_mask & HINT_RULE.FROM_ENG:
+            qindex = pick_from.index(qverb)
+            # if index-selective rules, only show for those definitions, otherwise just generically show hint
+            if not any(hint_mask & rule for rule in HINT_RULE_DEFS):
+                show_hint = True
+            elif qindex < len(HINT_RULE_DEFS) and hint_mask & HINT_RULE_DEFS[qindex]:
+                show_hint = True
+        show_hints.append(show_hint)
 
-    prefix = [verbs["english"]["pronoun"]]
-    answer_prefix = verbs["portuguese"]["pronoun"]
-    if verbs["tense"] == TENSE.INFINITIVE:
+    prefix = [eng_pronoun]
+    answer_prefix = pronoun
+    if tense == TENSE.INFINITIVE:
         prefix = ["to"]
         answer_prefix = False
-    elif verbs["tense"] == TENSE.IMPERFECT:
+    elif tense == TENSE.IMPERFECT:
         # use "used to ---" (with infinitive) form of imperfect
         prefix.append("used to")
-        qverb = pick_one(verbs["english"]["verbs-past-alt"])
-    elif verbs["tense"] == TENSE.PERFECT:
+    elif tense == TENSE.PERFECT:
         # use "had ---" (with past perfect) form of perfect
         # prevent special, weird case of had-had
-        if verbs["portuguese"]["infinitive"] not in ("ter", "haver"):
+        if infinitive not in ("ter", "haver"):
             prefix.append("had")
-        qverb = pick_one(verbs["english"]["verbs-past-alt"])
-    elif verbs["tense"] == TENSE.FUTURE_SIMPLE:
-        if not verbs["singular"] or verbs["person"] == PERSON.SECOND:
+    elif tense == TENSE.FUTURE_SIMPLE:
+        if not singular or person == PERSON.SECOND:
             prefix.append("are")
-        elif verbs["person"] == PERSON.FIRST:
+        elif person == PERSON.FIRST:
             prefix.append("am")
         else:
             prefix.append("is")
         prefix.append("going to")
-    elif verbs["tense"] == TENSE.FUTURE_FORMAL:
+    elif tense == TENSE.FUTURE_FORMAL:
         prefix.append("will")
-    elif verbs["tense"] == TENSE.FUTURE_COND:
+    elif tense == TENSE.FUTURE_COND:
         prefix.append("would")
-    elif verbs["tense"] == TENSE.IMPERATIVE_AFM:
+    elif tense == TENSE.IMPERATIVE_AFM:
         prefix.append("must")
-    elif verbs["tense"] == TENSE.IMPERATIVE_NEG:
+    elif tense == TENSE.IMPERATIVE_NEG:
         prefix.append("must not")
-        answer_prefix += "não"
-    prompt = "{0} {1} {2}> {3}".format(
-        " ".join(prefix), 
-        qverb, 
-        "({0}) ".format(verbs["hint"]) if show_hint else "", 
-        answer_prefix + " " if answer_prefix else  ""
+        answer_prefix += " não"
+    formats = tuple(
+        "{0} {{0}} {1}> {2}".format(
+            _escape(" ".join(prefix)), 
+            _escape("({0}) ".format(hint)) if show_hint else "", 
+            _escape(answer_prefix + " ") if answer_prefix else  ""
+        )
+        for show_hint in show_hints
     )
-    guess = ask.basic(question=prompt, same_line=True, allow_empty=False)
-
-    return {
-        "person":   verbs["person"], 
-        "singular": verbs["singular"], 
-        "plural":   verbs["plural"], 
-        "tense":    verbs["tense"], 
-        "answers":  verbs["portuguese"]["verbs"], 
-        "guess":    guess, 
-        "correct":  compare_faster(verbs["portuguese"]["verbs"], guess)
-    }
+    return pick_from, formats, tuple(show_hints)
 
 
-def portuguese_to_english(verbs):
+def portuguese_to_english(verbs, time_limit=None):
     '''Ask question for English translation of Portuguese word.
     Params:
         verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+        time_limit (float, optional): If supplied, seconds allowed to answer, after which answer is wrong.
     Returns:
         Results dict.
         - person (constants.PERSON): Person.
@@ -250,69 +478,128 @@ def portuguese_to_english(verbs):
         - answers (tuple[str]): The correct answers (can be more than one possible translation).
         - guess (str): User inputted guess (stripped and lowercased).
         - correct (bool): Whether answer was accepted.
+        - time (float): Seconds taken to answer.
+        - timed_out (bool): True if out of time (guess is empty).
     '''
-    show_hint = False
-    if verbs["hint"] and "to-eng" in verbs["hint-rules"]:
-        show_hint = True
+    prompt = portuguese_to_english_prompt(verbs)
+    return _ask_timed(verbs, prompt, to_english=True, time_limit=time_limit)
+
 
+def portuguese_to_english_prompt(verbs, rng=random):
+    '''Build question prompt for English translation of Portuguese word, without asking it.
+    Params:
+        verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+        rng (random.Random, optional): Random generator to use. Defaults to the `random` module.
+    Returns:
+        Prompt dict. See `english_to_portuguese_prompt()`.
+    '''
+    choices, prompt_format, show_hint = _compile_to_english(
+        verbs["tense"], 
+        verbs["portuguese"]["infinitive"], 
+        verbs["portuguese"]["pronoun"], 
+        verbs["english"]["pronoun"], 
+        _choices(verbs["portuguese"]["verbs"]), 
+        verbs["hint"], 
+        _hint_mask(verbs)
+    )
+    return {
+        "prompt":    prompt_format.format(choices[_pick(choices, rng)]), 
+        "show_hint": show_hint
+    }
+
+
+@functools.lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _compile_to_english(tense, infinitive, pronoun, eng_pronoun, portuguese_verbs, hint, hint_mask):
+    '''Compile Portuguese-to-English prompt for question slot, so asking it again is a lookup and a format.
+    Returns:
+        Tuple of Portuguese verb choices (tuple[str]), prompt format string (with Portuguese verb as "{0}"), 
+        and whether hint is shown.
+    '''
+    show_hint = bool(hint and hint_mask & HINT_RULE.TO_ENG)
+    hint_text = _escape("({0}) ".format(hint)) if show_hint else ""
+    if tense == TENSE.INFINITIVE:
+        return (infinitive,), "{{0}} {0}> to ".format(hint_text), show_hint
+    prompt_format = "{0} {{0}} {1}> {2} ".format(_escape(pronoun), hint_text, _escape(eng_pronoun))
+    return portuguese_verbs, prompt_format, show_hint
+
+
+def _english_aux_verbs(verbs):
+    '''Get aux. verbs accepted before the English verb form.
+    Params:
+        verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+    Returns:
+        Tuple of (aux_verbs, aux_verbs_alt, special_case_aux). Aux. verbs are a tuple of accepted words at 
+        each position, or None if not applicable. Special case aux. is the alternate past form prefix ("had" 
+        or "used to") or None.
+    '''
     aux_verbs = None
     aux_verbs_alt = None
-    special_case_past = False # for possible alternate forms ("had ---" or "used to ---")
-
-    if verbs["tense"] == TENSE.INFINITIVE:
-        prompt = "{0} {1}> to ".format(
-            verbs["portuguese"]["infinitive"], 
-            "({0}) ".format(verbs["hint"]) if show_hint else ""
-        )
-    else:
-        if verbs["tense"] == TENSE.IMPERFECT:
-            special_case_past = True
-            special_case_aux = "used to"
-            aux_verbs = tuple()
-            aux_verbs_alt = (("used",),("to",))
-        elif verbs["tense"] == TENSE.PERFECT:
-            special_case_past = True
-            special_case_aux = "had"
-            aux_verbs = tuple()
-            if verbs["singular"] and verbs["person"] == PERSON.THIRD:
-                aux_verbs_alt = (("has","had"),)
+    special_case_aux = None # for possible alternate forms ("had ---" or "used to ---")
+    if verbs["tense"] == TENSE.IMPERFECT:
+        special_case_aux = "used to"
+        aux_verbs = tuple()
+        aux_verbs_alt = (("used",),("to",))
+    elif verbs["tense"] == TENSE.PERFECT:
+        special_case_aux = "had"
+        aux_verbs = tuple()
+        if verbs["singular"] and verbs["person"] == PERSON.THIRD:
+            aux_verbs_alt = (("has","had"),)
+        else:
+            aux_verbs_alt = (("have","had"),)
+    elif verbs["tense"] == TENSE.FUTURE_SIMPLE or verbs["tense"] == TENSE.FUTURE_FORMAL:
+        aux_verbs = (("will",),)
+        if verbs["tense"] == TENSE.FUTURE_SIMPLE:
+            if not verbs["singular"] or verbs["person"] == PERSON.SECOND:
+                alt_to_be = "are"
+            elif verbs["person"] == PERSON.FIRST:
+                alt_to_be = "am"
             else:
-                aux_verbs_alt = (("have","had"),)
-        elif verbs["tense"] == TENSE.FUTURE_SIMPLE or verbs["tense"] == TENSE.FUTURE_FORMAL:
-            aux_verbs = (("will",),)
-            if verbs["tense"] == TENSE.FUTURE_SIMPLE:
-                if not verbs["singular"] or verbs["person"] == PERSON.SECOND:
-                    alt_to_be = "are"
-                elif verbs["person"] == PERSON.FIRST:
-                    alt_to_be = "am"
-                else:
-                    alt_to_be = "is"
-                aux_verbs_alt = ((alt_to_be,),("going",),("to",))
-        elif verbs["tense"] == TENSE.FUTURE_COND:
-            aux_verbs = (("would"),)
-        elif verbs["tense"] == TENSE.IMPERATIVE_AFM:
-            aux_verbs = (("must","should"),)
-        elif verbs["tense"] == TENSE.IMPERATIVE_NEG:
-            aux_verbs = (("must","should"),("not",))
-            aux_verbs_alt = (("mustn't","shouldn't"),)
-
-        prompt = "{0} {1} {2}> {3} ".format(
-            verbs["portuguese"]["pronoun"], 
-            pick_one(verbs["portuguese"]["verbs"]), 
-            "({0}) ".format(verbs["hint"]) if show_hint else "", 
-            verbs["english"]["pronoun"]
-        )
-        
-    guess = ask.basic(question=prompt, same_line=True, allow_empty=False)
-
-    if special_case_past:
-        answers = []
-        for i in range(len(verbs["english"]["verbs"])):
-            aform = verbs["english"]["verbs"][i]
-            aform += " / {0} {1}".format(special_case_aux, verbs["english"]["verbs-past-alt"][i])
-            answers.append(aform)
-    else:
-        answers = verbs["english"]["verbs"]
+                alt_to_be = "is"
+            aux_verbs_alt = ((alt_to_be,),("going",),("to",))
+    elif verbs["tense"] == TENSE.FUTURE_COND:
+        aux_verbs = (("would"),)
+    elif verbs["tense"] == TENSE.IMPERATIVE_AFM:
+        aux_verbs = (("must","should"),)
+    elif verbs["tense"] == TENSE.IMPERATIVE_NEG:
+        aux_verbs = (("must","should"),("not",))
+        aux_verbs_alt = (("mustn't","shouldn't"),)
+    return aux_verbs, aux_verbs_alt, special_case_aux
+
+
+def get_answers(verbs, to_english):
+    '''Get correct answers, as shown to user.
+    Params:
+        verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+        to_english (bool): True for English answers. False for Portuguese.
+    Returns:
+        Tuple of correct answers. For perfect and imperfect tenses in English, each answer includes the 
+        alternate "had ---" or "used to ---" form.
+    '''
+    if not to_english:
+        return verbs["portuguese"]["verbs"]
+    special_case_aux = _english_aux_verbs(verbs)[2]
+    if not special_case_aux:
+        return verbs["english"]["verbs"]
+    answers = []
+    alt_forms = verbs["english"]["verbs-past-alt"]
+    for i in range(len(verbs["english"]["verbs"])):
+        aform = verbs["english"]["verbs"][i]
+        # alternate forms may not have the same number of translations
+        aform += " / {0} {1}".format(special_case_aux, alt_forms[i] if i < len(alt_forms) else alt_forms[-1])
+        answers.append(aform)
+    return answers
+
+
+def check_english(verbs, guess):
+    '''Check English translation guess, accepting alternate aux. verbs.
+    Params:
+        verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+        guess (str): User inputted guess (stripped and lowercased).
+    Returns:
+        True if guess is accepted.
+    '''
+    aux_verbs, aux_verbs_alt, special_case_aux = _english_aux_verbs(verbs)
+    special_case_past = bool(special_case_aux)
 
     correct = False
     if not aux_verbs:
@@ -343,13 +630,28 @@ def portuguese_to_english(verbs):
                 correct = compare_faster(verbs["english"]["verbs-past-alt"], " ".join(response_parts))
             else:
                 correct = compare_faster(verbs["english"]["verbs"], " ".join(response_parts))
+    return correct
+
 
+def grade(verbs, guess, to_english):
+    '''Grade a guess without asking anything.
+    Params:
+        verbs (dict): Verbs dictionary definition. See `cardbank.get_verbs()`.
+        guess (str): User inputted guess (stripped and lowercased).
+        to_english (bool): True if guess is an English translation. False for Portuguese.
+    Returns:
+        Results dict. See documentation for `english_to_portuguese()` or `portuguese_to_english()`.
+    '''
+    if to_english:
+        correct = check_english(verbs, guess)
+    else:
+        correct = compare_faster(verbs["portuguese"]["verbs"], guess)
     return {
         "person":   verbs["person"], 
         "singular": verbs["singular"], 
         "plural":   verbs["plural"], 
         "tense":    verbs["tense"], 
-        "answers":  answers, 
+        "answers":  get_answers(verbs, to_english), 
         "guess":    guess, 
         "correct":  correct
     }
@@ -363,24 +665,61 @@ def answer_formatted(verbs, answers, to_english):
     Returns:
         The string, formatted answer.
     '''
+    pronoun = verbs["english"]["pronoun"] if to_english else verbs["portuguese"]["pronoun"]
+    return _compile_answer(verbs["tense"], pronoun, to_english).format(" (or) ".join(answers))
+
+
+@functools.lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _compile_answer(tense, pronoun, to_english):
+    '''Compile answer format string (with answers as "{0}") for tense and pronoun.'''
+    pronoun = _escape(pronoun)
     if to_english:
-        prefix = verbs["english"]["pronoun"]
-        if verbs["tense"] == TENSE.INFINITIVE:
+        prefix = pronoun
+        if tense == TENSE.INFINITIVE:
             prefix = "to"
-        elif verbs["tense"] == TENSE.FUTURE_SIMPLE or verbs["tense"] == TENSE.FUTURE_FORMAL:
+        elif tense == TENSE.FUTURE_SIMPLE or tense == TENSE.FUTURE_FORMAL:
             prefix += " will"
-        elif verbs["tense"] == TENSE.FUTURE_COND:
+        elif tense == TENSE.FUTURE_COND:
             prefix += " would"
-        elif verbs["tense"] == TENSE.IMPERATIVE_AFM:
+        elif tense == TENSE.IMPERATIVE_AFM:
             prefix += " should"
-        elif verbs["tense"] == TENSE.IMPERATIVE_NEG:
+        elif tense == TENSE.IMPERATIVE_NEG:
             prefix += " should not"
-        return "{0} {1}".format(prefix, " (or) ".join(answers))
+        return prefix + " {0}"
+    if tense == TENSE.INFINITIVE:
+        return "{0}"
+    elif tense == TENSE.IMPERATIVE_NEG:
+        return pronoun + " não {0}"
     else:
-        corrects = " (or) ".join(answers)
-        if verbs["tense"] == TENSE.INFINITIVE:
-            return corrects
-        elif verbs["tense"] == TENSE.IMPERATIVE_NEG:
-            return "{0} não {1}".format(verbs["portuguese"]["pronoun"], corrects)
-        else:
-            return "{0} {1}".format(verbs["portuguese"]["pronoun"], corrects)
+        return pronoun + " {0}"
+
+
+def fluency(timings, slowest=3):
+    '''Summarize answer times over a session.
+    Params:
+        timings (list[dict]): Results dicts (or any dicts with "tense", "person", "singular", and "time").
+        slowest (int, optional): Number of slowest tense/person slots to return.
+    Returns:
+        Tuple of answers per minute (float) and slowest slots, as list of (description, mean seconds, count) 
+        tuples, slowest first.
+    '''
+    total_time = sum(timing["time"] for timing in timings)
+    per_minute = 60*len(timings)/total_time if total_time else 0
+    slots = {}
+    for timing in timings:
+        slot = describe_slot(timing["tense"], timing["person"], timing["singular"])
+        slots.setdefault(slot, []).append(timing["time"])
+    means = [(slot, sum(times)/len(times), len(times)) for slot, times in slots.items()]
+    means.sort(key=lambda mean: mean[1], reverse=True)
+    return per_minute, means[:slowest]
+
+
+def describe_slot(tense, person, singular):
+    '''Describe verb form slot in readable form, e.g. "present 1st person singular".'''
+    if tense == TENSE.INFINITIVE:
+        return "infinitive"
+    return "{0} {1} person {2}".format(
+        TENSE_NAMES[tense].lower().replace("_", " "), 
+        ("1st", "2nd", "3rd")[person-1], 
+        "singular" if singular else "plural"
+    )
@@ -0,0 +1,47 @@
+import html
+
+
+def _prompt_text(question):
+    '''Get prompt text for print, without the input marker.'''
+    return " ".join(question["prompt"].replace(">", " ").split())
+
+
+def render_markdown(title, questions):
+    '''Render worksheet and answer key as Markdown.
+    Params:
+        title (str): Worksheet title, e.g. the student's name.
+        questions (list[dict]): Questions as generated by `deck.generate()`.
+    Returns:
+        Tuple of (worksheet, answer key) strings.
+    '''
+    sheet = ["# {0}".format(title), ""]
+    key = ["# {0} (answer key)".format(title), ""]
+    for n, question in enumerate(questions):
+        prompt = _prompt_text(question)
+        sheet.append("{0}. {1} ____________________".format(n+1, prompt))
+        key.append("{0}. {1}".format(n+1, question["answer-text"]))
+    return "\n".join(sheet) + "\n", "\n".join(key) + "\n"
+
+
+def render_html(title, questions):
+    '''Render worksheet and answer key as HTML pages.
+    Params:
+        title (str): Worksheet title, e.g. the student's name.
+        questions (list[dict]): Questions as generated by `deck.generate()`.
+    Returns:
+        Tuple of (worksheet, answer key) strings.
+    '''
+    page = (
+        "<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>{0}</title></head>\n<body>\n"
+        "<h1>{0}</h1>\n<ol>\n{1}</ol>\n</body>\n</html>\n"
+    )
+    sheet_items = []
+    key_items = []
+    for question in questions:
+        prompt = _prompt_text(question)
+        sheet_items.append("<li>{0} ____________________</li>\n".format(html.escape(prompt)))
+        key_items.append("<li>{0}</li>\n".format(html.escape(question["answer-text"])))
+    return (
+        page.format(html.escape(title), "".join(sheet_items)),
+        page.format(html.escape(title + " (answer key)"), "".join(key_items))
+    )
@@ -1,10 +1,17 @@
-import os, csv, time, shutil
+import os, sys, csv, functools
 from bin import cardbank
 from bin import builder
+from bin import sources
+from bin import pipeline
+from bin.browser import BrowserPool
+from bin import sqlitebank
+from bin import history
+from bin.constants import TENSE_NAMES
 
 
-def add_build(add_cards):
-    '''Build card bank by specifically adding new cards.'''
+def add_build(add_cards, source=None):
+    '''Build card bank by specifically adding new cards. Conjugations come from source (see sources.py), 
+    default chain if not given.'''
 
     # process new cards to add
     if not add_cards:
@@ -18,8 +25,8 @@ def add_build(add_cards):
     if os.path.exists("bank/card-bank-built.csv"):
         card_bank = cardbank.read("bank/card-bank-built.csv", build_forms=False)
 
-    # start HTTP session for reuse
-    session = builder.session()
+    # conjugation sources, cheapest first
+    source = source or sources.make_chain()
 
     print("Building new card bank..")
 
@@ -37,74 +44,66 @@ def add_build(add_cards):
                 # changed, replace with new card definition
                 add_card = add_card_map[card["inf"]]
                 del add_card_map[card["inf"]]
-                _build_card_and_add(add_card, new_card_bank, new_cards, errored, session)
+                _build_card_and_add(add_card, new_card_bank, new_cards, errored, source)
 
         # add all brand new cards
         for inf, card in add_card_map.items():
-            _build_card_and_add(card, new_card_bank, new_cards, errored, session)
+            _build_card_and_add(card, new_card_bank, new_cards, errored, source)
     finally:
-        session.close()
+        source.close()
 
-    finish_build(new_card_bank, new_cards, updated_cards, errored)
+    finish_build(new_card_bank, new_cards, updated_cards, errored, source)
 
 
-def build_from_difference(force_rebuild=[]):
-    '''Build card bank by rectifying differences in card bank basic and built.'''
+def build_from_difference(force_rebuild=[], source=None, workers=4):
+    '''Build card bank by rectifying differences in card bank basic and built. Conjugations come from source 
+    (see sources.py), default chain if not given. Built as a streaming pipeline (see pipeline.py), so cards 
+    are fetched concurrently and written as they're done. A source given should share a browser pool of
+    `workers` browsers, if it uses the website.'''
 
-    # read card bank basic (card bank with all basic definitions but not built out)
-    card_bank_basic = cardbank.read("bank/card-bank-basic.csv", build_forms=False)
-
-    # read existing, card bank built
-    existing = []
+    # existing, card bank built, rows only parsed if needed
+    existing = {}
     if os.path.exists("bank/card-bank-built.csv"):
-        existing = cardbank.read("bank/card-bank-built.csv", build_forms=False)
-    existing_map = {}
-    for card in existing:
-        existing_map[card["inf"]] = card
+        fieldnames, rows = cardbank.read_rows("bank/card-bank-built.csv")
+        existing = {inf: functools.partial(cardbank.parse_row, fieldnames, row, False) for inf, row in rows}
 
-    # start HTTP session for reuse
-    session = builder.session()
+    # conjugation sources, cheapest first, sharing browsers with as many fetches at once (source given is 
+    # bound to its own pool)
+    pool = None
+    if not source:
+        pool = BrowserPool(size=workers)
+        source = sources.make_chain(pool=pool)
     
     print("Building new card bank..")
 
-    # build card bank from card bank basic
-    new_cards = []
-    updated_cards = []
-    new_card_bank = []
-    errored = []
-    for card in card_bank_basic:
-        # if already exists, check if requiring update only (unless in list of force rebuild)
-        if (card["inf"] not in force_rebuild) and (card["inf"] in existing_map):
-            existing_card = existing_map[card["inf"]]
-            # if any of the built fields are different, something's wrong, rebuilt it entirely
-            rebuild = False
-            for field in builder.BUILT_FIELDS:
-                if not field in existing_card or not existing_card[field]:
-                    rebuild = True
-                    break
-            # if not rebuilding, just update the supplied fields, which doesn't affect build fields
-            update = False
-            for field in builder.SUPPLIED_FIELDS:
-                if rebuild:
-                    break
-                if field not in existing_card or existing_card[field] != card[field]:
-                    update = True
-                    existing_card[field] = card[field]
-            # if no rebuild needed, append existing [and updated] card and continue
-            if not rebuild:
-                new_card_bank.append(existing_card)
-                if update:
-                    updated_cards.append(existing_card)
-                continue
-        # if doesn't exist or need rebuilding, rebuild card
-        _build_card_and_add(card, new_card_bank, new_cards, errored, session)
-
-    finish_build(new_card_bank, new_cards, updated_cards, errored)
-
-
-def _build_card_and_add(card, new_card_bank, new_cards, errored, session=None):
-    # get verb tenses
-    tense_map = builder.get(card["inf"], session=session)
+    # build card bank from card bank basic (card bank with all basic definitions but not built out)
+    temp_path = "bank/card-bank-built.csv.{0}.tmp".format(os.getpid())
+    try:
+        with open("bank/card-bank-basic.csv", "r", encoding="utf-8") as basicf, \
+                open(temp_path, "w", newline="", encoding="utf-8") as outf:
+            planned = pipeline.plan(
+                (card for card in csv.DictReader(basicf) if "inf" in card), existing, force_rebuild
+            )
+            new_cards, updated_cards, errored = pipeline.BuildPipeline(source, fetch_workers=workers).run(planned, outf)
+    finally:
+        source.close()
+        if pool:
+            pool.close()
+
+    try:
+        _finish_build(lambda: os.replace(temp_path, "bank/card-bank-built.csv"), new_cards, updated_cards, errored, source)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _build_card_and_add(card, new_card_bank, new_cards, errored, source):
+    # get verb tenses, reporting source failures (e.g. page not served) same as in build pipeline
+    try:
+        tense_map = source.get(card["inf"])
+    except Exception as e:
+        errored.append((card, "{0}: {1}".format(type(e).__name__, e)))
+        return
     # if warning returned, then invalid somehow
     if isinstance(tense_map, Warning):
         errored.append((card, str(tense_map)))
@@ -113,46 +112,148 @@ def _build_card_and_add(card, new_card_bank, new_cards, errored, session=None):
         builder.build(card, tense_map)
         new_card_bank.append(card)
         new_cards.append(card)
-    # don't spam the website
-    time.sleep(1)
 
 
-def finish_build(new_card_bank, new_cards, updated_cards, errored):
+def finish_build(new_card_bank, new_cards, updated_cards, errored, source=None):
     '''Finish build, save card bank, and print information about build.'''
+    def write():
+        with open("bank/card-bank-built.csv", "w", newline="", encoding="utf-8") as csvf:
+            writer = csv.DictWriter(csvf, fieldnames=builder.FIELDS)
+            writer.writeheader()
+            writer.writerows(new_card_bank)
+    _finish_build(
+        write, 
+        [card["inf"] for card in new_cards], 
+        [card["inf"] for card in updated_cards], 
+        [(card["inf"], message) for card, message in errored], 
+        source
+    )
+
+
+def _read_built():
+    with open("bank/card-bank-built.csv", "r", encoding="utf-8") as csvf:
+        for card in csv.DictReader(csvf):
+            yield card
+
+
+def _finish_build(write, new_cards, updated_cards, errored, source=None):
+    '''Save card bank (with write function) and print information about build. Cards given by infinitive.'''
     print("")
 
+    if isinstance(source, sources.SourceChain) and source.mismatches:
+        print("Conjugations different from {0} (check before using):".format(source.verify.name))
+        for inf, name, differences in source.mismatches:
+            print("  {0} ({1}) : {2}".format(inf, name, ", ".join(
+                "{0}{1} {2} != {3}".format(
+                    TENSE_NAMES.get(tense, tense), " " + person if person else "", form_a, form_b
+                ) for tense, person, form_a, form_b in differences
+            )))
+        print("")
+
     if not new_cards and not updated_cards and not errored:
         print("No changes")
         return
     
     if new_cards or updated_cards:
-        # backup
+        # record old version in history, if not already (e.g. edited by hand since last build)
         if os.path.exists("bank/card-bank-built.csv"):
-            shutil.copyfile("bank/card-bank-built.csv", "bank/card-bank-built.bkp.csv")
-            print("Old card bank backed up as: bank/card-bank-built.bkp.csv")
+            history.snapshot("bank/card-bank-built.csv", message="before build")
         # write new
-        with open("bank/card-bank-built.csv", "w", newline="", encoding="utf-8") as csvf:
-            writer = csv.DictWriter(csvf, fieldnames=builder.FIELDS)
-            writer.writeheader()
-            writer.writerows(new_card_bank)
+        write()
         print("New card bank written to: bank/card-bank-built.csv")
+        version = history.snapshot("bank/card-bank-built.csv", message="build: {0}".format(", ".join(
+            ["+" + inf for inf in new_cards] + ["~" + inf for inf in updated_cards]
+        )))
+        print("Card bank history version {0} (see bank_history.py to list, diff, or roll back)".format(version["n"]))
+        # keep database in sync, if using one (reading back written cards, rather than holding them all)
+        if os.path.exists(sqlitebank.DEFAULT_DATABASE):
+            changed = set(new_cards + updated_cards)
+            update_database(_read_built(), (card for card in _read_built() if card["inf"] in changed))
+            print("Card bank database updated: {0}".format(sqlitebank.DEFAULT_DATABASE))
     
     if new_cards:
         print("\nNew cards created:")
-        for card in new_cards:
-            print("  {0}".format(card["inf"]))
+        for inf in new_cards:
+            print("  {0}".format(inf))
     
     if updated_cards:
         print("\nCards updated:")
-        for card in updated_cards:
-            print("  {0}".format(card["inf"]))
+        for inf in updated_cards:
+            print("  {0}".format(inf))
 
     if errored:
         print("\nError building card(s) for:")
-        for pair in errored:
-            print("  {0} : {1}".format(pair[0]["inf"], pair[1]))
+        for inf, message in errored:
+            print("  {0} : {1}".format(inf, message))
+
+
+def update_database(new_card_bank, changed_cards):
+    '''Update card bank database with changed cards, and remove cards no longer in card bank.'''
+    conn = sqlitebank.connect(sqlitebank.DEFAULT_DATABASE)
+    try:
+        keep = set(card["inf"] for card in new_card_bank)
+        for (inf,) in conn.execute('SELECT "inf" FROM cards').fetchall():
+            if inf not in keep:
+                sqlitebank.delete_card(conn, inf)
+        for card in changed_cards:
+            sqlitebank.upsert_card(conn, card)
+    finally:
+        conn.close()
 
 
 # if called straight-up, build from difference between basic and build card bank
 if __name__ == "__main__":
-    build_from_difference()
+    args = {}
+    rename = {
+        "h": "help", 
+        "s": "sources", 
+        "v": "verify", 
+        "f": "force", 
+        "w": "workers"
+    }
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args:
+        print("""
+Build card bank (bank/card-bank-built.csv) from word list (bank/card-bank-basic.csv), 
+only building cards that are new or changed.
+
+    -h | -help          Shows help information.
+    -s | -sources       Conjugation sources to use, in order tried. Default is 
+                        dump rules scraper. Sources are:
+                          dump     local dump (bank/conjugations.json)
+                          rules    regular verbs, conjugated by rule
+                          scraper  conjugator website
+                          fixture  recorded results (bank/fixtures)
+                          record   conjugator website, recording fixtures
+                        Results are cached per source in bank/sources.
+    -v | -verify        Source to check conjugations against, e.g. 
+                        `-s rules -v scraper`. Differences are listed.
+    -f | -force         Infinitives to rebuild, even if unchanged.
+    -w | -workers       Number of cards to fetch at once (and browsers to use
+                        for website). Default is 4.
+""")
+    else:
+        workers = int(args["workers"][0]) if "workers" in args else 4
+        pool = BrowserPool(size=workers)
+        try:
+            build_from_difference(
+                force_rebuild=args["force"] if isinstance(args.get("force"), list) else [], 
+                source=sources.make_chain(
+                    args["sources"] if isinstance(args.get("sources"), list) else sources.DEFAULT_CHAIN, 
+                    verify=args["verify"][0] if isinstance(args.get("verify"), list) else None, 
+                    pool=pool
+                ), 
+                workers=workers
+            )
+        finally:
+            pool.close()
@@ -0,0 +1,44 @@
+import sys
+from bin import infinitives
+from bin.importer import CHECK_CACHE, WebChecker
+
+
+def main(wordlists=None, web_check=False):
+    check = WebChecker() if web_check else None
+    try:
+        num_words, skipped = infinitives.build_wordlist(
+            card_bank_tables=["bank/card-bank-basic.csv", "bank/card-bank-built.csv"],
+            check_cache=CHECK_CACHE,
+            wordlists=wordlists or [],
+            check=check
+        )
+    finally:
+        if check:
+            check.close()
+    print("{0} known infinitives written to: {1}".format(num_words, infinitives.DEFAULT_WORDLIST))
+    if skipped:
+        if web_check:
+            print("{0} untagged words not added (invalid or check failed).".format(skipped))
+        else:
+            print("{0} untagged words not added (use -check to check them on the website).".format(skipped))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] in ("-h", "-help"):
+        print("""
+Build the list of known Portuguese infinitives (bank/infinitives.txt) used to
+check words are valid in add_word.py without going to the website. Adds all
+infinitives in the card bank and those already found valid on the website,
+keeping any already listed.
+
+    python build_infinitives.py [-check] [wordlist ...]
+        Optionally also add words from wordlist files (one word per line, e.g.
+        from a dictionary). Words tagged as verbs after the word (e.g. 'falar
+        VERB', tags V, VERB, or vblex) are added. Untagged words are skipped,
+        as many nouns and adjectives look like infinitives (e.g. 'mar'),
+        unless -check is given to check them on the conjugator website first.
+""")
+    else:
+        web_check = "-check" in args
+        main([arg for arg in args if arg != "-check"], web_check=web_check)
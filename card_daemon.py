@@ -0,0 +1,73 @@
+import sys, time
+from bin import daemon
+
+
+def main(options=None):
+    options = options if options else {}
+    socket_path = options["socket"][0] if isinstance(options.get("socket"), list) else daemon.DEFAULT_SOCKET
+
+    if "status" in options or "stop" in options:
+        if not daemon.is_running(socket_path):
+            print("Card bank daemon not running at: {0}".format(socket_path))
+            return
+        bank = daemon.RemoteCardBank(socket_path)
+        if "stop" in options:
+            bank.call("stop")
+            print("Card bank daemon stopped")
+        else:
+            status = bank.call("status")
+            print("Card bank daemon running at: {0} (pid {1})".format(socket_path, status["pid"]))
+            print("  {0} cards, loaded {1} (generation {2})".format(
+                status["cards"],
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(status["loaded"])),
+                status["generation"]
+            ))
+        bank.close()
+        return
+
+    interval = float(options["interval"][0]) if "interval" in options else 2.0
+    start = time.time()
+    card_daemon = daemon.CardBankDaemon("bank/card-bank-built.csv", "bank/card-bank-similar.csv", interval=interval)
+    print("Card bank loaded ({0} cards, {1:.2f}s), listening at: {2}".format(
+        len(card_daemon.bank), time.time()-start, socket_path
+    ))
+    try:
+        card_daemon.serve(socket_path)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    args = {}
+    rename = {
+        "h": "help",
+        "s": "socket",
+        "i": "interval"
+    }
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args:
+        print("""
+Keep the card bank loaded in a background process, so that sessions started
+with `python main.py -remote` skip loading it. Runs until stopped (Ctrl+C or
+-stop), e.g. start it in the background with `python card_daemon.py &`. The
+card bank files are watched and reloaded when changed (e.g. by add_word.py).
+
+    -h | -help          Shows help information.
+    -s | -socket        Unix socket filepath. Default is bank/card-bank.sock.
+    -i | -interval      Seconds between checks for changed card bank files.
+                        Default is 2.
+    -status             Show status of running daemon.
+    -stop               Stop running daemon.
+""")
+    else:
+        main(args)
@@ -0,0 +1,114 @@
+import sys, time
+from bin import builder
+from bin.standin import StandinConjugator, DEFAULT_PAGES, FIXTURE_VERBS, FIXTURE_INVALID
+from bin.standin import record_page, check_pages, missing_pages
+from bin.constants import TENSE
+
+
+def record(infinitives, pages=DEFAULT_PAGES):
+    '''Record pages from the real conjugator website, to serve and check offline.'''
+    session = builder.session()
+    try:
+        for infinitive in infinitives:
+            record_page(infinitive, session, pages)
+            print("Recorded: {0}".format(infinitive))
+    finally:
+        session.close()
+
+
+def check(pages=DEFAULT_PAGES):
+    '''Check recorded pages still parse as expected, skipping any not recorded yet. Returns true if all did.'''
+    missing = missing_pages(pages)
+    if missing:
+        print("Skipped, not recorded in {0}: {1} (record with -record, needs network)".format(
+            pages, ", ".join(missing)
+        ))
+    problems = check_pages(pages)
+    for infinitive, message in problems:
+        print("{0}: {1}".format(infinitive, message))
+    if problems:
+        print("{0} problem(s) with recorded pages in {1}".format(len(problems), pages))
+    elif len(missing) < len(FIXTURE_VERBS + FIXTURE_INVALID):
+        print("All recorded pages in {0} parsed as expected".format(pages))
+    return not problems
+
+
+def main(options=None):
+    options = options if options else {}
+    port = int(options["port"][0]) if "port" in options else 8765
+    standin = StandinConjugator(
+        "bank/card-bank-built.csv", 
+        pages=options["pages"][0] if "pages" in options else DEFAULT_PAGES, 
+        latency=float(options["latency"][0]) if "latency" in options else 0, 
+        jitter=float(options["jitter"][0]) if "jitter" in options else 0, 
+        error_rate=float(options["errors"][0]) if "errors" in options else 0, 
+        broken={inf: (TENSE.IMPERATIVE_NEG,) for inf in options["broken"]} if isinstance(options.get("broken"), list) else None
+    )
+    url = standin.start(port=port)
+    print("Stand-in conjugator serving {0} verbs, use with:".format(len(standin.tense_maps)))
+    print("  CONJUGATOR_URL={0} python build_card_bank.py".format(url))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+        print("\n{0} requests served ({1} errors injected)".format(standin.requests, standin.errors))
+
+
+if __name__ == "__main__":
+    args = {}
+    rename = {
+        "h": "help", 
+        "p": "port", 
+        "l": "latency", 
+        "j": "jitter", 
+        "e": "errors", 
+        "b": "broken"
+    }
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args:
+        print("""
+Run a local stand-in for the conjugator website, serving pages for the verbs in
+the card bank (bank/card-bank-built.csv), so builds can run without network.
+Other verbs get the website's invalid verb warning. Recorded pages in 
+bank/fixtures/pages (<infinitive>.html) are served as is instead.
+
+    -h | -help          Shows help information.
+    -p | -port          Port to listen on. Default is 8765.
+    -l | -latency       Seconds to wait before each response. Default is 0.
+    -j | -jitter        Up to this many seconds more at random. Default is 0.
+    -e | -errors        Fraction of requests to fail with server error, e.g.
+                        0.05. Default is 0.
+    -b | -broken        Infinitives to serve pages missing the negative
+                        imperative table for.
+    -pages              Directory of recorded pages.
+    -record             Record pages from the real website instead of serving
+                        (needs network and requests_html). Infinitives to
+                        record, or by default the checked set (a regular verb,
+                        an irregular verb, and an invalid infinitive).
+    -check              Check recorded pages still parse, verbs to the same
+                        forms as in the card bank, instead of serving. Exits
+                        with an error if not. Pages of the checked set not
+                        recorded yet are skipped with a message.
+""")
+    else:
+        pages = args["pages"][0] if isinstance(args.get("pages"), list) else DEFAULT_PAGES
+        if "record" in args:
+            record(args["record"] if isinstance(args["record"], list) else FIXTURE_VERBS + FIXTURE_INVALID, pages)
+        elif "check" in args:
+            if not check(pages):
+                sys.exit(1)
+        else:
+            main(args)
@@ -0,0 +1,20 @@
+import sys
+from bin import columnar
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "-help"):
+        print("""
+Convert the built card bank CSV into the memory-mapped columnar format, for 
+sharing one copy of the card bank across many processes.
+
+    python convert_columnar.py [input CSV] [output file]
+
+Defaults are bank/card-bank-built.csv and bank/card-bank-built.pvcb. Re-run
+after rebuilding the card bank, the columnar file is not updated by builds.
+""")
+    else:
+        card_bank_table = sys.argv[1] if len(sys.argv) > 1 else "bank/card-bank-built.csv"
+        output = sys.argv[2] if len(sys.argv) > 2 else columnar.DEFAULT_COLUMNAR
+        num_cards = columnar.write(card_bank_table, output)
+        print("{0} cards written to: {1}".format(num_cards, output))
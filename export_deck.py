@@ -0,0 +1,111 @@
+import sys, csv, json
+from bin import tester
+from bin import deck
+from bin.cardbank import CardBank
+from bin.constants import TENSE_GROUPS
+
+
+def main(options=None):
+    options = options if options else {}
+
+    tense_group = None
+    if "tense" in options:
+        tense_group = tester.get_tense_group(options["tense"])
+
+    num_questions = 3
+    if tense_group == TENSE_GROUPS.INFINITIVE:
+        num_questions = 1
+    elif "num-questions" in options:
+        num_questions = int(options["num-questions"][0])
+        if num_questions < 1:
+            raise Exception("Bad argument. Number of questions must be at least 1.")
+
+    count = int(options["count"][0]) if "count" in options else None
+    seed = options["seed"][0] if "seed" in options else None
+    out_format = options["format"][0].lower() if "format" in options else "jsonl"
+    if out_format not in ("jsonl", "csv"):
+        raise Exception("Bad argument. Format must be 'jsonl' or 'csv'.")
+    output = options["output"][0] if "output" in options else "deck.{0}".format(out_format)
+
+    bank = CardBank("bank/card-bank-built.csv", "bank/card-bank-similar.csv")
+
+    # check specific words exist, same as main.py
+    words = None
+    if "words" in options:
+        words, unrecognized = bank.find_words(options["words"])
+        for message in unrecognized:
+            print(message)
+        if not len(words):
+            return
+
+    questions = deck.generate(
+        bank, 
+        seed=seed, 
+        words=words, 
+        tense_group=tense_group, 
+        num_questions=num_questions, 
+        count=count
+    )
+
+    # stream questions straight to file so memory doesn't grow with deck size
+    n = 0
+    with open(output, "w", newline="", encoding="utf-8") as outf:
+        if out_format == "csv":
+            writer = csv.DictWriter(outf, fieldnames=deck.QUESTION_FIELDS)
+            writer.writeheader()
+            for question in questions:
+                question["answers"] = "/".join(question["answers"])
+                writer.writerow(question)
+                n += 1
+        else:
+            for question in questions:
+                outf.write(json.dumps(question, ensure_ascii=False))
+                outf.write("\n")
+                n += 1
+
+    print("{0} questions written to: {1}".format(n, output))
+
+
+if __name__ == "__main__":
+    args = {}
+    rename = {
+        "h": "help", 
+        "w": "words", 
+        "t": "tense", 
+        "n": "num-questions", 
+        "c": "count", 
+        "s": "seed", 
+        "f": "format", 
+        "o": "output"
+    }
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args:
+        print("""
+Pre-generate a deck of questions (e.g. for printed worksheets) without asking
+them. Uses the same rules for picking words and verb forms as main.py. The
+same seed and options always produce the same deck.
+
+    -h | -help          Shows help information.
+    -w | -words         Limit questions to specific words (Portuguese 
+                        infinitives, separated by spaces).
+    -t | -tense         Limit questions to tense groups, same as main.py.
+    -n | -num-questions Questions per word. Default three.
+    -c | -count         Total number of questions. Words are cycled through 
+                        (reshuffled each pass) until reached. Default is one 
+                        pass through the words.
+    -s | -seed          Random seed.
+    -f | -format        Output format, 'jsonl' (default) or 'csv'.
+    -o | -output        Output filepath. Default is deck.jsonl or deck.csv.
+""")
+    else:
+        main(args)
@@ -0,0 +1,177 @@
+import os, sys, time
+import multiprocessing
+from bin import tester
+from bin import deck
+from bin import worksheet
+from bin.cardbank import CardBank
+from bin.columnar import ColumnarCardBank, DEFAULT_COLUMNAR
+from bin.constants import TENSE_GROUPS
+
+
+# card bank shared with worker processes (inherited on fork, otherwise loaded once per worker)
+_bank = None
+
+
+def _load_bank():
+    global _bank
+    if _bank is None:
+        # prefer memory-mapped columnar card bank if up to date, so workers share one copy
+        if os.path.exists(DEFAULT_COLUMNAR) and (
+            os.path.getmtime(DEFAULT_COLUMNAR) >= os.path.getmtime("bank/card-bank-built.csv")
+        ):
+            _bank = ColumnarCardBank(DEFAULT_COLUMNAR, "bank/card-bank-similar.csv")
+        else:
+            _bank = CardBank("bank/card-bank-built.csv", "bank/card-bank-similar.csv")
+
+
+def _render_student(job):
+    '''Generate and write worksheet and answer key for one student.'''
+    n, name, options = job
+    _load_bank()
+    # deterministic per student, regardless of which worker gets the job
+    seed = "{0}-{1}".format(options["seed"], n)
+    questions = list(deck.generate(
+        _bank,
+        seed=seed,
+        words=options["words"],
+        tense_group=options["tense_group"],
+        num_questions=options["num_questions"],
+        count=options["count"]
+    ))
+    if options["format"] == "html":
+        sheet, key = worksheet.render_html(name, questions)
+    else:
+        sheet, key = worksheet.render_markdown(name, questions)
+    basename = "{0:03d}-{1}".format(n+1, "".join(c if c.isalnum() else "-" for c in name.lower()))
+    sheet_path = os.path.join(options["output"], "{0}.{1}".format(basename, options["format"]))
+    key_path = os.path.join(options["output"], "{0}-key.{1}".format(basename, options["format"]))
+    with open(sheet_path, "w", encoding="utf-8") as outf:
+        outf.write(sheet)
+    with open(key_path, "w", encoding="utf-8") as outf:
+        outf.write(key)
+    return sheet_path
+
+
+def main(options=None):
+    options = options if options else {}
+
+    tense_group = None
+    if "tense" in options:
+        tense_group = tester.get_tense_group(options["tense"])
+    num_questions = 3
+    if tense_group == TENSE_GROUPS.INFINITIVE:
+        num_questions = 1
+    elif "num-questions" in options:
+        num_questions = int(options["num-questions"][0])
+        if num_questions < 1:
+            raise Exception("Bad argument. Number of questions must be at least 1.")
+    num_words = int(options["num-words"][0]) if "num-words" in options else 10
+    if num_words < 1:
+        raise Exception("Bad argument. Number of words must be at least 1.")
+
+    # student names from roster file (one per line), or just numbered
+    if "roster" in options:
+        with open(options["roster"][0], "r", encoding="utf-8") as inf:
+            names = [line.strip() for line in inf if line.strip()]
+    elif "class-size" in options:
+        names = ["Student {0}".format(n+1) for n in range(int(options["class-size"][0]))]
+    else:
+        raise Exception("Bad argument. Either a roster or class size is required.")
+
+    out_format = options["format"][0].lower() if "format" in options else "html"
+    if out_format not in ("html", "md"):
+        raise Exception("Bad argument. Format must be 'html' or 'md'.")
+    output = options["output"][0] if "output" in options else "worksheets"
+    if not os.path.exists(output):
+        os.makedirs(output)
+
+    # load card bank before starting workers, so forked workers share it instead of each reading it, and 
+    # check specific words exist (same as main.py)
+    _load_bank()
+    words = None
+    if "words" in options:
+        words, unrecognized = _bank.find_words(options["words"])
+        for message in unrecognized:
+            print(message)
+        if not len(words):
+            return
+
+    job_options = {
+        "seed":          options["seed"][0] if "seed" in options else "worksheets",
+        "words":         words,
+        "tense_group":   tense_group,
+        "num_questions": num_questions,
+        "count":         num_words*num_questions,
+        "format":        out_format,
+        "output":        output
+    }
+    jobs = [(n, name, job_options) for n, name in enumerate(names)]
+
+    # fail once here (e.g. no word has the tenses asked for) rather than in every worker
+    next(deck.generate(_bank, words=words, tense_group=tense_group, num_questions=num_questions, count=1))
+
+    start = time.time()
+    processes = int(options["processes"][0]) if "processes" in options else os.cpu_count()
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    with context.Pool(processes=processes) as pool:
+        # larger chunks cut down on inter-process overhead for big classes
+        chunksize = max(1, len(jobs)//(processes*4))
+        for path in pool.imap_unordered(_render_student, jobs, chunksize=chunksize):
+            pass
+
+    print("{0} worksheets and answer keys written to: {1} ({2:.1f}s, {3} processes)".format(
+        len(jobs), output, time.time()-start, processes
+    ))
+
+
+if __name__ == "__main__":
+    args = {}
+    rename = {
+        "h": "help",
+        "r": "roster",
+        "c": "class-size",
+        "w": "words",
+        "t": "tense",
+        "k": "num-words",
+        "n": "num-questions",
+        "s": "seed",
+        "f": "format",
+        "o": "output",
+        "p": "processes"
+    }
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args:
+        print("""
+Export a distinct printable worksheet and answer key per student. Worksheets
+are generated in parallel across processes. Each student's questions depend
+only on the seed and their position in the roster, so re-running with the same
+options gives the same worksheets.
+
+    -h | -help          Shows help information.
+    -r | -roster        File of student names, one per line.
+    -c | -class-size    Number of students, if no roster (named by number).
+    -w | -words         Limit questions to specific words (Portuguese
+                        infinitives, separated by spaces).
+    -t | -tense         Limit questions to tense groups, same as main.py.
+    -k | -num-words     Words per worksheet. Default ten.
+    -n | -num-questions Questions per word. Default three.
+    -s | -seed          Random seed.
+    -f | -format        Output format, 'html' (default) or 'md'.
+    -o | -output        Output directory. Default is worksheets/.
+    -p | -processes     Number of worker processes. Default is CPU count.
+""")
+    else:
+        main(args)
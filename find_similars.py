@@ -0,0 +1,130 @@
+import sys, csv, math
+from bin import cardbank
+from bin.search import tokenize
+
+
+def find_similars(card_bank, min_score=0.3, max_frequency=8):
+    '''Find groups of Portuguese verbs with overlapping English definitions. Candidate pairs only come from
+    verbs sharing a definition word, and words shared by too many verbs (e.g. 'get') are skipped, so this
+    doesn't compare every pair of verbs.
+    Params:
+        card_bank (list[dict]): Cards as read by `cardbank.read()`.
+        min_score (float, optional): Min overlap score (0 to 1) for two verbs to be grouped.
+        max_frequency (int, optional): Skip definition words used by more than this many verbs.
+    Returns:
+        List of (score, group) tuples, sorted by score, highest first. Each group is a tuple of infinitives,
+        starting with the verb the group was formed around.
+    '''
+    # definition words per verb and inverted index of verbs per word
+    glosses = {}
+    postings = {}
+    for card in card_bank:
+        tokens = set()
+        for form in card["eng-inf"]:
+            tokens.update(tokenize(form))
+        glosses[card["inf"]] = tokens
+        for token in tokens:
+            postings.setdefault(token, []).append(card["inf"])
+
+    # rarer shared words count for more
+    num_verbs = len(glosses)
+    weights = {token: math.log(1 + num_verbs/len(infs)) for token, infs in postings.items()}
+
+    # score candidate pairs sharing at least one word, by weighted overlap of definition words
+    neighbors = {}
+    scored = set()
+    for token, infs in postings.items():
+        if len(infs) < 2 or len(infs) > max_frequency:
+            continue
+        for i, inf_a in enumerate(infs):
+            for inf_b in infs[i+1:]:
+                if (inf_a, inf_b) in scored:
+                    continue
+                scored.add((inf_a, inf_b))
+                shared = glosses[inf_a] & glosses[inf_b]
+                union = glosses[inf_a] | glosses[inf_b]
+                score = sum(weights[t] for t in shared) / sum(weights[t] for t in union)
+                if score >= min_score:
+                    neighbors.setdefault(inf_a, {})[inf_b] = score
+                    neighbors.setdefault(inf_b, {})[inf_a] = score
+
+    # group each verb with its neighbors, dropping duplicate groups
+    groups = {}
+    for inf, near in neighbors.items():
+        members = frozenset([inf] + list(near))
+        score = sum(near.values())/len(near)
+        if members not in groups or groups[members][0] < score:
+            groups[members] = (score, tuple([inf] + sorted(near, key=lambda other: -near[other])))
+    return sorted(groups.values(), key=lambda pair: -pair[0])
+
+
+def main(options=None):
+    options = options if options else {}
+    output = options["output"][0] if "output" in options else "bank/card-bank-similar-proposed.csv"
+    min_score = float(options["min-score"][0]) if "min-score" in options else 0.3
+    max_frequency = int(options["max-frequency"][0]) if "max-frequency" in options else 8
+
+    card_bank = cardbank.read("bank/card-bank-basic.csv", build_forms=True)
+
+    # existing hand-curated groups, to skip proposals already covered
+    curated = []
+    with open("bank/card-bank-similar.csv", "r", encoding="utf-8") as csvf:
+        curated = [set(group) for group in csv.reader(csvf)]
+
+    proposed = []
+    for score, group in find_similars(card_bank, min_score=min_score, max_frequency=max_frequency):
+        if any(set(group) <= existing for existing in curated):
+            continue
+        proposed.append((score, group))
+
+    if not proposed:
+        print("No new similar groups found")
+        return
+
+    with open(output, "w", newline="", encoding="utf-8") as csvf:
+        writer = csv.writer(csvf)
+        for score, group in proposed:
+            writer.writerow(group)
+
+    print("Proposed similar groups (score : group):")
+    for score, group in proposed:
+        print("  {0:.2f} : {1}".format(score, ", ".join(group)))
+    print("\n{0} group(s) written to: {1}".format(len(proposed), output))
+    print("Review and copy wanted groups into: bank/card-bank-similar.csv")
+
+
+if __name__ == "__main__":
+    args = {}
+    rename = {
+        "h": "help",
+        "o": "output",
+        "m": "min-score",
+        "f": "max-frequency"
+    }
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args:
+        print("""
+Propose groups of similar Portuguese verbs (synonyms that are easily confused)
+from overlapping English definitions in the card bank. Proposals already covered
+by bank/card-bank-similar.csv are skipped. Nothing is changed in the card bank,
+proposals are written to a separate file for review.
+
+    -h | -help          Shows help information.
+    -o | -output        Output filepath. Default is
+                        bank/card-bank-similar-proposed.csv.
+    -m | -min-score     Min overlap score (0 to 1) to group verbs. Default 0.3.
+    -f | -max-frequency Skip English words shared by more than this many verbs
+                        as too generic. Default 8.
+""")
+    else:
+        main(args)
@@ -0,0 +1,27 @@
+import sys
+from bin import synthetic
+
+
+def main(num_verbs, directory, seed=None):
+    cards, similars = synthetic.generate(num_verbs, seed=seed)
+    paths = synthetic.write(cards, similars, directory)
+    print("Synthetic card bank of {0} verbs ({1} similar groups) written to:".format(len(cards), len(similars)))
+    for path in paths:
+        print("  {0}".format(path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] in ("-h", "-help"):
+        print("""
+Generate a synthetic card bank of any size, for testing and benchmarking (see
+bench_scaling.py). Has the same verb ending, definition, and similar group 
+distributions as the real card bank. Made up regular verbs are conjugated by 
+rule, made up irregular verbs are real verbs with a prefix (e.g. 'desfazer').
+
+    python generate_bank.py [verbs] [directory] [seed]
+
+Writes card-bank-basic.csv, card-bank-built.csv, and card-bank-similar.csv to
+directory. The same seed always gives the same card bank.
+""")
+    else:
+        main(int(sys.argv[1]), sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else None)
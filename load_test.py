@@ -0,0 +1,127 @@
+import sys, time, threading
+import multiprocessing
+from bin.cardbank import CardBank
+from bin.loadtest import VirtualLearner, STAGES, summarize
+
+
+def _load(card_bank_table, similar_table, warm):
+    bank = CardBank(card_bank_table, similar_table, lazy=True)
+    if warm:
+        # otherwise first wrong answer pays for building indexes, as in a new interactive session
+        bank.get_form_index()
+    return bank
+
+
+def _process_worker(job):
+    '''Run learners in own process, with own card bank. Returns learners' results.'''
+    card_bank_table, similar_table, warm, learner_options, seeds, num_sessions, start_at = job
+    bank = _load(card_bank_table, similar_table, warm)
+    learners = [VirtualLearner(bank, seed=seed, **learner_options) for seed in seeds]
+    # start together, so processes that load first don't run alone
+    time.sleep(max(0, start_at - time.time()))
+    _run_threads(learners, num_sessions)
+    return [
+        {"timings": learner.timings, "questions": learner.questions, "correct": learner.correct}
+        for learner in learners
+    ]
+
+
+def _run_threads(learners, num_sessions):
+    def run(learner):
+        for _ in range(num_sessions):
+            learner.run_session()
+    threads = [threading.Thread(target=run, args=(learner,)) for learner in learners]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def main(num_learners=8, num_sessions=5, processes=1, mix=(0.7, 0.15, 0.15), num_words=10, warm=True):
+    card_bank_table = "bank/card-bank-built.csv"
+    similar_table = "bank/card-bank-similar.csv"
+    learner_options = {"mix": mix, "num_words": num_words}
+    print("{0} learners in {1} process(es), {2} sessions each of {3} words, answers {4:.0%} correct, {5:.0%} typos, "
+          "{6:.0%} wrong\n".format(num_learners, processes, num_sessions, num_words, *mix))
+
+    if processes == 1:
+        bank = _load(card_bank_table, similar_table, warm)
+        learners = [VirtualLearner(bank, seed=n, **learner_options) for n in range(num_learners)]
+        start = time.perf_counter()
+        _run_threads(learners, num_sessions)
+        elapsed = time.perf_counter() - start
+        results = learners
+    else:
+        # spread learners over processes, each running its share in threads
+        seeds = [list(range(num_learners))[n::processes] for n in range(processes)]
+        start_at = time.time() + 5
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes=processes) as pool:
+            jobs = [
+                (card_bank_table, similar_table, warm, learner_options, process_seeds, num_sessions, start_at)
+                for process_seeds in seeds if process_seeds
+            ]
+            results = [learner for process_results in pool.map(_process_worker, jobs) for learner in process_results]
+        elapsed = time.time() - start_at
+
+    summary = summarize(results, elapsed)
+    print("{0:<10} {1:>8} {2:>10} {3:>10} {4:>10} {5:>10}".format("stage", "count", "p50 (ms)", "p95 (ms)", "p99 (ms)", "max (ms)"))
+    for stage in STAGES:
+        stats = summary["stages"][stage]
+        print("{0:<10} {1:>8} {2:>10.3f} {3:>10.3f} {4:>10.3f} {5:>10.3f}".format(
+            stage, stats["count"], 1000*stats["p50"], 1000*stats["p95"], 1000*stats["p99"], 1000*stats["max"]
+        ))
+    print("\n{0} questions in {1:.2f}s: {2:.0f} questions/s ({3:.0%} graded correct)".format(
+        summary["questions"], elapsed, summary["rate"], summary["correct"]/max(summary["questions"], 1)
+    ))
+
+
+if __name__ == "__main__":
+    args = {}
+    rename = {
+        "h": "help",
+        "l": "learners",
+        "s": "sessions",
+        "p": "processes",
+        "w": "words",
+        "m": "mix"
+    }
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+    if "help" in args:
+        print("""
+Load test quiz logic with virtual learners, each running sessions the same way
+as main.py (word selection, question generation, grading, explaining wrong
+answers, and the retest section) and answering questions itself. Reports
+questions per second and latency percentiles per stage.
+
+    -h | -help          Shows help information.
+    -l | -learners      Number of learners running at once. Default is 8.
+    -s | -sessions      Sessions per learner. Default is 5.
+    -p | -processes     Processes to spread learners over (learners in each
+                        process run in threads, sharing a card bank). Default
+                        is 1.
+    -w | -words         Words per session. Default is 10.
+    -m | -mix           Fractions of answers correct, typos, and wrong, e.g.
+                        `-m 0.5 0.25 0.25`. Default is 0.7 0.15 0.15.
+    -cold               Don't build indexes before starting, so the first wrong
+                        answer in each process pays for it.
+""")
+    else:
+        main(
+            num_learners=int(args["learners"][0]) if "learners" in args else 8,
+            num_sessions=int(args["sessions"][0]) if "sessions" in args else 5,
+            processes=int(args["processes"][0]) if "processes" in args else 1,
+            mix=tuple(float(value) for value in args["mix"]) if "mix" in args else (0.7, 0.15, 0.15),
+            num_words=int(args["words"][0]) if "words" in args else 10,
+            warm=("cold" not in args)
+        )
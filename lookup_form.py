@@ -0,0 +1,71 @@
+import sys
+from bin.cardbank import CardBank
+from bin.lookup import describe
+
+
+def main(forms, prefix=False, limit=20):
+    bank = CardBank("bank/card-bank-built.csv")
+    index = bank.get_form_index()
+
+    for form in forms:
+        if prefix:
+            found = index.prefix(form, limit=limit)
+            if not found:
+                print("{0} : no forms found".format(form))
+                continue
+            print("{0}..".format(form))
+            for match, entries in found:
+                print("  {0} : {1}".format(match, "; ".join(describe(entry) for entry in entries)))
+        else:
+            entries = index.lookup(form)
+            if not entries:
+                print("{0} : not a known verb form".format(form))
+                continue
+            print("{0} :".format(form))
+            for entry in entries:
+                print("  {0}".format(describe(entry)))
+
+
+if __name__ == "__main__":
+    args = {"forms": []}
+    rename = {
+        "h": "help",
+        "p": "prefix",
+        "l": "limit"
+    }
+    # forms are given without a parameter name
+    in_arg = "forms"
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+            # takes no value, anything after is still a form
+            if in_arg == "prefix":
+                in_arg = "forms"
+        else:
+            if not isinstance(args[in_arg], list):
+                args[in_arg] = []
+            args[in_arg].append(arg.strip())
+            # takes one value, anything after is a form
+            if in_arg == "limit":
+                in_arg = "forms"
+    if "help" in args or not args["forms"]:
+        print("""
+Look up which verb, tense, and person a Portuguese verb form belongs to. Special
+characters are not required. Compound forms should be quoted (e.g. "estou fazendo").
+
+    -h | -help          Shows help information.
+    -p | -prefix        Find all forms starting with the given text instead.
+    -l | -limit         Max number of forms to list with -prefix. Default 20.
+""")
+    else:
+        limit = 20
+        if "limit" in args:
+            if not isinstance(args["limit"], list):
+                raise Exception("Bad argument. Limit requires a number.")
+            limit = int(args["limit"][0])
+            if limit < 1:
+                raise Exception("Bad argument. Limit must be at least 1.")
+        main(args["forms"], prefix="prefix" in args, limit=limit)
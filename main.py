@@ -1,8 +1,12 @@
-import sys, math, random
+import os, sys
 from bin import ask
 from bin import tester
+from bin.session import Session, DEFAULT_CHECKPOINT
+from bin.analytics import AnswerLog, AnswerStats, AdaptiveWeights, report
 from bin.cardbank import CardBank
-from bin.constants import TENSE, TENSE_VALUES, TENSE_GROUPS
+from bin.sqlitebank import SqliteCardBank, DEFAULT_DATABASE
+from bin.daemon import RemoteCardBank, DEFAULT_SOCKET
+from bin.constants import TENSE_GROUPS
 
 
 def main(options=None):
@@ -10,246 +14,138 @@ def main(options=None):
 
     # option to limit tenses to group specified
     default_tense_group = False
-    default_exclude_tenses = []
     if "tense" in options:
-        try:
-            default_tense_group = []
-            for tense in options["tense"]:
-                if tense == "future":
-                    default_tense_group += TENSE_GROUPS.FUTURE_SIMPLE
-                    default_tense_group += TENSE_GROUPS.FUTURE_FORMAL
-                    default_tense_group += TENSE_GROUPS.FUTURE_COND
-                    continue
-                elif tense == "past":
-                    default_tense_group += TENSE_GROUPS.PERFECT
-                    default_tense_group += TENSE_GROUPS.IMPERFECT
-                    default_tense_group += TENSE_GROUPS.IMPERFECT_CONTINUOUS
-                    continue
-                elif tense == "imperative":
-                    default_tense_group += TENSE_GROUPS.IMPERATIVE_AFM
-                    default_tense_group += TENSE_GROUPS.IMPERATIVE_NEG
-                    continue
-                default_tense_group += getattr(TENSE_GROUPS, tense.strip().upper())
-                if tense == "present":
-                    default_tense_group += TENSE_GROUPS.PRESENT_CONTINUOUS
-                elif tense == "imperect":
-                    default_tense_group += TENSE_GROUPS.IMPERFECT_CONTINUOUS
-            default_tense_group = tuple(set(default_tense_group))
-        except:
-            raise Exception("Bad argument. Could not understand or recognize given tenses: {0}".format(", ".join(options["tense"])))
-        default_exclude_tenses = [tense for tense in TENSE_VALUES if tense not in default_tense_group]
+        default_tense_group = tester.get_tense_group(options["tense"])
 
     # option to set num of questions
     num_questions = 3
-    if default_tense_group and len(default_tense_group) == 1 and default_tense_group[0] == TENSE_GROUPS.INFINITIVE:
+    if default_tense_group == TENSE_GROUPS.INFINITIVE:
         num_questions = 1
     elif "num-questions" in options:
         num_questions = int(options["num-questions"][0])
         if num_questions < 1:
             raise Exception("Bad argument. Number of questions must be at least 1.")
 
-    # read card bank
-    bank = CardBank("bank/card-bank-built.csv", "bank/card-bank-similar.csv")
+    # option for timed drill, with time limit per question
+    time_limit = None
+    if "drill" in options:
+        time_limit = float(options["drill"][0]) if isinstance(options["drill"], list) else 10
+        if time_limit <= 0:
+            raise Exception("Bad argument. Drill time limit must be positive.")
+
+    # read card bank (or use card bank daemon, if running)
+    bank = None
+    if "remote" in options:
+        socket_path = options["remote"][0] if isinstance(options["remote"], list) else DEFAULT_SOCKET
+        try:
+            bank = RemoteCardBank(socket_path)
+        except OSError:
+            print("Card bank daemon not running at {0}, reading card bank instead.".format(socket_path))
+    if bank is None:
+        if "database" in options:
+            bank = SqliteCardBank(options["database"][0] if isinstance(options["database"], list) else DEFAULT_DATABASE)
+        else:
+            bank = CardBank("bank/card-bank-built.csv", "bank/card-bank-similar.csv", lazy=True)
+
+    # option to show weakest verbs and tenses from past answers
+    if "analytics" in options:
+        answer_report = report(AnswerStats(bank.infinitives()))
+        if answer_report:
+            print(answer_report)
 
-    test_cards = []
+    # option to pick words and tenses weighted by past errors
+    weights = None
+    if "adaptive" in options:
+        weights = AdaptiveWeights(bank.infinitives())
+
+    # option to checkpoint session after every answer, to resume if interrupted
+    checkpoint = None
+    if "checkpoint" in options:
+        checkpoint = options["checkpoint"][0] if isinstance(options["checkpoint"], list) else DEFAULT_CHECKPOINT
+
+    if checkpoint and os.path.exists(checkpoint) and ask.yes_no("Resume unfinished session? (y/n) > ", same_line=True):
+        session = Session.load(bank, checkpoint, weights=weights)
 
     # option to limit words
-    if "words" in options:
-        for inf in options["words"]:
-            try:
-                test_cards.append(bank[inf])
-            except:
-                print("Unrecognized word option: {0}".format(inf))
-        num_tests = len(test_cards)
+    elif "words" in options:
+        words, unrecognized = bank.find_words(options["words"])
+        for message in unrecognized:
+            print(message)
+        if not len(words):
+            return
+        session = Session.new(
+            bank, words=words, num_questions=num_questions, tense_group=default_tense_group, weights=weights
+        )
 
-    # otherwise get cards by random shuffle
+    # otherwise get cards by random shuffle (adding a few similars to test common mixups)
     else:
         # ask number of words to test
-        num_cards = len(bank)
         num_tests = ask.integer(
             question="Number of words to test? ({0} questions per word) > ".format(num_questions), 
             same_line=True, 
             positive=True, 
             nonzero=True, 
-            maxvalue=num_cards
+            maxvalue=len(bank)
+        )
+        session = Session.new(
+            bank, num_words=num_tests, num_questions=num_questions, tense_group=default_tense_group, weights=weights
         )
-
-        all_card_indices = range(0, num_cards)
-        test_card_indices = random.sample(all_card_indices, k=num_tests)
-
-        # add a few similars to test common mixups
-        test_infs = []
-        similars = []
-        start_similars_at = math.ceil(num_tests*0.85)-1
-        for n, i in enumerate(test_card_indices):
-            card = None
-            # add a few similars in the end, if applicable
-            if n >= start_similars_at and len(similars):
-                group = None
-                while len(similars) and (not group or not len(group)):
-                    # pop off earliest group, clean up redundants
-                    group = [inf for inf in similars.pop(0) if inf not in test_infs]
-                if group and len(group):
-                    card = bank[random.choice(group)]
-            # if no similars, add from random list, add its similars
-            if not card:
-                card = bank[i]
-                # special case to exclude (pick random replacement)
-                if default_tense_group == TENSE_GROUPS.INFINITIVE and card["inf"] == "poder":
-                    card = None
-                    ibreak = 100
-                    while not card and ibreak > 0:
-                        i = random.choice(all_card_indices)
-                        ibreak -= 1
-                        if i not in test_card_indices and bank[i]["inf"] not in test_infs:
-                            card = bank[i]
-                if "similars" in card and len(card["similars"]):
-                    similars.append(card["similars"])
-            # add card
-            test_cards.append(card)
-            test_infs.append(card["inf"])
 
     print("")
 
-    # reshuffle
-    random.shuffle(test_cards)
-
-    tally = {
-        "total": 0, 
-        "correct": 0, 
-        "wrong": 0, 
-        "redo": []
-    }
-    for n, card in enumerate(test_cards):
-        # first may or may not be to-english, unless more than 2 questions, then always start to-english
-        to_english = True if num_questions > 2 else bool(random.getrandbits(1))
-        exclude_tenses = tester.get_exclude_tenses(card, default_exclude_tenses)
-
-        print("Word {0} of {1}:".format(n+1, num_tests))
-
-        tested = []
-        wrong_params = []
-        params = False
-        redo = False
-        for j in range(num_questions):
-            #  if more than 3 questions, can test to-english again, otherwise never, and never successively
-            if j > 0:
-                if to_english or num_questions <= 3:
-                    to_english = False
-                elif num_questions > 3:
-                    to_english = bool(random.getrandbits(1))
-            # make sure we're not excluding everything..
-            if len(exclude_tenses) == len(TENSE_VALUES):
-                exclude_tenses = default_exclude_tenses[:]
-            # test with random parameters
-            params = tester.get_params(no_repeats=tested, exclude_tenses=exclude_tenses)
-            result = tester.question(bank, card, params, to_english)
-            # because test may change params, if they don't make sense, use latest before appending
-            params["tense"] = result["tense"]
-            params["person"] = result["person"]
-            params["singular"] = result["singular"]
-            # add to tally
-            tested.append(params)
-            tally["total"] += 1
-            if not result["correct"]:
-                tally["wrong"] += 1
-                redo = True
-                params["to_english"] = to_english
-                wrong_params.append(params)
-            else:
-                tally["correct"] += 1
-                # don't retest present-continuous if correctly answered
-                if params["tense"] == TENSE.PRESENT_CONTINUOUS:
-                    exclude_tenses.append(params["tense"])
-            # don't retest infinitive tense in any case
-            if params["tense"] == TENSE.INFINITIVE:
-                exclude_tenses.append(params["tense"])
-            # don't retest to-english twice in a row
-            if to_english:
-                to_english = False
+    # answers logged for analytics and adaptive selection, unless turned off
+    answer_log = None if "no-log" in options else AnswerLog()
+
+    if session.phase == "test":
+        _ask_section(bank, session, "Word {0} of {1}:", time_limit, checkpoint, answer_log)
+
+        tally = session.tally
+        print("Words tested: {0}".format(len(session.words)))
+        print("Total questions: {0}".format(tally["total"]))
+        print("Total correct: {0}".format(tally["correct"]))
+        print("Accuracy: {0:.0f}%".format(100*tally["correct"]/tally["total"]))
+        if time_limit:
+            print("Out of time: {0}".format(tally["timed_out"]))
+        per_minute, slowest = tester.fluency(session.timings)
+        print("Answers per minute: {0:.1f} ({1:.1f}s per answer)".format(per_minute, tally["time"]/tally["total"]))
+        if slowest:
+            print("Slowest:")
+            for slot, mean, count in slowest:
+                print("  {0}: {1:.1f}s ({2} answer{3})".format(slot, mean, count, "s" if count > 1 else ""))
+
+        if "skip-retest" in options:
+            if checkpoint and os.path.exists(checkpoint):
+                os.remove(checkpoint)
+            return
 
         print("")
-
-        if redo:
-            tally["redo"].append([card, wrong_params])
-
-    print("Words tested: {0}".format(num_tests))
-    print("Total questions: {0}".format(tally["total"]))
-    print("Total correct: {0}".format(tally["correct"]))
-    print("Accuracy: {0:.0f}%".format(100*tally["correct"]/tally["total"]))
-    
-    if "skip-retest" in options:
-        return
-
-    print("")
-
-    to_redo = tally["redo"]
-    next_redo = []
-
-    while len(to_redo):
-        for n, (card, wrong_params) in enumerate(to_redo):
-            tested = []
-            params = False
-            redo = False
-            exclude_tenses = tester.get_exclude_tenses(card, default_exclude_tenses[:])
-
-            print("Redo word {0}:".format(n+1))
-
-            # break conditions:
-            # 1. At least 3 correct answers
-            # 2. At least 2 correct in a row
-            # 3. All wrong answers have been retested (minus to-english)
-            streak = 2
-            correct = 3
-            new_incorrect = []
-            while correct > 0 or streak > 0 or len(wrong_params) or len(new_incorrect):
-
-                if len(exclude_tenses) == len(TENSE_VALUES):
-                    exclude_tenses = default_exclude_tenses[:]
-
-                to_english = False
-                was_retest = False
-                if len(wrong_params):
-                    # start with wrong parameters from original test
-                    params = wrong_params.pop(0)
-                    to_english = "to_english" in params and params["to_english"]
-                elif correct <= 0 and streak <= len(new_incorrect):
-                    # if nearing break conditions, retest new incorrects from this retrest
-                    params = new_incorrect.pop(0)
-                    was_retest = True
-                else:
-                    # get new, random parameters
-                    params = tester.get_params(no_repeats=tested, exclude_tenses=exclude_tenses)
-
-                result = tester.question(bank, card, params, to_english)
-                params["tense"] = result["tense"]
-                params["person"] = result["person"]
-                params["singular"] = result["singular"]
-
-                if result["correct"]:
-                    tested.append(params)
-                    # don't retest certain tenses for this word, if correctly solved once
-                    if params["tense"] == TENSE.PRESENT_CONTINUOUS or params["tense"] == TENSE.INFINITIVE:
-                        exclude_tenses.append(params["tense"])
-                    # de-increment towards break conditions
-                    correct -= 1
-                    streak -= 1
-                else:
-                    # add to resting incorrects (with some exceptions)
-                    if not to_english and not was_retest:
-                        new_incorrect.append(params)
-                    # if on retests, can end up single streak, otherwise need to end on 2-streak
-                    streak = 2 if not was_retest else 1
-
+        session.start_retest()
+
+    _ask_section(bank, session, "Redo word {0}:", time_limit, checkpoint, answer_log)
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+
+def _ask_section(bank, session, header, time_limit=None, checkpoint=None, answer_log=None):
+    '''Ask questions until end of session section (test or retest).'''
+    resumed = True
+    while True:
+        question = session.next_question()
+        if not question:
+            return
+        # also show word header if resuming partway through a word
+        if question["first"] or resumed:
+            print(header.format(question["word"]+1, session.num_words))
+        resumed = False
+        result = tester.ask_question(bank, question["verbs"], question["to_english"], time_limit=time_limit)
+        session.record(result)
+        if answer_log:
+            answer_log.append(question["card"]["inf"], result, question["to_english"])
+        if checkpoint:
+            session.save(checkpoint)
+        if result["word_done"]:
             print("")
 
-            if redo:
-                next_redo.append(card)
-                break
-
-        to_redo = next_redo
-        next_redo = []
-
 
 if __name__ == "__main__":
     args = {}
@@ -258,7 +154,14 @@ if __name__ == "__main__":
         "w": "words", 
         "t": "tense", 
         "n": "num-questions", 
-        "s": "skip-retest"
+        "s": "skip-retest", 
+        "db": "database", 
+        "r": "remote", 
+        "d": "drill", 
+        "c": "checkpoint", 
+        "a": "analytics", 
+        "ad": "adaptive", 
+        "nl": "no-log"
     }
     in_arg = None
     for arg in sys.argv[1:]:
@@ -303,6 +206,28 @@ the value passed as that parameter.
                         retest section) is three. Use this to increase or 
                         decrease.
     -s | -skip-retest   Add this parameter to skip the retest portion.
+    -db | -database     Read cards from the SQLite card bank database instead
+                        of CSV (see sqlite_bank.py). Optionally follow with the
+                        database filepath. Default is bank/card-bank.db.
+    -r | -remote        Use cards from the card bank daemon (see 
+                        card_daemon.py) instead of reading the card bank, so
+                        the session starts right away. Optionally follow with
+                        the socket filepath. Default is bank/card-bank.sock.
+    -d | -drill         Timed drill: each question must be answered within a
+                        time limit or counts as wrong. Optionally follow with
+                        the time limit in seconds. Default is 10.
+    -c | -checkpoint    Save the session after every answer, so it can be
+                        resumed if interrupted (asks to resume when started
+                        again with this option). Optionally follow with the
+                        checkpoint filepath. Default is bank/session.json.
+    -a | -analytics     Show weakest verbs and tenses from past answers before
+                        starting (needs numpy). Answers are logged to 
+                        bank/answers.log (unless -no-log). See also 
+                        answer_report.py.
+    -ad | -adaptive     Pick words and tenses weighted by past errors, so weak
+                        verbs and tenses come up more often (needs numpy).
+    -nl | -no-log       Don't log answers to bank/answers.log (used by
+                        -analytics and -adaptive).
 """)
     else:
         main(args)
@@ -0,0 +1,62 @@
+import sys
+from bin.cardbank import CardBank
+
+
+def main(query, mode=None, limit=20):
+    bank = CardBank("bank/card-bank-built.csv")
+    index = bank.get_gloss_index()
+
+    if mode == "prefix":
+        found = index.prefix(query, limit=limit)
+    elif mode == "fuzzy":
+        found = index.fuzzy(query)
+    else:
+        found = index.search(query)
+        # fall back to looser matching if nothing found
+        if not found:
+            found = index.fuzzy(query) or index.prefix(query, limit=limit)
+            if found:
+                print("No exact matches for '{0}', closest matches:".format(query))
+
+    if not found:
+        print("No matches for '{0}'".format(query))
+        return
+
+    for inf in found[:limit]:
+        print("  {0} : to {1}".format(inf, "/".join(bank[inf]["eng-inf"])))
+
+
+if __name__ == "__main__":
+    args = {}
+    rename = {
+        "h": "help",
+        "p": "prefix",
+        "f": "fuzzy",
+        "l": "limit"
+    }
+    query = []
+    in_arg = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("-"):
+            in_arg = arg.lstrip("-").rstrip()
+            if in_arg in rename:
+                in_arg = rename[in_arg]
+            args[in_arg] = True
+        elif in_arg == "limit" and args["limit"] is True:
+            args["limit"] = int(arg)
+        else:
+            query.append(arg.strip())
+    if "help" in args or not query:
+        print("""
+Search the card bank by English definition or Portuguese infinitive, e.g.
+`python search_bank.py to make` lists verbs that mean 'to make'. Without a
+mode flag, exact word matches are listed, falling back to close matches.
+
+    -h | -help          Shows help information.
+    -p | -prefix        Find words starting with the given text.
+    -f | -fuzzy         Find words within one typo of the given text.
+    -l | -limit         Max number of results. Default 20.
+""")
+    else:
+        mode = "prefix" if "prefix" in args else ("fuzzy" if "fuzzy" in args else None)
+        main(" ".join(query), mode=mode, limit=args["limit"] if "limit" in args and args["limit"] is not True else 20)
@@ -0,0 +1,39 @@
+import sys, os
+from bin import sqlitebank
+
+
+def main(command, database=sqlitebank.DEFAULT_DATABASE):
+    if command == "import":
+        conn = sqlitebank.connect(database)
+        num_cards = sqlitebank.import_csv(conn, "bank/card-bank-built.csv", "bank/card-bank-similar.csv")
+        conn.close()
+        print("{0} cards imported into: {1}".format(num_cards, database))
+    elif command == "export":
+        if not os.path.exists(database):
+            raise Exception("No database found at: {0}".format(database))
+        conn = sqlitebank.connect(database)
+        num_cards = sqlitebank.export_csv(conn, "bank/card-bank-built.csv", "bank/card-bank-similar.csv")
+        sqlitebank.export_csv(conn, "bank/card-bank-basic.csv", basic=True)
+        conn.close()
+        print("{0} cards exported from: {1}".format(num_cards, database))
+    else:
+        raise Exception("Unknown command: {0}".format(command))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "-help"):
+        print("""
+Convert between the CSV card bank files and a SQLite card bank database.
+
+    python sqlite_bank.py import [database]
+        Replace database contents with bank/card-bank-built.csv and
+        bank/card-bank-similar.csv.
+    python sqlite_bank.py export [database]
+        Write database contents back out to bank/card-bank-built.csv, 
+        bank/card-bank-basic.csv, and bank/card-bank-similar.csv.
+
+Default database is bank/card-bank.db. Once a database exists, building the
+card bank (build_card_bank.py or add_word.py) also updates it.
+""")
+    else:
+        main(sys.argv[1], *sys.argv[2:3])
@@ -0,0 +1,91 @@
+import os, sys, random, tempfile, unittest, importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import analytics
+from bin.constants import TENSE, TENSE_VALUES, PERSON
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+NOW = 1700000000.0
+DAY = 86400
+WORDS = ["falar", "comer", "partir", "ser"]
+
+
+def _result(tense, person, singular, correct, seconds=2.0):
+    return {"tense": tense, "person": person, "singular": singular, "correct": correct, "time": seconds}
+
+
+class TestAnswerLog(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.dir.name, "answers.log")
+        log = analytics.AnswerLog(self.filepath)
+        # falar: always wrong in perfect, right in present. comer: always right. partir: wrong long ago.
+        for i in range(4):
+            log.append("falar", _result(TENSE.PERFECT, PERSON.FIRST, True, False), False, when=NOW - i)
+            log.append("falar", _result(TENSE.PRESENT, PERSON.THIRD, False, True), False, when=NOW - i)
+            log.append("comer", _result(TENSE.PRESENT, PERSON.FIRST, True, True), True, when=NOW - i)
+            log.append("partir", _result(TENSE.PRESENT, PERSON.SECOND, True, False), False, when=NOW - 200*DAY)
+        # word no longer in card bank
+        log.append("dizer", _result(TENSE.PRESENT, PERSON.FIRST, True, False), False, when=NOW)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_words_kept_by_id(self):
+        self.assertEqual(analytics.read_words(self.filepath), ["falar", "comer", "partir", "dizer"])
+        # reopened log appends with same ids
+        analytics.AnswerLog(self.filepath).append("comer", _result(TENSE.PRESENT, PERSON.FIRST, True, True), True)
+        self.assertEqual(analytics.read_words(self.filepath), ["falar", "comer", "partir", "dizer"])
+
+    @unittest.skipUnless(HAS_NUMPY, "needs numpy")
+    def test_load_ignores_partial_record(self):
+        words, records = analytics.load(self.filepath)
+        self.assertEqual(len(records), 17)
+        with open(self.filepath, "ab") as outf:
+            outf.write(b"\x00"*5)
+        words, records = analytics.load(self.filepath)
+        self.assertEqual(len(records), 17)
+        self.assertEqual(records["word"][-1], 3)
+
+    @unittest.skipUnless(HAS_NUMPY, "needs numpy")
+    def test_stats(self):
+        stats = analytics.AnswerStats(WORDS, self.filepath, now=NOW)
+        # unknown word dropped
+        self.assertEqual(stats.total, 16)
+        attempts, accuracy, error_rate = stats.by_card()
+        self.assertEqual(attempts.tolist(), [8, 4, 4, 0])
+        self.assertEqual(accuracy[:3].tolist(), [0.5, 1.0, 0.0])
+        slot = stats.attempts[0, TENSE_VALUES.index(TENSE.PRESENT), PERSON.THIRD - 1, 1]
+        self.assertEqual(slot, 4)
+        self.assertEqual([card[0] for card in stats.weakest_cards(n=5)], ["partir", "falar"])
+        self.assertEqual(analytics.AnswerStats(WORDS, self.filepath, to_english=True, now=NOW).total, 4)
+
+    @unittest.skipUnless(HAS_NUMPY, "needs numpy")
+    def test_adaptive_weights(self):
+        weights = analytics.AdaptiveWeights(WORDS, self.filepath, now=NOW)
+        card_weights = weights.card_weights.tolist()
+        # wrong recently weighs more than wrong long ago, unanswered is in between right and wrong
+        self.assertGreater(card_weights[0], card_weights[2])
+        self.assertGreater(card_weights[3], card_weights[1])
+        tense_weights = weights.tense_weights("falar")
+        self.assertGreater(
+            tense_weights[TENSE_VALUES.index(TENSE.PERFECT)], tense_weights[TENSE_VALUES.index(TENSE.PRESENT)]
+        )
+        self.assertEqual(weights.tense_weights("ser"), weights.tense_weights("unknown"))
+        drawn = weights.sample_cards(10, rng=random.Random(1))
+        self.assertEqual(sorted(drawn), [0, 1, 2, 3])
+        self.assertEqual(drawn, weights.sample_cards(10, rng=random.Random(1)))
+
+    @unittest.skipUnless(HAS_NUMPY, "needs numpy")
+    def test_no_history_uniform(self):
+        weights = analytics.AdaptiveWeights(WORDS, os.path.join(self.dir.name, "none.log"), now=NOW)
+        self.assertEqual(len(set(weights.card_weights.tolist())), 1)
+        self.assertEqual(len(set(weights.tense_weights("falar"))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
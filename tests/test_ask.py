@@ -0,0 +1,40 @@
+import os, sys, subprocess, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# asks through every kind of question, printing what was read
+_SCRIPT = """
+import sys
+sys.path.insert(0, {0!r})
+from bin import ask
+results = [ask.line(), ask.timed(seconds=5), ask.basic(), ask.yes_no()]
+print("")
+print(repr(results))
+"""
+
+
+def _run(args, stdin):
+    return subprocess.run(
+        [sys.executable] + args, input=stdin, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, 
+        timeout=60
+    )
+
+
+class TestPipedInput(unittest.TestCase):
+
+    def test_questions_share_piped_input(self):
+        result = _run(["-c", _SCRIPT.format(ROOT)], "Olá Mundo\nb\nC\ny\n".encode("utf-8"))
+        self.assertEqual(result.returncode, 0, result.stderr.decode())
+        output = result.stdout.decode("utf-8").rstrip().split("\n")[-1]
+        self.assertEqual(output, repr(["Olá Mundo", "b", "c", True]))
+
+    def test_add_word_piped(self):
+        # add_word's own prompts used to read stdin separately, so answers piped after them were lost
+        result = _run(["add_word.py"], b"falar\nn\n")
+        self.assertEqual(result.returncode, 0, result.stderr.decode())
+        self.assertNotIn(b"EOFError", result.stderr)
+        self.assertIn(b"already exists", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
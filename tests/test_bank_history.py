@@ -0,0 +1,59 @@
+import os, sys, csv, shutil, subprocess, tempfile, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import sqlitebank, history
+
+
+class TestRollback(unittest.TestCase):
+
+    def setUp(self):
+        # scripts use paths relative to working directory, so run in a copy of the card bank
+        self.dir = tempfile.TemporaryDirectory()
+        os.mkdir(os.path.join(self.dir.name, "bank"))
+        for name in ("card-bank-built.csv", "card-bank-similar.csv"):
+            shutil.copy(os.path.join(ROOT, "bank", name), os.path.join(self.dir.name, "bank", name))
+        self.table = os.path.join(self.dir.name, "bank/card-bank-built.csv")
+        self.database = os.path.join(self.dir.name, sqlitebank.DEFAULT_DATABASE)
+        self.history = os.path.join(self.dir.name, history.DEFAULT_HISTORY)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_rollback_updates_database(self):
+        conn = sqlitebank.connect(self.database)
+        sqlitebank.import_csv(conn, self.table)
+        history.snapshot(self.table, message="first", history=self.history)
+        with open(self.table, "r", encoding="utf-8") as csvf:
+            rows = list(csv.reader(csvf))
+        num_cards = len(rows) - 1
+        original = dict(zip(rows[0], rows[3]))
+        removed = rows.pop(5)[0]
+        rows[3][1] = "changed"
+        with open(self.table, "w", newline="", encoding="utf-8") as csvf:
+            csv.writer(csvf).writerows(rows)
+        history.snapshot(self.table, message="second", history=self.history)
+        # as build would have left database
+        sqlitebank.delete_card(conn, removed)
+        sqlitebank.upsert_card(conn, dict(zip(rows[0], rows[3])))
+        conn.close()
+
+        result = subprocess.run(
+            [sys.executable, os.path.join(ROOT, "bank_history.py"), "rollback", "1"],
+            cwd=self.dir.name, capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("database updated", result.stdout)
+
+        bank = sqlitebank.SqliteCardBank(self.database)
+        try:
+            self.assertEqual(len(bank), num_cards)
+            self.assertEqual(bank.get(removed)["inf"], removed)
+            self.assertEqual(bank.get(original["inf"])[rows[0][1]], original[rows[0][1]])
+        finally:
+            bank.conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import os, sys, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin.cardbank import CardBank
+
+
+class TestFindWords(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bank = CardBank(
+            os.path.join(ROOT, "bank/card-bank-built.csv"), os.path.join(ROOT, "bank/card-bank-similar.csv")
+        )
+
+    def test_found_in_order(self):
+        words, unrecognized = self.bank.find_words(["ser", "falar"])
+        self.assertEqual(words, ["ser", "falar"])
+        self.assertEqual(unrecognized, [])
+
+    def test_unrecognized_with_suggestion(self):
+        words, unrecognized = self.bank.find_words(["serr", "falar"])
+        self.assertEqual(words, ["falar"])
+        self.assertEqual(len(unrecognized), 1)
+        self.assertTrue(unrecognized[0].startswith("Unrecognized word option: serr (did you mean:"))
+        self.assertIn("ser", unrecognized[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os, sys, json, socket, tempfile, threading, time, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import daemon
+from bin.cardbank import CardBank
+
+
+class TestCardBankDaemon(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.TemporaryDirectory()
+        cls.socket_path = os.path.join(cls.dir.name, "bank.sock")
+        table = os.path.join(ROOT, "bank/card-bank-built.csv")
+        similar_table = os.path.join(ROOT, "bank/card-bank-similar.csv")
+        cls.csv_bank = CardBank(table, similar_table)
+        # daemon builds indexes up front, which splits forms on cards into tuples
+        cls.csv_bank.get_form_index()
+        cls.csv_bank.get_gloss_index()
+        cls.card_daemon = daemon.CardBankDaemon(table, similar_table, interval=60)
+        cls.thread = threading.Thread(target=cls.card_daemon.serve, args=(cls.socket_path,), daemon=True)
+        cls.thread.start()
+        for _ in range(100):
+            if daemon.is_running(cls.socket_path):
+                break
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls):
+        bank = daemon.RemoteCardBank(cls.socket_path)
+        bank.call("stop")
+        bank.close()
+        cls.thread.join(5)
+        cls.dir.cleanup()
+
+    def test_remote_same_as_local(self):
+        bank = daemon.RemoteCardBank(self.socket_path)
+        try:
+            self.assertEqual(len(bank), len(self.csv_bank))
+            self.assertEqual(bank.get("falar"), self.csv_bank.get("falar"))
+            self.assertEqual(bank.get_form_index().lookup("falamos"), self.csv_bank.get_form_index().lookup("falamos"))
+            with self.assertRaises(ValueError):
+                bank.call("nonsense")
+        finally:
+            bank.close()
+
+    def test_unserializable_result_sends_error(self):
+        # result can't be encoded as JSON, client should get an error reply rather than no reply
+        call = self.card_daemon.call
+        self.card_daemon.call = lambda request: {object()} if request.get("op") == "bad" else call(request)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(5)
+        try:
+            sock.connect(self.socket_path)
+            rfile = sock.makefile("rb")
+            sock.sendall(b'{"op": "bad"}\n')
+            response = json.loads(rfile.readline())
+            self.assertFalse(response["ok"])
+            self.assertEqual(response["error"], "TypeError")
+            # connection still usable afterwards
+            sock.sendall(b'{"op": "len"}\n')
+            response = json.loads(rfile.readline())
+            self.assertEqual(response["result"], len(self.csv_bank))
+            rfile.close()
+        finally:
+            del self.card_daemon.call
+            sock.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os, sys, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import deck, tester
+from bin.cardbank import CardBank
+
+
+class TestGenerate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bank = CardBank(
+            os.path.join(ROOT, "bank/card-bank-built.csv"), os.path.join(ROOT, "bank/card-bank-similar.csv")
+        )
+
+    def test_count_reached(self):
+        questions = list(deck.generate(self.bank, seed=1, words=["falar", "ser"], count=10))
+        self.assertEqual(len(questions), 10)
+        self.assertEqual([q["n"] for q in questions], list(range(1, 11)))
+
+    def test_same_seed_same_deck(self):
+        first = list(deck.generate(self.bank, seed="x", words=["falar", "comer"], count=6))
+        second = list(deck.generate(self.bank, seed="x", words=["falar", "comer"], count=6))
+        self.assertEqual(first, second)
+
+    def test_skips_words_without_tenses(self):
+        tense_group = tester.get_tense_group(["imperative"])
+        questions = list(deck.generate(self.bank, seed=1, words=["poder", "falar"], tense_group=tense_group, count=5))
+        self.assertEqual(len(questions), 5)
+        self.assertEqual({q["inf"] for q in questions}, {"falar"})
+
+    def test_no_valid_words_with_count_raises(self):
+        # used to loop forever, as every word is skipped on every pass
+        tense_group = tester.get_tense_group(["imperative"])
+        with self.assertRaises(Exception):
+            next(deck.generate(self.bank, seed=1, words=["poder"], tense_group=tense_group, count=5))
+
+    def test_no_valid_words_without_count_raises(self):
+        tense_group = tester.get_tense_group(["imperative"])
+        with self.assertRaises(Exception):
+            list(deck.generate(self.bank, seed=1, words=["poder"], tense_group=tense_group))
+
+
+if __name__ == "__main__":
+    unittest.main()
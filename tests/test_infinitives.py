@@ -0,0 +1,40 @@
+import os, sys, tempfile, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import infinitives
+
+
+class TestBuildWordlist(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.wordlist = os.path.join(self.dir.name, "words.txt")
+        self.output = os.path.join(self.dir.name, "infinitives.txt")
+        with open(self.wordlist, "w", encoding="utf-8") as outf:
+            outf.write("# dictionary export\nmar\nflor\nmelhor\nandar\namar VERB\nsonhar v\nmulher NOUN\namor n\n")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_untagged_words_need_check(self):
+        # nouns and adjectives with infinitive endings must not become known infinitives
+        num_words, skipped = infinitives.build_wordlist(wordlists=[self.wordlist], filepath=self.output)
+        index = infinitives.InfinitiveIndex(self.output)
+        self.assertEqual(index.words, ["amar", "sonhar"])
+        self.assertEqual((num_words, skipped), (2, 4))
+
+    def test_untagged_words_added_if_checked_valid(self):
+        check = lambda word: None if word == "andar" else Warning("not a verb")
+        num_words, skipped = infinitives.build_wordlist(
+            wordlists=[self.wordlist], check=check, check_cache=None, filepath=self.output
+        )
+        index = infinitives.InfinitiveIndex(self.output)
+        self.assertEqual(index.words, ["amar", "andar", "sonhar"])
+        self.assertNotIn("mar", index)
+        self.assertEqual(skipped, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os, sys, io, csv, time, random, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import pipeline, sources
+from bin.constants import SUPPLIED_FIELDS
+
+
+def _read(name):
+    with open(os.path.join(ROOT, "bank", name), "r", encoding="utf-8") as csvf:
+        return [card for card in csv.DictReader(csvf) if "inf" in card]
+
+
+class _SlowSource(sources.DumpSource):
+    '''Dump of built card bank answering after random delays, in two steps (as the scraper does), so cards
+    finish out of order. Raises for infinitives in `fail`.'''
+
+    def __init__(self, fail=()):
+        super().__init__(os.path.join(ROOT, "bank/card-bank-built.csv"))
+        self.fail = set(fail)
+        self.rng = random.Random(0)
+
+    def get_raw(self, infinitive):
+        time.sleep(self.rng.random()*0.005)
+        if infinitive in self.fail:
+            raise Exception("page not served")
+        return False, infinitive
+
+    def parse_raw(self, infinitive, raw):
+        time.sleep(self.rng.random()*0.002)
+        return super().parse_raw(infinitive, self.fetch(raw))
+
+
+class TestPlan(unittest.TestCase):
+
+    def test_actions(self):
+        basic = _read("card-bank-basic.csv")[:4]
+        built = {card["inf"]: card for card in _read("card-bank-built.csv")}
+        existing = {card["inf"]: dict(built[card["inf"]]) for card in basic}
+        # supplied field changed, built field missing, not built yet, unchanged
+        changed = dict(basic[0], **{SUPPLIED_FIELDS[-1]: "changed"})
+        existing[basic[1]["inf"]]["gerund"] = ""
+        del existing[basic[2]["inf"]]
+        actions = [action for action, card in pipeline.plan([changed] + basic[1:], existing)]
+        self.assertEqual(actions, ["update", "build", "build", "keep"])
+        actions = [action for action, card in pipeline.plan(basic, existing, force_rebuild=[basic[3]["inf"]])]
+        self.assertEqual(actions[3], "build")
+
+
+class TestBuildPipeline(unittest.TestCase):
+
+    def test_written_in_planned_order(self):
+        basic = _read("card-bank-basic.csv")
+        fail = {basic[3]["inf"], basic[10]["inf"]}
+        outf = io.StringIO(newline="")
+        build = pipeline.BuildPipeline(_SlowSource(fail), fetch_workers=8, parse_workers=3, queue_size=4)
+        built, updated, errored = build.run(pipeline.plan(basic, {}), outf)
+
+        expected = [card["inf"] for card in basic if card["inf"] not in fail]
+        self.assertEqual(built, expected)
+        self.assertEqual(updated, [])
+        self.assertEqual([inf for inf, message in errored], [card["inf"] for card in basic if card["inf"] in fail])
+        outf.seek(0)
+        written = list(csv.DictReader(outf))
+        self.assertEqual([card["inf"] for card in written], expected)
+        # same as card bank built from website
+        built_cards = {card["inf"]: card for card in _read("card-bank-built.csv")}
+        for card in written:
+            self.assertEqual(sources.from_card(card), sources.from_card(built_cards[card["inf"]]), card["inf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
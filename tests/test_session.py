@@ -0,0 +1,67 @@
+import os, sys, json, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin.cardbank import CardBank
+from bin.session import Session
+
+
+def _answer(session, n):
+    '''Answer current question, wrong every third time.'''
+    question = session.next_question()
+    if n % 3 == 0:
+        guess = "x"
+    elif question["to_english"]:
+        guess = question["verbs"]["english"]["verbs"][0]
+    else:
+        guess = question["verbs"]["portuguese"]["verbs"][0]
+    session.submit(guess)
+    return question["card"]["inf"], question["prompt"]["prompt"]
+
+
+def _run(session, n=0):
+    '''Answer rest of session, returning (infinitive, prompt) of questions asked.'''
+    asked = []
+    while session.next_question() is not None:
+        asked.append(_answer(session, n))
+        n += 1
+    return asked
+
+
+class TestSession(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bank = CardBank(
+            os.path.join(ROOT, "bank/card-bank-built.csv"), os.path.join(ROOT, "bank/card-bank-similar.csv")
+        )
+
+    def test_same_seed_same_questions(self):
+        first = _run(Session.new(self.bank, num_words=5, seed=3))
+        second = _run(Session.new(self.bank, num_words=5, seed=3))
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 15)
+
+    def test_draw_then_question(self):
+        session = Session.new(self.bank, num_words=2, seed=3)
+        params, to_english = session.draw()
+        self.assertEqual(session.draw(), (params, to_english))
+        question = session.next_question()
+        self.assertIs(question["params"], params)
+        self.assertEqual(question["to_english"], to_english)
+
+    def test_resume_from_checkpoint(self):
+        # resuming part way through (including a drawn but unanswered question) asks the same questions
+        whole = Session.new(self.bank, num_words=5, seed=9)
+        part = Session.new(self.bank, num_words=5, seed=9)
+        for n in range(7):
+            _answer(whole, n)
+            _answer(part, n)
+        part.next_question()
+        resumed = Session.from_dict(self.bank, json.loads(json.dumps(part.to_dict())))
+        self.assertEqual(_run(resumed, 7), _run(whole, 7))
+
+
+if __name__ == "__main__":
+    unittest.main()
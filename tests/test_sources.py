@@ -0,0 +1,64 @@
+import os, sys, csv, tempfile, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import sources
+from bin.constants import TENSE
+
+
+def _read_built():
+    with open(os.path.join(ROOT, "bank/card-bank-built.csv"), "r", encoding="utf-8") as csvf:
+        return list(csv.DictReader(csvf))
+
+
+class TestRulesSource(unittest.TestCase):
+
+    def test_same_as_card_bank(self):
+        # every card conjugated by rule should match the card built from the website
+        source = sources.RulesSource()
+        answered = 0
+        for card in _read_built():
+            result = source.get(card["inf"])
+            if result is None:
+                continue
+            answered += 1
+            self.assertEqual(sources.compare(result, sources.from_card(card)), [], card["inf"])
+        self.assertGreater(answered, 0)
+
+    def test_spelling_changes(self):
+        source = sources.RulesSource(exceptions=set())
+        self.assertEqual(source.get("ficar")[TENSE.PERFECT]["eu"], "fiquei")
+        self.assertEqual(source.get("conhecer")[TENSE.PRESENT]["eu"], "conheço")
+
+    def test_irregular_not_answered(self):
+        source = sources.RulesSource()
+        for infinitive in ("ser", "fazer", "sentir", "passear", "pôr"):
+            self.assertIsNone(source.get(infinitive), infinitive)
+
+
+class TestSourceChain(unittest.TestCase):
+
+    def test_first_source_answering_used(self):
+        cards = {card["inf"]: card for card in _read_built()}
+        dump = sources.DumpSource(os.path.join(ROOT, "bank/card-bank-built.csv"))
+        chain = sources.SourceChain([sources.RulesSource(), dump], verify=dump)
+        self.assertEqual(sources.compare(chain.get("falar"), sources.from_card(cards["falar"])), [])
+        self.assertEqual(sources.compare(chain.get("fazer"), sources.from_card(cards["fazer"])), [])
+        self.assertEqual(chain.answered_by, {"falar": "rules", "fazer": "dump"})
+        self.assertEqual(chain.mismatches, [])
+        # nothing answers, not cached so tried again
+        self.assertIsInstance(chain.get("xyzor"), Warning)
+        self.assertNotIn("xyzor", chain.cache)
+
+    def test_cache_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_file = os.path.join(directory, "rules.json")
+            source = sources.RulesSource(cache_file=cache_file)
+            result = source.get("falar")
+            source.save()
+            self.assertEqual(sources.RulesSource(cache_file=cache_file, exceptions={"falar"}).get("falar"), result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os, sys, tempfile, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import sqlitebank
+from bin.cardbank import CardBank, read
+
+
+class TestSqliteCardBank(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = os.path.join(ROOT, "bank/card-bank-built.csv")
+        cls.similar_table = os.path.join(ROOT, "bank/card-bank-similar.csv")
+        cls.csv_bank = CardBank(cls.table, cls.similar_table)
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.dir.name, "card-bank.db")
+        conn = sqlitebank.connect(self.database)
+        sqlitebank.import_csv(conn, self.table, self.similar_table)
+        conn.close()
+        self.bank = sqlitebank.SqliteCardBank(self.database)
+
+    def tearDown(self):
+        self.bank.conn.close()
+        self.dir.cleanup()
+
+    def test_same_as_csv(self):
+        self.assertEqual(len(self.bank), len(self.csv_bank))
+        self.assertEqual(self.bank.infinitives(), self.csv_bank.infinitives())
+        self.assertEqual(self.bank[5]["inf"], self.csv_bank[5]["inf"])
+        self.assertEqual(self.bank.cards[-1]["inf"], self.csv_bank.cards[-1]["inf"])
+
+    def test_count_kept_up_to_date(self):
+        num_cards = len(self.bank)
+        card = dict(read(self.table, build_forms=False)[3])
+        card["inf"] = "testar"
+        self.bank.upsert(card)
+        self.assertEqual(len(self.bank), num_cards + 1)
+        self.assertEqual(self.bank[num_cards]["inf"], "testar")
+        # written by another connection, e.g. a build
+        other = sqlitebank.connect(self.database)
+        sqlitebank.delete_card(other, "testar")
+        sqlitebank.delete_card(other, self.bank[0]["inf"])
+        other.close()
+        self.assertEqual(len(self.bank), num_cards - 1)
+        self.bank.upsert(card)
+        self.bank.delete("testar")
+        self.assertEqual(len(self.bank), num_cards - 1)
+        self.assertEqual(self.bank.infinitives(), self.csv_bank.infinitives()[1:])
+        self.assertEqual([card["inf"] for card in self.bank], self.csv_bank.infinitives()[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
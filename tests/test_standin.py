@@ -0,0 +1,52 @@
+import os, sys, tempfile, unittest, importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import builder, sources
+from bin.standin import StandinConjugator, check_pages, missing_pages, FIXTURE_VERBS, FIXTURE_INVALID
+
+
+class TestStandin(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.pages = os.path.join(self.dir.name, "pages")
+        os.makedirs(self.pages)
+        with open(os.path.join(self.dir.name, "secret.html"), "w", encoding="utf-8") as outf:
+            outf.write("secret")
+        self.standin = StandinConjugator(os.path.join(ROOT, "bank/card-bank-built.csv"), pages=self.pages)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_path_outside_pages_rejected(self):
+        for path in ("../secret", "..%2Fsecret", "a/../../secret", ""):
+            status, body = self.standin.respond(path)
+            self.assertEqual(status, 404, path)
+            self.assertNotIn("secret", body)
+
+    def test_pages(self):
+        status, body = self.standin.respond("falar")
+        self.assertEqual(status, 200)
+        self.assertIn('class="tense-name"', body)
+        status, body = self.standin.respond("xyzzyar")
+        self.assertEqual(status, 200)
+        self.assertIn('id="warning"', body)
+
+    def test_missing_pages_skipped(self):
+        self.assertEqual(missing_pages(self.pages), list(FIXTURE_VERBS + FIXTURE_INVALID))
+        self.assertEqual(check_pages(self.pages, os.path.join(ROOT, "bank/card-bank-built.csv")), [])
+
+    @unittest.skipUnless(importlib.util.find_spec("requests_html"), "requests_html not installed")
+    def test_pages_parse(self):
+        for infinitive in ("falar", "fazer"):
+            status, body = self.standin.respond(infinitive)
+            result = builder.parse_page(body, infinitive)
+            self.assertEqual(sources.compare(result, self.standin.tense_maps[infinitive]), [])
+        status, body = self.standin.respond("xyzzyar")
+        self.assertIsInstance(builder.parse_page(body, "xyzzyar"), Warning)
+
+
+if __name__ == "__main__":
+    unittest.main()
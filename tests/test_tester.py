@@ -0,0 +1,63 @@
+import os, io, sys, unittest, contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin import ask, tester
+from bin.cardbank import CardBank
+from bin.constants import TENSE, PERSON
+
+
+class TestWrongAnswers(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bank = CardBank(
+            os.path.join(ROOT, "bank/card-bank-built.csv"), os.path.join(ROOT, "bank/card-bank-similar.csv")
+        )
+
+    def _ask(self, verbs, to_english, guesses):
+        '''Ask question with guesses typed in order, returning result and printed output.'''
+        guesses = list(guesses)
+        basic = ask.basic
+        ask.basic = lambda *args, **kwargs: guesses.pop(0)
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                result = tester._question(verbs, to_english, cardbank=self.bank)
+        finally:
+            ask.basic = basic
+        return result, output.getvalue(), guesses
+
+    def test_other_english_form_is_not_typo(self):
+        verbs = self.bank.get_verbs("andar", person=PERSON.FIRST, singular=True, tense=TENSE.PRESENT)
+        result, output, left = self._ask(verbs, True, ["walks", "walk"])
+        self.assertFalse(result["correct"])
+        self.assertIn("3rd person singular present form of 'to walk'", output)
+        self.assertNotIn("typo", output)
+        self.assertEqual(left, ["walk"])
+
+    def test_english_typo_retried(self):
+        verbs = self.bank.get_verbs("andar", person=PERSON.FIRST, singular=True, tense=TENSE.PRESENT)
+        result, output, left = self._ask(verbs, True, ["wakl", "walk"])
+        self.assertTrue(result["correct"])
+        self.assertIn("typo", output)
+
+    def test_portuguese_near_match_without_fuzzy_index(self):
+        verbs = self.bank.get_verbs("falar", person=PERSON.FIRST, singular=True, tense=TENSE.PRESENT)
+        # one letter off 'falamos', a real form of the same verb, but too far from the answer to be a typo
+        result, output, left = self._ask(verbs, False, ["falamoz"])
+        self.assertFalse(result["correct"])
+        self.assertIn("That is close to 'falamos'", output)
+        self.assertIsNone(self.bank.fuzzy_index)
+
+    def test_form_index_search_matches_edit_distance(self):
+        index = self.bank.get_form_index()
+        for distance, form, entries in index.search("falamso"):
+            self.assertLessEqual(distance, 1)
+            self.assertTrue(entries)
+        self.assertIn("falamos", [form for distance, form, entries in index.search("falamso")])
+
+
+if __name__ == "__main__":
+    unittest.main()